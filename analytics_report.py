@@ -0,0 +1,264 @@
+import argparse
+import hashlib
+import html
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
+import pandas as pd
+from score_loader import iter_revision_files, entries_to_frame, add_features
+from score_store import read_entries
+from score_analytics import (
+    add_file_key, fill_missing_scores, score_summary, best_preprocessing, compare_best, max_score_diff,
+    recognized_counts
+)
+from score_plots import (
+    plot_initial_distribution, plot_preprocessing_effect, plot_mean_improvement, plot_recognized_counts
+)
+
+DEFAULT_INITIAL_DIRECTORY = 'ocr_results/revision_INITIAL_complete/'
+DEFAULT_PREPROCESSED_DIRECTORY = 'ocr_results/revision_PREPROCESSED_complete/'
+DEFAULT_CACHE_DIRECTORY = 'ocr_results/report_cache'
+DEFAULT_OUTPUT_DIRECTORY = 'ocr_results/report'
+# Bumped whenever the cached partitions or tables change layout
+CACHE_VERSION = 1
+CATEGORICAL_COLUMNS = ('ocr_method', 'dataset_type', 'preprocessed_method')
+
+def partition_of(revision_directory, path):
+    """
+    Returns the dataset directory a scores file belongs to, the same for both revisions:
+    the scores of 'dataset/timenote/x/' and 'dataset_preprocessed/timenote/x/' are one partition.
+    """
+    parts = os.path.relpath(os.path.dirname(path), revision_directory).split(os.sep)
+    if parts[0] == 'dataset_preprocessed':
+        parts[0] = 'dataset'
+    return '/'.join(parts)
+
+def list_partitions(initial_directory, preprocessed_directory, skip_test_dirs=True):
+    """Returns {partition: {'initial': paths, 'preprocessed': paths}} of the scores files of both revisions."""
+    partitions = {}
+    for revision, directory in (('initial', initial_directory), ('preprocessed', preprocessed_directory)):
+        for path in iter_revision_files(directory, skip_test_dirs):
+            files = partitions.setdefault(partition_of(directory, path), {'initial': [], 'preprocessed': []})
+            files[revision].append(path)
+    return dict(sorted(partitions.items()))
+
+def files_signature(files):
+    """Returns what identifies the content of scores files: their paths, modification times and sizes."""
+    signature = []
+    for revision in ('initial', 'preprocessed'):
+        for path in files[revision]:
+            stat = os.stat(path)
+            signature.append((revision, path, stat.st_mtime_ns, stat.st_size))
+    return (CACHE_VERSION, tuple(signature))
+
+def _load_scores(paths, preprocessed):
+    entries = [entry for path in paths for entry in read_entries(path)]
+    return add_file_key(add_features(entries_to_frame(entries, include_text=False)), preprocessed)
+
+def compute_partition(files):
+    """Loads the scores of a partition and picks the best preprocessing of each of its images."""
+    df_init = _load_scores(files['initial'], preprocessed=False)
+    df_preprocessed = _load_scores(files['preprocessed'], preprocessed=True)
+    if 'preprocessed_method' in df_preprocessed.columns and len(df_preprocessed):
+        best = best_preprocessing(df_preprocessed)
+    else:
+        best = df_preprocessed.iloc[:0]
+    return {'initial': df_init, 'best': best}
+
+class ReportCache:
+    """Pickled partitions and tables in a directory, each valid as long as its signature matches."""
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, name):
+        return os.path.join(self.directory, hashlib.sha1(name.encode()).hexdigest() + '.pkl')
+
+    def get(self, name, signature):
+        path = self._path(name)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                cached_signature, value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return None
+        return value if cached_signature == signature else None
+
+    def put(self, name, signature, value):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(name)
+        # written to a temporary file first, so an interrupted run leaves the previous entry intact
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump((signature, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+
+def _concat(frames):
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype(object).astype('category')
+    return df
+
+def build_tables(initial_directory=DEFAULT_INITIAL_DIRECTORY, preprocessed_directory=DEFAULT_PREPROCESSED_DIRECTORY,
+                 cache_directory=DEFAULT_CACHE_DIRECTORY, skip_test_dirs=True, workers=None, verbose=True):
+    """
+    Computes the report tables of the INITIAL and PREPROCESSED revisions.
+
+    Scores are partitioned by dataset directory. The loaded initial scores and the best preprocessing
+    of every partition are cached with the modification times and sizes of its scores files, so
+    after adding a cemetery only its partition is loaded again. The tables are cached the same way
+    for all partitions together and are returned without any work when nothing changed.
+    :param cache_directory: Directory of the cache, None to compute everything.
+    :param workers: Worker processes computing the changed partitions, None for the CPU count.
+    :return: Dictionary of the tables and of the 'initial' and 'combined' frames the plots use.
+    """
+    partitions = list_partitions(initial_directory, preprocessed_directory, skip_test_dirs)
+    signatures = {partition: files_signature(files) for partition, files in partitions.items()}
+    cache = ReportCache(cache_directory) if cache_directory else None
+    tables_signature = (CACHE_VERSION, initial_directory, preprocessed_directory, tuple(sorted(signatures.items())))
+    if cache is not None:
+        tables = cache.get('tables', tables_signature)
+        if tables is not None:
+            if verbose:
+                print(f"Report tables of {len(partitions)} partitions are up to date")
+            return tables
+
+    results = {}
+    stale = []
+    for partition, files in partitions.items():
+        cached = cache.get(partition, signatures[partition]) if cache is not None else None
+        if cached is None:
+            stale.append(partition)
+        else:
+            results[partition] = cached
+    start_time = time.perf_counter()
+    stale_files = [partitions[partition] for partition in stale]
+    if workers == 1 or len(stale) < 2:
+        computed = [compute_partition(files) for files in stale_files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            computed = list(pool.map(compute_partition, stale_files, chunksize=4))
+    results.update(zip(stale, computed))
+    if cache is not None:
+        for partition in stale:
+            cache.put(partition, signatures[partition], results[partition])
+    if verbose:
+        print(f"Recomputed {len(stale)} of {len(partitions)} partitions in {time.perf_counter() - start_time:.2f}s")
+
+    df_init = fill_missing_scores(_concat([results[partition]['initial'] for partition in partitions]))
+    best = _concat([results[partition]['best'] for partition in partitions])
+    tables = {'initial': df_init, 'grouped': None, 'method_counts': None, 'combined': None,
+              'grouped_combined': None, 'max_diff_by_ocr_method': None, 'max_diff_by_preprocessing': None,
+              'improvement_counts': None}
+    if len(df_init):
+        tables['grouped'] = score_summary(df_init, ['ocr_method', 'dataset_type'])
+    if len(df_init) and len(best):
+        combined = compare_best(df_init, best, verbose=verbose)
+        max_diff_by_preprocessing = max_score_diff(combined, ['file_key', 'preprocessed_method'])
+        tables.update({
+            'method_counts': best['preprocessed_method'].value_counts(),
+            'combined': combined,
+            'grouped_combined': score_summary(combined, ['ocr_method', 'dataset_type', 'preprocessed_method']),
+            'max_diff_by_ocr_method': max_score_diff(combined, ['file_key', 'ocr_method']),
+            'max_diff_by_preprocessing':
+                max_diff_by_preprocessing[max_diff_by_preprocessing['preprocessed_method'] != 'none'],
+            'improvement_counts': recognized_counts(combined),
+        })
+    if cache is not None:
+        cache.put('tables', tables_signature, tables)
+    return tables
+
+def use_file_backend():
+    """Renders figures to files, no display is needed on batch nodes."""
+    matplotlib.use('Agg')
+
+def _render(job):
+    function, args, kwargs = job
+    function(*args, **kwargs)
+    return kwargs['path']
+
+def plot_jobs(tables, output_directory):
+    """Returns the (plot function, args, kwargs) of every figure of the report."""
+    jobs = []
+    initial = tables['initial']
+    if tables['grouped'] is not None:
+        for kind in ('box', 'violin'):
+            jobs.append((plot_initial_distribution, (initial,),
+                         {'kind': kind, 'path': os.path.join(output_directory, f'initial_{kind}.png')}))
+    combined = tables['combined']
+    if combined is not None and len(combined):
+        for ocr_method in combined['ocr_method'].unique():
+            name = 'preprocessing_' + str(ocr_method).lower().replace(' ', '_') + '.png'
+            jobs.append((plot_preprocessing_effect, (combined, ocr_method),
+                         {'path': os.path.join(output_directory, name)}))
+        jobs.append((plot_mean_improvement, (tables['max_diff_by_ocr_method'], 'ocr_method', 'OCR Metode', 'Set3'),
+                     {'path': os.path.join(output_directory, 'improvement_by_ocr_method.png')}))
+        jobs.append((plot_mean_improvement, (tables['max_diff_by_preprocessing'], 'preprocessed_method',
+                                             'Priekšapstrādes metode', 'Set1'),
+                     {'path': os.path.join(output_directory, 'improvement_by_preprocessing.png')}))
+        jobs.append((plot_recognized_counts, (tables['improvement_counts'],),
+                     {'path': os.path.join(output_directory, 'recognized_counts.png')}))
+    return jobs
+
+# Tables written to CSV and shown in the HTML report, in this order
+REPORT_TABLES = (
+    ('grouped', "Initial scores by OCR method and dataset type"),
+    ('method_counts', "Best preprocessing method counts"),
+    ('grouped_combined', "Scores of the improved images by preprocessing method"),
+    ('improvement_counts', "Recognized images by OCR method"),
+)
+
+def write_report(tables, output_directory=DEFAULT_OUTPUT_DIRECTORY, workers=None):
+    """
+    Writes the tables as CSV and renders the plots as PNG in a process pool, then an index.html
+    showing both. Returns the path of index.html.
+    The pool workers render with the file backend, workers=1 renders with the current backend.
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    sections = []
+    for name, title in REPORT_TABLES:
+        table = tables[name]
+        if table is None:
+            continue
+        table.to_csv(os.path.join(output_directory, f'{name}.csv'))
+        if isinstance(table, pd.Series):
+            table = table.to_frame()
+        sections.append(f"<h2>{html.escape(title)}</h2>\n{table.to_html()}")
+
+    jobs = plot_jobs(tables, output_directory)
+    if workers == 1 or len(jobs) < 2:
+        images = [_render(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=use_file_backend) as pool:
+            images = list(pool.map(_render, jobs))
+    sections.extend(f'<img src="{html.escape(os.path.basename(path))}">' for path in images)
+
+    index_path = os.path.join(output_directory, 'index.html')
+    with open(index_path, 'w', encoding='utf-8') as f:
+        f.write("<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>OCR preprocessing report</title>"
+                "</head><body>\n<h1>OCR preprocessing report</h1>\n" + "\n".join(sections) + "\n</body></html>\n")
+    return index_path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Builds the report comparing the INITIAL and PREPROCESSED OCR scores.")
+    parser.add_argument('--initial', default=DEFAULT_INITIAL_DIRECTORY, help="Directory of the initial revision.")
+    parser.add_argument('--preprocessed', default=DEFAULT_PREPROCESSED_DIRECTORY,
+                        help="Directory of the preprocessed revision.")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_DIRECTORY, help="Directory the report is written to.")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_DIRECTORY, help="Directory of the partition cache.")
+    parser.add_argument('--no-cache', action='store_true', help="Recompute every partition.")
+    parser.add_argument('--include-test-dirs', action='store_true', help="Include the dataset's test directories.")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes, the CPU count by default.")
+    args = parser.parse_args(argv)
+
+    use_file_backend()
+    tables = build_tables(args.initial, args.preprocessed, cache_directory=None if args.no_cache else args.cache,
+                          skip_test_dirs=not args.include_test_dirs, workers=args.workers)
+    if tables['grouped_combined'] is not None:
+        print(tables['grouped_combined'])
+    print("Report written to", write_report(tables, args.output, workers=args.workers))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import sys
+import os.path
+import time
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+from comparison_table import ComparisonTable
+from score_analytics_benchmark import make_revisions, library_compare, OCR_METHODS, POSTFIXES
+
+def batch_entries(image, rng):
+    """Score entries of one newly scored image, as a ScoreService flush delivers them."""
+    stem = f"timenote/cemetery_new/{image}"
+    entries = [{'file_id': f'dataset/{stem}.jpg', 'ocr_method': method, 'composite_score': float(rng.random())}
+               for method in OCR_METHODS]
+    entries += [{'file_id': f'dataset_preprocessed/{stem}{postfix}', 'ocr_method': method,
+                 'composite_score': float(rng.random())} for postfix in POSTFIXES for method in OCR_METHODS]
+    return entries
+
+def run_benchmark(sizes=(30000, 300000), batches=20):
+    """Compares updating the table with one image per batch against recomputing the comparison."""
+    print(f"{'rows':>9} {'full (s)':>9} {'update (ms)':>12}")
+    rng = np.random.default_rng(0)
+    for rows in sizes:
+        df_init, df_preprocessed = make_revisions(rows)
+        start = time.perf_counter()
+        library_compare(df_init, df_preprocessed)
+        full_time = time.perf_counter() - start
+
+        table = ComparisonTable()
+        table.update_frame(df_init.assign(preprocessed_method=None))
+        table.update_frame(df_preprocessed)
+        start = time.perf_counter()
+        for image in range(batches):
+            table.update(batch_entries(image, rng))
+        update_time = (time.perf_counter() - start) / batches
+        print(f"{rows:>9} {full_time:>9.2f} {update_time * 1000:>12.1f}")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,37 @@
+import sys
+import os.path
+import time
+import cv2
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+from preprocess import correct_skew, DESKEW_METHODS
+
+def make_page(width, height, angle, seed=0):
+    """Builds an image of dark text lines on a light background, rotated by angle degrees."""
+    rng = np.random.default_rng(seed)
+    image = np.full((height, width, 3), 235, np.uint8)
+    text = "VALIJA ERNESTSONE 1921 2018"
+    for line in range(8):
+        cv2.putText(image, text[:int(rng.integers(10, len(text) + 1))],
+                    (width // 10, height // 6 + line * height // 11), cv2.FONT_HERSHEY_SIMPLEX,
+                    width / 900, (20, 20, 20), max(1, width // 400))
+    M = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(image, M, (width, height), borderMode=cv2.BORDER_REPLICATE)
+
+def run_benchmark(size=(3000, 2000), angles=(-3.5, -1, 0, 2, 4.25), delta=0.25):
+    print(f"{size[0]}x{size[1]} images, angle resolution {delta} degrees")
+    print(f"{'method':>16} {'mean time (s)':>14} {'max angle error':>16}")
+    pages = [(angle, make_page(*size, angle)) for angle in angles]
+    for method in DESKEW_METHODS:
+        elapsed = 0.0
+        max_error = 0.0
+        for angle, page in pages:
+            start = time.perf_counter()
+            best_angle, _ = correct_skew(page, delta=delta, method=method)
+            elapsed += time.perf_counter() - start
+            # the correction rotates back by the angle the page was rotated by
+            max_error = max(max_error, abs(best_angle + angle))
+        print(f"{method:>16} {elapsed / len(pages):>14.3f} {max_error:>16.2f}")
+
+if __name__ == "__main__":
+    run_benchmark()
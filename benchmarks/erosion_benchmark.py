@@ -0,0 +1,53 @@
+import sys
+import os.path
+import timeit
+import cv2
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+from skimage import measure
+from object_selection_helper import ObjectSelectionHelper
+
+def reerode_until_max_area(image):
+    # Previous implementation of erode_until_max_area, used as the baseline
+    max_area = 20000
+    kernel = np.ones((3, 3), np.uint8)
+    iterations = 1
+    while iterations <= 20:
+        eroded = cv2.erode(image, kernel, iterations=iterations)
+        try:
+            label_img = measure.label(eroded)
+            props = measure.regionprops(label_img)
+            props_sorted = sorted(props, key=lambda prop: prop.area, reverse=True)
+            if props_sorted[0].area < max_area:
+                break
+        except IndexError:
+            return image
+        iterations += 1
+    return eroded
+
+def make_mask(height, width, seed):
+    """Builds an inverted edge mask of a photo sized image with a few textured objects."""
+    rng = np.random.default_rng(seed)
+    image = np.full((height, width, 3), 200, np.uint8)
+    for _ in range(6):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        axes = (int(rng.integers(width // 10, width // 3)), int(rng.integers(height // 10, height // 3)))
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.ellipse(image, center, axes, float(rng.uniform(0, 180)), 0, 360, color, -1)
+    noise = rng.normal(0, 25, image.shape)
+    image = np.clip(image + noise, 0, 255).astype(np.uint8)
+    return np.invert(cv2.Canny(image, 100, 200))
+
+def run_benchmark(sizes=((1000, 750), (3000, 2250), (4000, 3000)), seed=0):
+    helper = ObjectSelectionHelper(verbose=False)
+    print(f"{'size':>12} {'re-erode (s)':>14} {'distance search (s)':>21} {'speedup':>10}")
+    for width, height in sizes:
+        # the equivalence of both is tested in tests/test_morphology.py
+        mask = make_mask(height, width, seed)
+
+        old_time = min(timeit.repeat(lambda: reerode_until_max_area(mask), number=1, repeat=3))
+        new_time = min(timeit.repeat(lambda: helper.erode_until_max_area(mask), number=1, repeat=3))
+        print(f"{width}x{height:<6} {old_time:>12.3f} {new_time:>21.3f} {old_time / new_time:>9.1f}x")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,52 @@
+import random
+import string
+import sys
+import os.path
+import timeit
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+from similarity_metrics import lcs_length
+
+def dp_lcs_length(X, Y):
+    # Previous full-table implementation of lcs_length, used as the baseline
+    m = len(X)
+    n = len(Y)
+    L = [[0] * (n+1) for i in range(m+1)]
+
+    for i in range(m+1):
+        for j in range(n+1):
+            if i == 0 or j == 0:
+                L[i][j] = 0
+            elif X[i-1] == Y[j-1]:
+                L[i][j] = L[i-1][j-1] + 1
+            else:
+                L[i][j] = max(L[i-1][j], L[i][j-1])
+
+    return L[m][n]
+
+def make_pair(length, rng):
+    """Builds a true text and a noisy OCR version of it with typos and dropped characters."""
+    alphabet = string.ascii_lowercase + ' '
+    true_text = ''.join(rng.choice(alphabet) for _ in range(length))
+    ocr_chars = []
+    for ch in true_text:
+        roll = rng.random()
+        if roll < 0.05:
+            continue
+        ocr_chars.append(rng.choice(alphabet) if roll < 0.15 else ch)
+    return true_text, ''.join(ocr_chars)
+
+def run_benchmark(lengths=(50, 500, 5000), seed=0):
+    rng = random.Random(seed)
+    print(f"{'length':>8} {'dp (s)':>12} {'bit-parallel (s)':>18} {'speedup':>10}")
+    for length in lengths:
+        X, Y = make_pair(length, rng)
+        assert lcs_length(X, Y) == dp_lcs_length(X, Y)
+
+        # Keep the total runtime of the quadratic baseline reasonable
+        repeat = max(1, 200000 // (length * length))
+        dp_time = min(timeit.repeat(lambda: dp_lcs_length(X, Y), number=repeat, repeat=3)) / repeat
+        bit_time = min(timeit.repeat(lambda: lcs_length(X, Y), number=repeat, repeat=3)) / repeat
+        print(f"{length:>8} {dp_time:>12.6f} {bit_time:>18.6f} {dp_time / bit_time:>9.1f}x")
+
+if __name__ == "__main__":
+    run_benchmark()
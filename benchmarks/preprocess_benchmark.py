@@ -0,0 +1,51 @@
+import sys
+import os.path
+import time
+import cv2
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+from preprocess import preprocess_for_ocr
+
+def reference_preprocess(image, invert=True):
+    """The former preprocess_for_ocr: cubic resize of the inverted image and an identity dilate and erode."""
+    image = np.array(image)
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    if invert:
+        gray = cv2.bitwise_not(gray)
+    resize_factor = 2000 / max(image.shape[:2])
+    resized = cv2.resize(gray, None, fx=resize_factor, fy=resize_factor, interpolation=cv2.INTER_CUBIC)
+    kernel = np.ones((1, 1), np.uint8)
+    dilated = cv2.dilate(resized, kernel, iterations=1)
+    return cv2.erode(dilated, kernel, iterations=1)
+
+def make_stone(width, height, seed=0):
+    """Builds a photo-like stone: blotchy grey granite texture with lighter engraved text."""
+    rng = np.random.default_rng(seed)
+    texture = cv2.resize(rng.integers(40, 110, (height // 16, width // 16, 3), dtype=np.uint8), (width, height),
+                         interpolation=cv2.INTER_CUBIC)
+    image = cv2.add(texture, rng.integers(0, 25, (height, width, 3), dtype=np.uint8))
+    for line, text in enumerate(("VALIJA", "ERNESTSONE", "1921 - 2018")):
+        cv2.putText(image, text, (width // 8, height // 3 + line * height // 6), cv2.FONT_HERSHEY_SIMPLEX,
+                    width / 500, (200, 200, 190), max(1, width // 200))
+    return image
+
+def time_function(function, images, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for image in images:
+            function(image)
+    return (time.perf_counter() - start) / (repeat * len(images))
+
+def run_benchmark(sizes=((4032, 3024), (1600, 1200), (800, 600)), repeat=5):
+    print(f"{'image size':>12} {'former (ms)':>12} {'fused (ms)':>11} {'reused out (ms)':>16} {'speedup':>8}")
+    for width, height in sizes:
+        images = [make_stone(width, height, seed) for seed in range(3)]
+        out = np.empty_like(preprocess_for_ocr(images[0]))
+        former = time_function(reference_preprocess, images, repeat)
+        fused = time_function(preprocess_for_ocr, images, repeat)
+        reused = time_function(lambda image: preprocess_for_ocr(image, out=out), images, repeat)
+        print(f"{width:>6}x{height:<5} {former * 1000:>12.2f} {fused * 1000:>11.2f} {reused * 1000:>16.2f} "
+              f"{former / reused:>7.2f}x")
+
+if __name__ == "__main__":
+    run_benchmark()
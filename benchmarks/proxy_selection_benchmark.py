@@ -0,0 +1,62 @@
+import contextlib
+import io
+import sys
+import os.path
+import time
+import cv2
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+from object_selection import ObjectSelection
+from object_selection_helper import ObjectSelectionHelper
+
+def make_photo(width, height, seed):
+    """Builds a photo sized test image: a textured background with a light plaque carrying text."""
+    rng = np.random.default_rng(seed)
+    image = np.empty((height, width, 3), np.uint8)
+    image[:] = rng.integers(40, 140, 3)
+    # texture on a coarser grid, like the stone and foliage of the photos, plus sensor noise
+    texture = rng.integers(0, 60, (height // 16, width // 16, 3), dtype=np.uint8)
+    image = cv2.add(image, cv2.resize(texture, (width, height), interpolation=cv2.INTER_LINEAR))
+    image = cv2.add(image, rng.integers(0, 10, (height, width, 3), dtype=np.uint8))
+    for _ in range(4):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        axes = (int(rng.integers(width // 20, width // 6)), int(rng.integers(height // 20, height // 6)))
+        cv2.ellipse(image, center, axes, float(rng.uniform(0, 180)), 0, 360,
+                    tuple(int(c) for c in rng.integers(0, 255, 3)), -1)
+    x0, y0 = int(width * rng.uniform(0.2, 0.35)), int(height * rng.uniform(0.2, 0.35))
+    x1, y1 = int(width * rng.uniform(0.65, 0.8)), int(height * rng.uniform(0.65, 0.8))
+    cv2.rectangle(image, (x0, y0), (x1, y1), (225, 225, 215), -1)
+    for line in range(4):
+        y = y0 + (line + 1) * (y1 - y0) // 5
+        cv2.putText(image, "JANIS OZOLS 1901", (x0 + (x1 - x0) // 10, y), cv2.FONT_HERSHEY_SIMPLEX,
+                    width / 1500, (30, 30, 30), max(1, width // 600))
+    return image
+
+def select(image, proxy_long_edge):
+    """Runs both selection methods, returning their rectangles and the time including the downscaling."""
+    selector = ObjectSelection('benchmark/photo.jpg', verbose=False, image=image, write_outputs=False,
+                               visualize=False, proxy_long_edge=proxy_long_edge)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        selector.setup_helper()
+        for method in ('color_segmentation', 'edge_detection'):
+            selector.select_object(method)
+        elapsed = time.perf_counter() - start
+    return selector.selection_rects, elapsed
+
+def run_benchmark(size=(4032, 3024), proxy_long_edge=800, images=3):
+    helper = ObjectSelectionHelper(verbose=False)
+    print(f"{size[0]}x{size[1]} images, proxy long edge {proxy_long_edge}")
+    print(f"{'image':>6} {'full (s)':>10} {'proxy (s)':>10} {'speedup':>9} "
+          f"{'color IoU':>10} {'edge IoU':>9}")
+    for seed in range(images):
+        image = make_photo(*size, seed)
+        full_rects, full_time = select(image, None)
+        proxy_rects, proxy_time = select(image, proxy_long_edge)
+        ious = [helper.calculate_rect_iou(full_rects[method], proxy_rects[method])
+                for method in ('color_segmentation', 'edge_detection')]
+        print(f"{seed:>6} {full_time:>10.3f} {proxy_time:>10.3f} {full_time / proxy_time:>8.1f}x "
+              f"{ious[0]:>10.3f} {ious[1]:>9.3f}")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,99 @@
+import sys
+import os.path
+import time
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+from score_analytics import add_file_key, compare_revisions
+
+OCR_METHODS = ("Tesseract", "Google Vision", "Apple Vision")
+POSTFIXES = {'_processed.png': 'default', '_processed_color_segmentation.png': 'color_segmentation',
+             '_processed_edge_detection.png': 'edge_detection'}
+
+def make_revisions(preprocessed_rows, seed=0):
+    """
+    Builds initial and preprocessed revisions with scores on a coarse grid, so that ties
+    between preprocessing methods are common.
+    """
+    rng = np.random.default_rng(seed)
+    images = preprocessed_rows // (len(OCR_METHODS) * len(POSTFIXES))
+    stems = np.array([f"{'timenote' if i % 3 else 'berlin-mitte'}/cemetery_{i % 500}/{i}" for i in range(images)],
+                     dtype=object)
+    methods = np.tile(OCR_METHODS, images)
+    df_init = pd.DataFrame({
+        'file_id': np.repeat('dataset/' + stems + '.jpg', len(OCR_METHODS)),
+        'ocr_method': pd.Categorical(methods),
+        'composite_score': np.round(rng.random(len(methods)) ** 2, 2),
+    })
+    df_init['dataset_type'] = np.where(df_init['file_id'].str.contains('timenote'), 'timenote', 'berlin-mitte')
+    file_ids, preprocessed_methods = [], []
+    for postfix, method in POSTFIXES.items():
+        file_ids.append(np.repeat('dataset_preprocessed/' + stems + postfix, len(OCR_METHODS)))
+        preprocessed_methods.append(np.full(len(methods), method, dtype=object))
+    df_preprocessed = pd.DataFrame({
+        'file_id': np.concatenate(file_ids),
+        'ocr_method': pd.Categorical(np.tile(methods, len(POSTFIXES))),
+        'composite_score': np.round(rng.random(len(methods) * len(POSTFIXES)), 2),
+        'preprocessed_method': pd.Categorical(np.concatenate(preprocessed_methods)),
+    })
+    df_preprocessed['dataset_type'] = np.where(df_preprocessed['file_id'].str.contains('timenote'),
+                                               'timenote', 'berlin-mitte')
+    return df_init, df_preprocessed
+
+def former_compare(df_init, df_preprocessed):
+    """The former analytics.py steps: postfix replace loop, full sort and per-group Python filters."""
+    df_preprocessed = df_preprocessed.copy()
+    df_preprocessed['preprocessed_method'] = df_preprocessed['preprocessed_method'].astype(object)
+    df_preprocessed['file_key'] = df_preprocessed['file_id']
+    for postfix in POSTFIXES:
+        df_preprocessed['file_key'] = df_preprocessed['file_key'].str.replace(postfix, '', regex=False) \
+            .str.replace('dataset_preprocessed', 'dataset', regex=False)
+    method_priority = {'color_segmentation': 1, 'edge_detection': 2, 'default': 3}
+    df_preprocessed['method_priority'] = df_preprocessed['preprocessed_method'].map(method_priority)
+    df_sorted = df_preprocessed.sort_values(by=['file_key', 'ocr_method', 'composite_score', 'method_priority'],
+                                            ascending=[True, True, False, True])
+    idx = df_sorted.groupby(['file_key', 'ocr_method'], observed=True).head(1).index
+    best = df_sorted.loc[idx].reset_index(drop=True).drop(columns=['method_priority'])
+
+    df_init = df_init.copy()
+    df_init['preprocessed_method'] = 'none'
+    df_init['file_key'] = df_init['file_id'].str.replace(r'\.[^.]+$', '', regex=True)
+    combined = pd.concat([df_init, best], ignore_index=True)
+    combined = combined.groupby(['file_key']).filter(lambda group: group['composite_score'].max() > 0.05)
+    combined = combined.merge(df_init[['file_key', 'ocr_method', 'composite_score']], on=['file_key', 'ocr_method'],
+                              suffixes=('', '_baseline'))
+
+    def exclude_worsened_groups(group):
+        has_worsened = (group['composite_score'] < group['composite_score_baseline']).any()
+        has_improved = (group['composite_score'] > group['composite_score_baseline']).any()
+        return not has_worsened and has_improved
+
+    return best, combined.groupby(['file_key']).filter(exclude_worsened_groups)
+
+def library_compare(df_init, df_preprocessed):
+    df_init = add_file_key(df_init.copy(), preprocessed=False)
+    df_preprocessed = add_file_key(df_preprocessed.copy())
+    return compare_revisions(df_init, df_preprocessed, verbose=False)
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+def run_benchmark(sizes=(100000, 300000, 1000000), former_limit=300000):
+    print(f"{'rows':>9} {'former (s)':>11} {'library (s)':>12}")
+    for rows in sizes:
+        df_init, df_preprocessed = make_revisions(rows)
+        library_time, (best, combined) = timed(library_compare, df_init, df_preprocessed)
+        former = "skipped"
+        if rows <= former_limit:
+            former_time, (former_best, former_combined) = timed(former_compare, df_init, df_preprocessed)
+            former = f"{former_time:.2f}"
+            assert len(best) == len(former_best)
+            assert (best['preprocessed_method'].astype(object).to_numpy()
+                    == former_best['preprocessed_method'].to_numpy()).all()
+            assert len(combined) == len(former_combined)
+        print(f"{rows:>9} {former:>11} {library_time:>12.2f}")
+
+if __name__ == "__main__":
+    run_benchmark()
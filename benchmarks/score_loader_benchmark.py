@@ -0,0 +1,47 @@
+import sys
+import os.path
+import json
+import tempfile
+import time
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+from score_loader import load_revision, SCORE_COLUMNS
+from score_store_benchmark import make_entries, legacy_write, legacy_read, store_write
+
+def legacy_load(directory):
+    """The former loading: per-file json_normalize and concat, then casting the score columns."""
+    df = legacy_read(directory)
+    for column in SCORE_COLUMNS:
+        df[column] = df[column].astype(float)
+    df['dataset_type'] = df['file_id'].str.extract('(timenote|berlin-mitte)', expand=False)
+    return df
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def run_benchmark(rows=60000, directories=2000):
+    entries = make_entries(rows, directories)
+    print(f"{rows} score entries in {directories} directories")
+    print(f"{'format':>8} {'loader':>20} {'time (s)':>9} {'memory (MB)':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_directory = os.path.join(tmp, 'legacy')
+        jsonl_directory = os.path.join(tmp, 'jsonl')
+        legacy_write(legacy_directory, entries)
+        store_write(jsonl_directory, entries)
+        runs = (
+            ('legacy', 'concat per file', legacy_load, legacy_directory, {}),
+            ('legacy', 'load_revision', load_revision, legacy_directory, {}),
+            ('jsonl', 'load_revision', load_revision, jsonl_directory, {}),
+            ('jsonl', 'load_revision x8', load_revision, jsonl_directory, {'threads': 8}),
+            ('jsonl', 'without texts', load_revision, jsonl_directory, {'include_text': False}),
+        )
+        for file_format, name, load, directory, kwargs in runs:
+            elapsed, df = timed(load, directory, **kwargs)
+            assert len(df) == rows
+            memory = df.memory_usage(deep=True).sum() / 2 ** 20
+            print(f"{file_format:>8} {name:>20} {elapsed:>9.3f} {memory:>12.1f}")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,73 @@
+import sys
+import os.path
+import json
+import tempfile
+import time
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+from score_store import ScoreStore
+from score_loader import load_revision
+
+METHODS = ("Tesseract", "Google Vision", "Apple Vision")
+
+def make_entries(rows, directories=100):
+    """Builds score entries spread over dataset directories like a full revision."""
+    entries = []
+    for i in range(rows):
+        score = (i % 1000) / 1000
+        entries.append({
+            'file_id': f"dataset_preprocessed/timenote/cemetery_{i % directories}/{i // 3}_processed.png",
+            'ocr_method': METHODS[i % len(METHODS)],
+            'true_text': "VALIJA ERNESTSONE 1921 2018",
+            'ocr_text': "VALIJA ERNESTS0NE 1921",
+            'scores': {name: f"{score:.5f}" for name in ('basic_similarity_score', 'lcs_similarity_score',
+                                                          'jaro_winkler_similarity', 'difflib_similarity')},
+            'composite_score': f"{score:.5f}",
+        })
+    return entries
+
+def legacy_write(base_directory, entries):
+    """The former ScoreService._log_scores: one append-mode open and pretty-printed object per score."""
+    for entry in entries:
+        output_directory = os.path.join(base_directory, os.path.dirname(entry['file_id']).strip("./"))
+        os.makedirs(output_directory, exist_ok=True)
+        with open(os.path.join(output_directory, 'scores.json'), 'a') as f:
+            f.write(json.dumps(entry, ensure_ascii=False, indent=4) + ",\n")
+
+def legacy_read(directory):
+    """The former analytics.read_jsons_to_dataframe: string repairs and a concat per file."""
+    df = pd.DataFrame()
+    for root, dirs, files in os.walk(directory):
+        for filename in files:
+            if filename.endswith('.json'):
+                with open(os.path.join(root, filename), 'r', encoding='utf-8') as file:
+                    file_content = file.read()
+                file_content = file_content.rstrip(',\n').rstrip(',')
+                data = json.loads("[" + file_content.replace("}\n{", "},\n{") + "]")
+                df = pd.concat([df, pd.json_normalize(data)], ignore_index=True)
+    return df
+
+def store_write(base_directory, entries):
+    with ScoreStore(base_directory) as store:
+        for entry in entries:
+            store.append(entry)
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+def run_benchmark(rows=20000):
+    entries = make_entries(rows)
+    print(f"{rows} score entries")
+    print(f"{'store':>10} {'write (s)':>10} {'read (s)':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, write, read in (('legacy', legacy_write, legacy_read), ('jsonl', store_write, load_revision)):
+            base_directory = os.path.join(tmp, name)
+            write_time, _ = timed(write, base_directory, entries)
+            read_time, df = timed(read, base_directory)
+            assert len(df) == rows
+            print(f"{name:>10} {write_time:>10.3f} {read_time:>10.3f}")
+
+if __name__ == "__main__":
+    run_benchmark()
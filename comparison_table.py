@@ -0,0 +1,157 @@
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from score_loader import load_revision, entries_to_frame, add_features
+from score_analytics import add_file_key, best_preprocessing, METHOD_PRIORITY, RECOGNIZED_THRESHOLD
+
+# Revisions the OCR runners write their scores to, see ScoreService
+INITIAL_DIRECTORY = 'ocr_results/revision_INITIAL/'
+PREPROCESSED_DIRECTORY = 'ocr_results/revision_PREPROCESSED/'
+KEY_COLUMNS = ['file_key', 'ocr_method']
+INITIAL_COLUMNS = ['file_key', 'ocr_method', 'dataset_type', 'composite_score']
+PREPROCESSED_COLUMNS = ['file_key', 'ocr_method', 'dataset_type', 'preprocessed_method', 'composite_score']
+TABLE_COLUMNS = [
+    'file_key', 'ocr_method', 'dataset_type', 'composite_score_baseline', 'preprocessed_method', 'composite_score',
+    'score_diff', 'improved', 'worsened', 'recognized', 'image_improved', 'image_worsened',
+]
+
+def _split_revisions(df):
+    """Splits loaded scores into those of original images and those of preprocessed variants."""
+    if 'preprocessed_method' in df.columns:
+        preprocessed = df['preprocessed_method'].notna().to_numpy()
+    else:
+        preprocessed = np.zeros(len(df), dtype=bool)
+    df_init = add_file_key(df[~preprocessed].copy(), preprocessed=False)
+    df_preprocessed = add_file_key(df[preprocessed].copy(), preprocessed=True)
+    return df_init, df_preprocessed
+
+def _select(df, columns):
+    """Returns the columns of df as plain object and float columns, missing ones filled with NaN."""
+    selected = pd.DataFrame({column: df[column].astype(object) if column in df.columns else None
+                             for column in columns}, index=df.index)
+    selected['composite_score'] = selected['composite_score'].astype(np.float64)
+    return selected
+
+def _upsert(df, new_rows, keys):
+    """Returns df with new_rows added, replacing the rows with the same keys; the last row of a key wins."""
+    new_rows = new_rows.drop_duplicates(keys, keep='last')
+    if not len(df):
+        return new_rows.reset_index(drop=True)
+    # only rows of the same file_key can be replaced, the full keys are compared for those
+    replaced = df['file_key'].isin(new_rows['file_key']).to_numpy().copy()
+    candidates = df[replaced]
+    replaced[replaced] = pd.MultiIndex.from_frame(candidates[keys]).isin(pd.MultiIndex.from_frame(new_rows[keys]))
+    return pd.concat([df[~replaced], new_rows], ignore_index=True)
+
+class ComparisonTable:
+    """
+    Materialized comparison of the INITIAL and PREPROCESSED scores, one row per (file_key, ocr_method)
+    with the baseline score, the best preprocessing and its score, score_diff and the improved and
+    worsened flags of the row and of its whole image.
+
+    The table is kept up to date incrementally: update() takes new score entries, e.g. from a
+    ScoreService listener, and recomputes the best preprocessing, the baseline join and the flags
+    for the file_keys of those entries only.
+    An image counts as improved when some OCR method scores higher with its best preprocessing,
+    none scores lower, and some score of the image is above the recognition threshold, the same
+    selection as score_analytics.compare_revisions.
+    """
+    def __init__(self, method_priority=METHOD_PRIORITY, threshold=RECOGNIZED_THRESHOLD):
+        self.method_priority = method_priority
+        self.threshold = threshold
+        self._initial = _select(pd.DataFrame(), INITIAL_COLUMNS)
+        self._preprocessed = _select(pd.DataFrame(), PREPROCESSED_COLUMNS)
+        self.table = pd.DataFrame(columns=TABLE_COLUMNS)
+
+    @classmethod
+    def from_revisions(cls, initial_directory, preprocessed_directory, skip_test_dirs=True, **kwargs):
+        """Builds the table from the scores files of both revisions."""
+        comparison = cls(**kwargs)
+        initial = load_revision(initial_directory, skip_test_dirs=skip_test_dirs, include_text=False)
+        preprocessed = load_revision(preprocessed_directory, skip_test_dirs=skip_test_dirs, include_text=False)
+        comparison.update_frame(pd.concat([initial, preprocessed], ignore_index=True))
+        return comparison
+
+    @classmethod
+    def open(cls, path, initial_directory=INITIAL_DIRECTORY, preprocessed_directory=PREPROCESSED_DIRECTORY):
+        """
+        Reads the table saved at path, or builds it from the scores files of both revisions if there
+        is none yet. Scores logged by runs that did not update the saved table are not in it, delete
+        the file to rebuild it.
+        """
+        if os.path.exists(path):
+            return cls.load(path)
+        return cls.from_revisions(initial_directory, preprocessed_directory)
+
+    def attach(self, score_service):
+        """Updates the table with every batch of scores the ScoreService writes."""
+        score_service.add_listener(self.update)
+
+    def update(self, entries):
+        """
+        Adds score entries, as logged by ScoreService, of original or preprocessed images.
+        :return: The file_keys whose rows were recomputed.
+        """
+        return self.update_frame(add_features(entries_to_frame(entries, include_text=False)))
+
+    def update_frame(self, df):
+        """Adds scores loaded with score_loader, see update."""
+        df_init, df_preprocessed = _split_revisions(df)
+        if len(df_init):
+            self._initial = _upsert(self._initial, _select(df_init, INITIAL_COLUMNS), KEY_COLUMNS)
+        if len(df_preprocessed):
+            self._preprocessed = _upsert(self._preprocessed, _select(df_preprocessed, PREPROCESSED_COLUMNS),
+                                         KEY_COLUMNS + ['preprocessed_method'])
+        affected = pd.unique(pd.concat([df_init['file_key'], df_preprocessed['file_key']]).to_numpy(dtype=object))
+        if len(affected):
+            rows = self._compute(affected)
+            table = self.table[~self.table['file_key'].isin(affected)] if len(self.table) else self.table
+            self.table = pd.concat([table, rows], ignore_index=True) if len(table) else rows.reset_index(drop=True)
+        return affected
+
+    def _compute(self, file_keys):
+        """Computes the table rows of the given images from their stored scores."""
+        initial = self._initial[self._initial['file_key'].isin(file_keys)]
+        preprocessed = self._preprocessed[self._preprocessed['file_key'].isin(file_keys)]
+        if len(preprocessed):
+            best = best_preprocessing(preprocessed, self.method_priority)
+        else:
+            best = preprocessed
+        rows = initial.rename(columns={'composite_score': 'composite_score_baseline'}).merge(
+            best, on=KEY_COLUMNS, how='outer', suffixes=('', '_preprocessed'))
+        rows['dataset_type'] = rows['dataset_type'].fillna(rows.pop('dataset_type_preprocessed'))
+        rows['score_diff'] = rows['composite_score'] - rows['composite_score_baseline']
+        rows['improved'] = rows['score_diff'] > 0
+        rows['worsened'] = rows['score_diff'] < 0
+
+        by_image = rows.groupby('file_key', sort=False)
+        best_score = np.fmax(by_image['composite_score'].transform('max'),
+                             by_image['composite_score_baseline'].transform('max'))
+        rows['recognized'] = best_score > self.threshold
+        flags = by_image[['improved', 'worsened']].transform('any')
+        rows['image_improved'] = rows['recognized'] & flags['improved'] & ~flags['worsened']
+        rows['image_worsened'] = flags['worsened']
+        return rows[TABLE_COLUMNS]
+
+    def improved(self):
+        """Returns the rows of the recognized images that preprocessing improved without worsening any OCR method."""
+        return self.table[self.table['image_improved']]
+
+    def save(self, path):
+        """Writes the table and the scores it is maintained from."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # written to a temporary file first, so an interrupted run leaves the previous table intact
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(self.__dict__, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path):
+        """Reads a table written by save."""
+        comparison = cls.__new__(cls)
+        with open(path, 'rb') as f:
+            comparison.__dict__.update(pickle.load(f))
+        return comparison
@@ -1,5 +1,6 @@
 import os
 import json
+import pickle
 
 def get_true_text(json_item, image_path):
     """
@@ -17,12 +18,11 @@ def get_true_text(json_item, image_path):
         true_text = ' '.join(json_item.get(field, '') for field in ['person_name', 'patronymic']).strip()
     return true_text
 
-def get_json_details(image_path, directory):
+def format_image_name(image_path):
     """
-    Searches for and extracts details from a JSON file corresponding to the given image file.
+    Maps an image path to the name used by the dataset's JSON metadata.
     :param image_path: Path to the image file.
-    :param directory: Directory to search for the JSON file.
-    :return: Details from the JSON file or None if not found.
+    :return: Tuple of (formatted image name, JSON URL key) or (None, None) for unknown datasets.
     """
     # Determine dataset type based on the presence of specific subdirectories in the image_path
     if 'timenote/' in image_path:
@@ -37,13 +37,23 @@ def get_json_details(image_path, directory):
             formatted_image_name = image_file_name
         # Adjust extension to match JSON "main_image_url"
         formatted_image_name = formatted_image_name.rsplit('.', 1)[0] + '.jpg'
-        image_url_key = "main_image_url"
+        return formatted_image_name, "main_image_url"
     elif 'berlin-mitte/' in image_path:
         # For 'berlin-mitte/' dataset, use the image filename as-is to match JSON "imageURL"
-        formatted_image_name = os.path.basename(image_path)
-        image_url_key = "imageURL"
-    else:
-        # If the dataset does not match known structures, return None
+        return os.path.basename(image_path), "imageURL"
+    # If the dataset does not match known structures
+    return None, None
+
+def get_json_details(image_path, directory):
+    """
+    Searches for and extracts details from a JSON file corresponding to the given image file.
+    Rescans every JSON file in the directory; use GroundTruthIndex when processing many images.
+    :param image_path: Path to the image file.
+    :param directory: Directory to search for the JSON file.
+    :return: Details from the JSON file or None if not found.
+    """
+    formatted_image_name, image_url_key = format_image_name(image_path)
+    if formatted_image_name is None:
         return None
 
     for file in os.listdir(directory):
@@ -58,6 +68,102 @@ def get_json_details(image_path, directory):
                         return item
     return None
 
+class GroundTruthIndex:
+    """
+    Indexes the JSON metadata of each dataset directory by image file name, so that the
+    ground truth of an image is a dictionary lookup instead of a rescan of every JSON file.
+
+    The index of a directory is built once and persisted next to the JSON files. It is
+    rebuilt whenever a JSON file in the directory is added, removed or modified.
+
+    Images are matched like get_json_details matches them, by the JSON file names their
+    name ends with, except that the longest such name is preferred over the first one in
+    the JSON files and items without an image URL match no image.
+    """
+    INDEX_FILE_NAME = '.ground_truth_index.pkl'
+    URL_KEYS = ("main_image_url", "imageURL")
+
+    def __init__(self, persist=True):
+        """
+        :param persist: Whether to store built indexes on disk and reuse them across runs.
+        """
+        self.persist = persist
+        self._directories = {}
+
+    def get_json_details(self, image_path, directory):
+        """
+        Looks up the JSON item corresponding to the given image file.
+        :param image_path: Path to the image file.
+        :param directory: Directory containing the JSON metadata files.
+        :return: Details from the JSON file or None if not found.
+        """
+        formatted_image_name, image_url_key = format_image_name(image_path)
+        if formatted_image_name is None:
+            return None
+
+        items = self._directory_index(directory)[image_url_key]
+        image_file_name = os.path.basename(formatted_image_name)
+        item = items.get(image_file_name)
+        if item is None:
+            # Like get_json_details, fall back to JSON file names the image name ends with,
+            # the longest one if several do
+            for start in range(1, len(image_file_name)):
+                item = items.get(image_file_name[start:])
+                if item is not None:
+                    break
+        return item
+
+    def _directory_index(self, directory):
+        directory = os.path.normpath(directory)
+        index = self._directories.get(directory)
+        if index is None:
+            index = self._load_or_build(directory)
+            self._directories[directory] = index
+        return index
+
+    def _json_signature(self, directory):
+        """Returns the name and modification time of every JSON file in the directory."""
+        signature = {}
+        for file in sorted(os.listdir(directory)):
+            if file.endswith(".json"):
+                signature[file] = os.stat(os.path.join(directory, file)).st_mtime_ns
+        return signature
+
+    def _load_or_build(self, directory):
+        signature = self._json_signature(directory)
+        index_path = os.path.join(directory, self.INDEX_FILE_NAME)
+
+        if self.persist and os.path.exists(index_path):
+            try:
+                with open(index_path, 'rb') as f:
+                    stored = pickle.load(f)
+                if stored.get('signature') == signature:
+                    return stored['items']
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError) as e:
+                print(f"Ignoring unreadable ground truth index {index_path}: {e}")
+
+        items = self._build(directory, signature)
+        if self.persist:
+            try:
+                with open(index_path, 'wb') as f:
+                    pickle.dump({'signature': signature, 'items': items}, f)
+            except OSError as e:
+                print(f"Could not persist ground truth index {index_path}: {e}")
+        return items
+
+    def _build(self, directory, signature):
+        items = {key: {} for key in self.URL_KEYS}
+        for file in signature:
+            with open(os.path.join(directory, file), 'r') as f:
+                data = json.load(f)
+            for item in data:
+                for key in self.URL_KEYS:
+                    json_image_file_name = os.path.basename(item.get(key, ""))
+                    if json_image_file_name:
+                        # Keep the first match, as get_json_details does
+                        items[key].setdefault(json_image_file_name, item)
+        return items
+
 def extract_lang(item):
     if 'nationality' in item:
         map = {
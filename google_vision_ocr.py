@@ -2,16 +2,32 @@ from google.cloud import vision
 from google.oauth2 import service_account
 import io
 import os
-from PIL import Image
-import io
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+import cv2
 import numpy as np
 
 load_dotenv()
 creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
 
 class GoogleVisionOCR:
-    def __init__(self):
+    ENGINE_NAME = 'google_vision'
+    # Feature requested from the API, part of the cache key
+    CONFIG = 'text_detection'
+    # Maximum number of images the API accepts in one batch_annotate_images call
+    MAX_BATCH_SIZE = 16
+
+    def __init__(self, cache=None, client=None):
+        """
+        Args:
+            cache (OCRResultCache, optional): Cache consulted before calling the API.
+            client (ImageAnnotatorClient, optional): Client to use instead of one created
+                from the credentials in the .env file.
+        """
+        self.cache = cache
+        if client is not None:
+            self.client = client
+            return
         credentials_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
         if credentials_path:
             credentials = service_account.Credentials.from_service_account_file(credentials_path)
@@ -19,29 +35,54 @@ class GoogleVisionOCR:
         else:
             raise EnvironmentError("Google Cloud credentials path not set in .env file")
 
+    def _load_image(self, image_input):
+        """Returns the encoded image bytes and, when caching, the content hash of the input."""
+        image_hash = None
+        if isinstance(image_input, np.ndarray):
+            if self.cache is not None:
+                image_hash = self.cache.hash_array(image_input)
+            return None, image_hash
+        with io.open(image_input, 'rb') as image_file:
+            content = image_file.read()
+        if self.cache is not None:
+            image_hash = self.cache.hash_bytes(content)
+        return content, image_hash
+
+    @staticmethod
+    def _encode_array(image):
+        # PNG encode the numpy array directly. OpenCV reads 3 and 4 channel arrays as BGR(A), like
+        # cv2.imread returns them; the PIL encoding used before took them as RGB. Every array
+        # OCRed in this repository is a single channel preprocess_for_ocr output, unaffected.
+        success, buffer = cv2.imencode('.png', image)
+        if not success:
+            raise ValueError("Failed to encode image for Google Vision")
+        return buffer.tobytes()
+
+    def _cached_text(self, image_hash):
+        if image_hash is None:
+            return None
+        return self.cache.get(image_hash, self.ENGINE_NAME, None, self.CONFIG)
+
+    def _store_text(self, image_hash, text):
+        if image_hash is not None:
+            self.cache.put(image_hash, self.ENGINE_NAME, None, self.CONFIG, text)
 
     def perform_ocr(self, image_input):
         """Reads an image file and performs OCR using Google Vision API.
 
         Args:
-            image_path (str): The path to the image file.
+            image_input (str or numpy.ndarray): The path to the image file or the image itself,
+                grayscale or in OpenCV's BGR(A) channel order.
 
         Returns:
             str: The extracted text from the image.
         """
-        if isinstance(image_input, np.ndarray):
-            # Convert the numpy array to a PIL Image
-            pil_image = Image.fromarray(image_input)
-
-            # Save the PIL Image to a bytes buffer in PNG format
-            byte_buffer = io.BytesIO()
-            pil_image.save(byte_buffer, format='PNG')
-
-            # Get the bytes value from the buffer
-            content = byte_buffer.getvalue()
-        else:
-            with io.open(image_input, 'rb') as image_file:
-                content = image_file.read()
+        content, image_hash = self._load_image(image_input)
+        cached_text = self._cached_text(image_hash)
+        if cached_text is not None:
+            return cached_text
+        if content is None:
+            content = self._encode_array(image_input)
 
         image = vision.Image(content=content)
         response = self.client.text_detection(image=image)
@@ -50,4 +91,76 @@ class GoogleVisionOCR:
         if response.error.message:
             raise Exception(f'Google Vision API error: {response.error.message}')
 
-        return texts[0].description if texts else ""
+        text = texts[0].description if texts else ""
+        self._store_text(image_hash, text)
+        return text
+
+    def perform_ocr_batch(self, images, batch_size=MAX_BATCH_SIZE, max_concurrent_batches=4):
+        """Performs OCR on many images with as few Google Vision API calls as possible.
+
+        Images are grouped into batch_annotate_images calls of up to batch_size images,
+        and up to max_concurrent_batches calls are in flight at the same time. An error
+        for one image, or a failed call, only affects the images concerned.
+
+        Args:
+            images (list): Paths to image files and/or numpy arrays, grayscale or BGR(A).
+            batch_size (int): Number of images per API call, at most MAX_BATCH_SIZE.
+            max_concurrent_batches (int): Maximum number of concurrent API calls.
+
+        Returns:
+            list: The extracted text of every input, in input order, or None where OCR failed.
+        """
+        batch_size = max(1, min(batch_size, self.MAX_BATCH_SIZE))
+        results = [None] * len(images)
+        requested = []  # (input index, image content, content hash)
+
+        for index, image_input in enumerate(images):
+            try:
+                content, image_hash = self._load_image(image_input)
+                cached_text = self._cached_text(image_hash)
+                if cached_text is not None:
+                    results[index] = cached_text
+                    continue
+                if content is None:
+                    content = self._encode_array(image_input)
+            except Exception as e:
+                print(f"Failed to load image {index} for Google Vision: {e}")
+                continue
+            requested.append((index, content, image_hash))
+
+        batches = [requested[i:i + batch_size] for i in range(0, len(requested), batch_size)]
+        if not batches:
+            return results
+
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrent_batches)) as pool:
+            for batch, texts in zip(batches, pool.map(self._annotate_batch, batches)):
+                for (index, _, image_hash), text in zip(batch, texts):
+                    results[index] = text
+                    if text is not None:
+                        self._store_text(image_hash, text)
+        return results
+
+    def _annotate_batch(self, batch):
+        """Sends one batch_annotate_images call and returns the text of each request, None on error."""
+        feature = vision.Feature(type_=vision.Feature.Type.TEXT_DETECTION)
+        requests = [
+            vision.AnnotateImageRequest(image=vision.Image(content=content), features=[feature])
+            for _, content, _ in batch
+        ]
+        try:
+            responses = self.client.batch_annotate_images(requests=requests).responses
+        except Exception as e:
+            print(f"Google Vision batch of {len(batch)} images failed: {e}")
+            return [None] * len(batch)
+
+        texts = []
+        for (index, _, _), response in zip(batch, responses):
+            if response.error.message:
+                print(f"Google Vision API error for image {index}: {response.error.message}")
+                texts.append(None)
+            else:
+                annotations = response.text_annotations
+                texts.append(annotations[0].description if annotations else "")
+        # A response list shorter than the request list marks the rest as failed
+        texts.extend([None] * (len(batch) - len(texts)))
+        return texts
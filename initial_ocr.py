@@ -1,32 +1,28 @@
 import os
 from dotenv import load_dotenv
-from tesseract_ocr import TesseractOCR
 from google_vision_ocr import GoogleVisionOCR
 from apple_vision_ocr import AppleVisionOCR
 from similarity_score_service import ScoreService
-from dataset_helper import get_true_text, get_json_details, extract_lang
+from dataset_helper import get_true_text, extract_lang, GroundTruthIndex
+from ocr_pipeline import OCRPipeline, OCRTask
+from ocr_cache import OCRResultCache
+from comparison_table import ComparisonTable
 
 REVISION = "INITIAL"
 DEFAULT_LANGUAGE = 'lav' # default latvian language code for timenote dataset
 SUPPORTED_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
 MITTE_DS_LANG_CODE = 'deu' # default german language code for the 'berlin-mitte/' dataset
 
-def process_directory(directory):
+def iter_tasks(directory, ground_truth):
+    """Walks the dataset and yields an OCRTask with the true text and language of every image."""
     lang = DEFAULT_LANGUAGE
-    print("Starting directory processing...")
-    print("-" * 60)
-    google_vision_ocr = GoogleVisionOCR()
-    tesseract_ocr = TesseractOCR()
-    apple_vision_ocr = AppleVisionOCR('ocr_results/apple_vision_source_init')
-    score_service = ScoreService(REVISION)  # Set a base directory for scores
-
     for root, dirs, files in os.walk(directory):
         for file in files:
             if file.lower().endswith(SUPPORTED_IMAGE_EXTENSIONS):
                 image_path = os.path.join(root, file)
                 true_text = ""  # Default value if no JSON details are found or if an error occurs
                 print("\nProcessing image:", image_path)
-                json_details = get_json_details(image_path, root)
+                json_details = ground_truth.get_json_details(image_path, root)
                 if json_details:
                     if 'timenote' in image_path:
                         lang = extract_lang(json_details)
@@ -37,17 +33,36 @@ def process_directory(directory):
                 else:
                     print(f"  > No JSON details found for {file}")
 
-                ocr_text = tesseract_ocr.run_ocr(image_path, lang)
-                google_vision_ocr_text = google_vision_ocr.perform_ocr(image_path)
-                apple_vision_ocr_text = apple_vision_ocr.perform_ocr(image_path)
+                yield OCRTask(image_path, image_path, lang, true_text)
 
-                print(f"  > Tesseract OCR text: {ocr_text if ocr_text else '[No text detected]'}")
-                print(f"  > Google Vision OCR text: {google_vision_ocr_text if google_vision_ocr_text else '[No text detected]'}")
-                print(f"  > Apple Vision OCR text: {apple_vision_ocr_text if apple_vision_ocr_text else '[No text detected]'}")
+def process_directory(directory, tesseract_workers=None, vision_concurrency=8, comparison_path=None):
+    """
+    OCRs every image in the directory and logs their scores.
+    With comparison_path, the ComparisonTable saved there is updated with the new scores and saved
+    again when the run ends, see ComparisonTable.open.
+    """
+    print("Starting directory processing...")
+    print("-" * 60)
+    cache = OCRResultCache()
+    google_vision_ocr = GoogleVisionOCR(cache=cache)
+    apple_vision_ocr = AppleVisionOCR('ocr_results/apple_vision_source_init')
+    score_service = ScoreService(REVISION)  # Set a base directory for scores
+    ground_truth = GroundTruthIndex()
 
-                score_service.process_scores(image_path, "Tesseract", true_text, ocr_text)
-                score_service.process_scores(image_path, "Google Vision", true_text, google_vision_ocr_text)
-                score_service.process_scores(image_path, "Apple Vision", true_text, apple_vision_ocr_text)
+    pipeline = OCRPipeline(score_service, apple_vision_ocr, google_vision_ocr,
+                           tesseract_workers=tesseract_workers, vision_concurrency=vision_concurrency,
+                           cache=cache)
+    comparison = None
+    if comparison_path:
+        comparison = ComparisonTable.open(comparison_path)
+        comparison.attach(score_service)
+    try:
+        pipeline.run(iter_tasks(directory, ground_truth))
+    finally:
+        score_service.close()
+        if comparison is not None:
+            comparison.save(comparison_path)
+    print(cache.report())
 
     print("-" * 60)
     print("Directory processing completed.")
@@ -1,16 +1,68 @@
 import os
+from concurrent.futures import wait
 import cv2
-import matplotlib.pyplot as plt
-from object_selection_helper import ObjectSelectionHelper
+from object_selection_helper import ImageContext, ObjectSelectionHelper
 import numpy as np
 
+def render_steps(images, output_path):
+    """
+    Renders the images of the selection steps side by side and saves the figure.
+    Module level so that it can run in a background process from the saved arrays.
+    """
+    # Imported here so that matplotlib is only loaded when visualizations are rendered
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(15, 10))
+    axs = fig.subplots(2, 3).flatten()
+    for ax, (title, img) in zip(axs, images.items()):
+        ax.imshow(img, cmap='gray' if len(img.shape) == 2 else None)
+        ax.set_title(title)
+        ax.axis('off')
+    fig.tight_layout()
+    fig.savefig(output_path)
+    return output_path
+
+def should_visualize(image_index, visualize_every):
+    """Samples the images of a batch run that get step visualizations, 1 in visualize_every, none if 0."""
+    return bool(visualize_every) and image_index % visualize_every == 0
+
 class ObjectSelection:
-    def __init__(self, input_image_path, verbose=True):
+    def __init__(self, input_image_path, verbose=True, image=None, write_outputs=True, visualize=True,
+                 visualization_executor=None, proxy_long_edge=None, alpha=False, methods=None):
+        """
+        :param input_image_path: Path of the image, also used to name the written outputs.
+        :param verbose: Whether to log the individual steps.
+        :param image: Already decoded BGR image, read from input_image_path if None.
+        :param write_outputs: Whether to write the masked images to disk.
+        :param visualize: Whether to render and save the step visualizations. The intermediate
+                          images they show are not computed when disabled.
+        :param visualization_executor: Optional executor, e.g. a ProcessPoolExecutor, rendering the
+                                       visualizations in the background instead of inline. close
+                                       waits for them and raises the errors of failed renders.
+        :param proxy_long_edge: If set, regions are detected on a copy of the image downscaled to this
+                                long edge, with the thresholds scaled along, and the selected
+                                rectangle is applied to the full resolution image.
+        :param alpha: Whether the selections get an (opaque) alpha channel, BGR otherwise.
+        :param methods: Names of the SELECTION_METHODS run by run and run_in_memory, all by default.
+        """
         self.input_image_path = input_image_path
         self.verbose = verbose
         self.helper = None
-        self.image = None
-        self.base_output_dir = self.create_output_directory(input_image_path)
+        self.image = image
+        self.write_outputs = write_outputs
+        self.visualize = visualize
+        self.visualization_executor = visualization_executor
+        self.visualization_futures = []  # (output path, Future) of the queued visualizations
+        self.proxy_long_edge = proxy_long_edge
+        self.alpha = alpha
+        self.methods = tuple(methods) if methods else tuple(SELECTION_METHODS)
+        self.proxy_image = None
+        self.context = None
+        # Full resolution (x, y, w, h) rectangle of the last selection of every method
+        self.selection_rects = {}
+        self.base_output_dir = None
+        if write_outputs or visualize:
+            self.base_output_dir = self.create_output_directory(input_image_path)
 
     def create_output_directory(self, input_path):
         path_parts = input_path.split('/')
@@ -20,12 +72,33 @@ class ObjectSelection:
         return output_base
 
     def load_image(self):
+        if self.image is not None:
+            return
         self.image = cv2.imread(self.input_image_path)
         if self.verbose:
             print(f"Image loaded from {self.input_image_path}")
 
     def setup_helper(self):
-        self.helper = ObjectSelectionHelper(verbose=self.verbose)
+        self.proxy_image = self.image
+        height, width = self.image.shape[:2]
+        if self.proxy_long_edge and max(height, width) > self.proxy_long_edge:
+            scale = self.proxy_long_edge / max(height, width)
+            proxy_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            self.proxy_image = cv2.resize(self.image, proxy_size, interpolation=cv2.INTER_AREA)
+            if self.verbose:
+                print(f"Detecting regions on a {proxy_size[0]}x{proxy_size[1]} proxy of the {width}x{height} image")
+
+        # The area thresholds and the erosion depth are defined for full resolution images
+        scale = self.proxy_image.shape[1] / width
+        area_scale = self.proxy_image.shape[0] * self.proxy_image.shape[1] / (height * width)
+        self.helper = ObjectSelectionHelper(
+            verbose=self.verbose,
+            min_region_area=ObjectSelectionHelper.MIN_REGION_AREA * area_scale,
+            max_region_area=ObjectSelectionHelper.MAX_REGION_AREA * area_scale,
+            max_erosion_iterations=max(1, round(ObjectSelectionHelper.MAX_EROSION_ITERATIONS * scale))
+        )
+        # Color space conversions of the image regions are detected on, shared by both methods
+        self.context = ImageContext(self.proxy_image)
 
     def apply_color_overlay(self, image, color='red'):
         # Define the color values
@@ -75,94 +148,96 @@ class ObjectSelection:
         return top_regions_color
     
     def process_image(self, method='color_segmentation'):
-        images = {'original': cv2.cvtColor(self.image, cv2.COLOR_BGR2RGB)}
-
-        if method == 'color_segmentation':
-            threshold = self.helper.color_segmentation_lab(self.image)
-            suffix = '_color_segmentation'
-            images['thresholded'] = threshold
-            top_regions = self.helper.retain_top_regions_thresholded(threshold)
-            eroded_image = self.helper.erode_until_max_area(top_regions)
-            dilated_image = self.helper.dilate_image(eroded_image)
-            images['top_regions tresholded & dilated'] = dilated_image
-            picked_region = self.helper.detect_and_score_regions(dilated_image, self.image)
-            overlayed = self.overlay_region(dilated_image, picked_region)
-        elif method == 'edge_detection':
-            threshold = self.helper.detect_and_invert_edges(self.image)
-            suffix = '_edge_detection'
-            images['thresholded'] = threshold
-            eroded_image = self.helper.erode_until_max_area(threshold)
-            dilated_image = self.helper.dilate_image(eroded_image)
-            images['eroded & dilated'] = dilated_image
-            top_regions = self.helper.retain_top_regions_thresholded(dilated_image)
-            picked_region = self.helper.detect_and_score_regions(top_regions, self.image)
-            overlayed = self.overlay_region(top_regions, picked_region)
-
-        images['best_candidate_regions'] = overlayed
-
-        closed_image = self.helper.perform_morphological_closing(picked_region)
-        # make mask rectangular shape
-        rect_mask = self.helper.rectify_mask(picked_region)
-        overlayed_rect = self.overlay_region(closed_image, rect_mask)
-
-        images['morphologically_closed'] = overlayed_rect
-
-        masked_image = self.helper.apply_mask(self.image, rect_mask)
-        images['rectangular_mask'] = cv2.cvtColor(masked_image, cv2.COLOR_BGR2RGB)
+        """Selects the object with the given method and writes the cropped image, returning its path."""
+        cropped_image, suffix = self.select_object(method)
+        return self.save_final_masked_image(cropped_image, suffix + '.png')
+
+    def select_object(self, method='color_segmentation'):
+        """
+        Selects the object with the given method.
+        :return: Tuple of the image cropped to the rectangle of the selected region and the suffix of the method.
+        """
+        # Regions are detected on the proxy image, which is the image itself unless proxy_long_edge is set
+        image = self.proxy_image
+
+        # Intermediate images for the step visualization, only collected when it is rendered
+        images = {'original': self.context.rgb} if self.visualize else None
+
+        if method not in SELECTION_METHODS:
+            raise ValueError(f"Unknown selection method '{method}', expected one of {tuple(SELECTION_METHODS)}")
+        suffix = '_' + method
+        picked_region = SELECTION_METHODS[method](self, image, images)
+
+        if images is not None:
+            # closing is only shown in the visualization, computed before rectify_mask modifies picked_region
+            closed_image = self.helper.perform_morphological_closing(picked_region)
 
-        self.visualize_and_save(images, suffix + '_steps.png')
-        output_path = self.save_final_masked_image(masked_image, suffix + '.png')
+        # make mask rectangular shape
+        rect_mask, rect = self.helper.rectify_mask(picked_region, return_rect=True)
+        if rect is not None and image is not self.image:
+            rect = self.scale_rect(rect, image.shape, self.image.shape)
+        self.selection_rects[method] = rect
+        cropped_image = self.crop_to_rect(rect)
 
-        return output_path
+        if images is not None:
+            images['morphologically_closed'] = self.overlay_region(closed_image, rect_mask)
+            images['rectangular_mask'] = cv2.cvtColor(self.helper.apply_mask(image, rect_mask), cv2.COLOR_BGR2RGB)
+            self.visualize_and_save(images, suffix + '_steps.png')
 
+        return cropped_image, suffix
 
     def visualize_and_save(self, images, suffix):
-        fig, axs = plt.subplots(2, 3, figsize=(15, 10))
-        axs = axs.flatten()
-        for ax, (title, img) in zip(axs, images.items()):
-            ax.imshow(img, cmap='gray' if len(img.shape) == 2 else None)
-            ax.set_title(title)
-            ax.axis('off')
         output_path = os.path.join(self.base_output_dir, os.path.basename(self.input_image_path).replace('.jpg', suffix))
-        plt.tight_layout()
-        plt.savefig(output_path)
-        plt.close()
+        if self.visualization_executor is not None:
+            future = self.visualization_executor.submit(render_steps, images, output_path)
+            self.visualization_futures.append((output_path, future))
+            if self.verbose:
+                print(f"Visualization queued for {output_path}")
+            return
+        render_steps(images, output_path)
         if self.verbose:
             print(f"Visualization saved to {output_path}")
 
-    def save_final_masked_image(self, masked_image, suffix):
-        # Ensure the masked image has an alpha channel
-        if masked_image.shape[2] < 4:
-            # Create a new image with an alpha channel
-            transparent_image = np.zeros((masked_image.shape[0], masked_image.shape[1], 4), dtype=np.uint8)
-
-            # Copy the RGB channels from the masked image
-            transparent_image[:, :, :3] = masked_image
-
-            # Set the alpha channel to the inverse of the mask
-            transparent_image[:, :, 3] = (cv2.cvtColor(masked_image, cv2.COLOR_BGR2GRAY) > 0) * 255
+    def close(self):
+        """
+        Waits for the visualizations queued on the visualization_executor.
+        :return: Paths of the rendered visualizations.
+        :raises RuntimeError: From the error of the first visualization that failed to render,
+                              after all of them are done.
+        """
+        futures, self.visualization_futures = self.visualization_futures, []
+        wait([future for _, future in futures])
+        for output_path, future in futures:
+            if future.exception() is not None:
+                raise RuntimeError(f"Failed to render visualization {output_path}") from future.exception()
+        return [output_path for output_path, _ in futures]
+
+    @staticmethod
+    def scale_rect(rect, from_shape, to_shape):
+        """Scales an (x, y, w, h) rectangle between image sizes, rounding outwards."""
+        x, y, w, h = rect
+        scale_x = to_shape[1] / from_shape[1]
+        scale_y = to_shape[0] / from_shape[0]
+        x0, y0 = int(x * scale_x), int(y * scale_y)
+        x1 = min(to_shape[1], int(np.ceil((x + w) * scale_x)))
+        y1 = min(to_shape[0], int(np.ceil((y + h) * scale_y)))
+        return x0, y0, x1 - x0, y1 - y0
+
+    def crop_to_rect(self, rect):
+        """
+        Crops the image to the (x, y, w, h) rectangle of the selection, without copying unless an
+        alpha channel is requested. A missing rectangle selects nothing and gives a black image.
+        """
+        if rect is None:
+            cropped_image = np.zeros_like(self.image)
         else:
-            transparent_image = masked_image
-
-        # Find the non-transparent points
-        non_transparent_points = np.argwhere(transparent_image[:, :, 3] != 0)
-
-        if non_transparent_points.size == 0:
-            output_path = os.path.join(self.base_output_dir, os.path.basename(self.input_image_path).replace('.jpg', suffix))
-            cv2.imwrite(output_path, transparent_image)
-
-            if self.verbose:
-                print(f"Final masked image saved to {transparent_image}")
-
-            return output_path
-
-        # Find the bounding box of those points
-        top_left = non_transparent_points.min(axis=0)[:2]
-        bottom_right = non_transparent_points.max(axis=0)[:2]
-
-        # Crop the image accordingly
-        cropped_image = transparent_image[top_left[0]:bottom_right[0], top_left[1]:bottom_right[1]]
+            x, y, w, h = rect
+            cropped_image = self.image[y:y + h, x:x + w]
+        if self.alpha:
+            cropped_image = cv2.cvtColor(cropped_image, cv2.COLOR_BGR2BGRA)
+        return cropped_image
 
+    def save_final_masked_image(self, cropped_image, suffix):
         output_path = os.path.join(self.base_output_dir, os.path.basename(self.input_image_path).replace('.jpg', suffix))
         cv2.imwrite(output_path, cropped_image)
         if self.verbose:
@@ -173,10 +248,68 @@ class ObjectSelection:
     def run(self):
         self.load_image()
         self.setup_helper()
-        color_segmentation = self.process_image(method='color_segmentation')
-        edge_detection = self.process_image(method='edge_detection')
-
-        return color_segmentation, edge_detection
+        return tuple(self.process_image(method=method) for method in self.methods)
+
+    def run_in_memory(self):
+        """
+        Runs the selection methods and returns the results as arrays instead of file paths.
+        The masked images are only written to disk when write_outputs is set.
+        :return: Tuple of the cropped images of the methods, by default color segmentation and
+                 edge detection, BGR or BGRA with alpha.
+        """
+        self.load_image()
+        self.setup_helper()
+        results = []
+        for method in self.methods:
+            cropped_image, suffix = self.select_object(method=method)
+            if self.write_outputs:
+                self.save_final_masked_image(cropped_image, suffix + '.png')
+            results.append(cropped_image)
+
+        return tuple(results)
+
+# Object selection methods by name, in the order they are run, cheapest first. Each takes the
+# ObjectSelection, the image to detect regions on and the dict collecting the visualized steps
+# (None when not visualizing) and returns the mask of the picked region.
+SELECTION_METHODS = {}
+
+def register_selection_method(name):
+    """Decorator adding a selection method to SELECTION_METHODS."""
+    def register(function):
+        SELECTION_METHODS[name] = function
+        return function
+    return register
+
+@register_selection_method('color_segmentation')
+def select_by_color_segmentation(selector, image, images):
+    helper = selector.helper
+    threshold = helper.color_segmentation_lab(image, lab_image=selector.context.lab)
+    top_regions = helper.retain_top_regions_thresholded(threshold)
+    eroded_image = helper.erode_until_max_area(top_regions)
+    dilated_image = helper.dilate_image(eroded_image)
+    picked_region = helper.detect_and_score_regions(dilated_image, image, context=selector.context)
+    if images is not None:
+        images['thresholded'] = threshold
+        images['top_regions tresholded & dilated'] = dilated_image
+        images['best_candidate_regions'] = selector.overlay_region(dilated_image, picked_region)
+    return picked_region
+
+@register_selection_method('edge_detection')
+def select_by_edge_detection(selector, image, images):
+    helper = selector.helper
+    threshold = helper.detect_and_invert_edges(image)
+    eroded_image = helper.erode_until_max_area(threshold)
+    dilated_image = helper.dilate_image(eroded_image)
+    # the labeled top regions are scored without labeling them again
+    top_components = helper.top_region_components(dilated_image)
+    top_regions = top_components.mask()
+    picked_region = helper.detect_and_score_regions(top_regions, image, components=top_components,
+                                                    context=selector.context)
+    if images is not None:
+        images['thresholded'] = threshold
+        images['eroded & dilated'] = dilated_image
+        images['best_candidate_regions'] = selector.overlay_region(top_regions, picked_region)
+    return picked_region
 
 # Example usage (This code is commented out for execution purposes)
 #object_selector = ObjectSelection('dataset/preprocessing_test/2016_07_Arija-Dumbravs.jpg')
@@ -1,11 +1,146 @@
 import cv2
 import numpy as np
-from skimage import measure
 from pytesseract import image_to_string
 
+class ComponentStats:
+    """
+    Connected components of a binary image, labeled once with OpenCV.
+
+    Holds the label image with the area, bounding box and centroid of every component so
+    the selection steps can pick regions and build their masks without labeling again.
+    Label 0 is the background, components are numbered from 1.
+    """
+    def __init__(self, image, connectivity=8):
+        binary = image if image.dtype == np.uint8 else (image > 0).astype(np.uint8)
+        _, self.labels, self.stats, self.centroids = cv2.connectedComponentsWithStats(
+            binary, connectivity=connectivity)
+
+    @property
+    def count(self):
+        """Number of components, without the background."""
+        return len(self.stats) - 1
+
+    @property
+    def areas(self):
+        """Pixel areas of the components, areas[i] belongs to label i + 1."""
+        return self.stats[1:, cv2.CC_STAT_AREA]
+
+    def first_pixel(self, label):
+        """Raster index of the first pixel of a component, the order skimage labels them in."""
+        top = self.stats[label, cv2.CC_STAT_TOP]
+        return top * self.labels.shape[1] + int(np.argmax(self.labels[top] == label))
+
+    def raster_order(self, labels):
+        """Returns the labels sorted by the position of their first pixel."""
+        return sorted(labels, key=self.first_pixel)
+
+    def top_labels(self, k, min_area=0):
+        """
+        Returns the labels of the k largest components with an area above min_area, largest first.
+        Components of equal area are ordered by their first pixel.
+        """
+        candidates = np.flatnonzero(self.areas > min_area) + 1
+        if len(candidates) > k:
+            areas = self.stats[candidates, cv2.CC_STAT_AREA]
+            # area of the k-th largest component, found without sorting all areas
+            kth_area = areas[np.argpartition(-areas, k - 1)[k - 1]]
+            larger = candidates[areas > kth_area]
+            tied = self.raster_order(candidates[areas == kth_area])
+            candidates = np.concatenate([larger, tied[:k - len(larger)]]).astype(int)
+        return sorted(candidates.tolist(),
+                      key=lambda label: (-self.stats[label, cv2.CC_STAT_AREA], self.first_pixel(label)))
+
+    def mask(self, labels=None, value=255):
+        """Builds the mask of the given components, all components by default, with one lookup."""
+        lut = np.zeros(self.count + 1, np.uint8)
+        if labels is None:
+            lut[1:] = value
+        else:
+            lut[np.asarray(labels, dtype=int)] = value
+        return lut[self.labels]
+
+    def subset(self, labels):
+        """
+        Returns the stats of only the given components, renumbered from 1 in raster order,
+        as labeling the mask of those components again would number them.
+        """
+        labels = self.raster_order(labels)
+        lut = np.zeros(self.count + 1, self.labels.dtype)
+        lut[labels] = np.arange(1, len(labels) + 1)
+        subset = ComponentStats.__new__(ComponentStats)
+        subset.labels = lut[self.labels]
+        subset.stats = self.stats[[0] + labels].copy()
+        subset.stats[0, cv2.CC_STAT_AREA] = self.labels.size - subset.stats[1:, cv2.CC_STAT_AREA].sum()
+        subset.centroids = self.centroids[[0] + labels]
+        return subset
+
+class ImageContext:
+    """
+    Color space conversions of one BGR image, computed on first use and shared by the
+    selection methods and the region scoring.
+    """
+    def __init__(self, image):
+        self.image = image
+        self._conversions = {}
+
+    def _convert(self, code):
+        if code not in self._conversions:
+            self._conversions[code] = cv2.cvtColor(self.image, code)
+        return self._conversions[code]
+
+    @property
+    def rgb(self):
+        return self._convert(cv2.COLOR_BGR2RGB)
+
+    @property
+    def gray(self):
+        return self._convert(cv2.COLOR_BGR2GRAY)
+
+    @property
+    def lab(self):
+        return self._convert(cv2.COLOR_BGR2Lab)
+
+    @property
+    def hsv(self):
+        return self._convert(cv2.COLOR_BGR2HSV)
+
+    @property
+    def saturation(self):
+        if 'saturation' not in self._conversions:
+            self._conversions['saturation'] = cv2.extractChannel(self.hsv, 1)
+        return self._conversions['saturation']
+
+    def average_saturation(self, mask, area=None):
+        """
+        Returns the saturation of the masked region averaged over the whole image, as
+        calculate_average_saturation of the masked image gives it, without masking a copy.
+        :param area: Number of pixels in the mask if known.
+        """
+        if area is None:
+            area = cv2.countNonZero(mask)
+        # pixels outside the mask count with a saturation of 0, the sum is an exact integer
+        saturation_sum = round(cv2.mean(self.saturation, mask=mask)[0] * area)
+        return saturation_sum / (mask.shape[0] * mask.shape[1])
+
 class ObjectSelectionHelper:
-    def __init__(self, verbose=True):
+    # Region area thresholds in pixels, tuned on full resolution photos
+    MIN_REGION_AREA = 1000
+    MAX_REGION_AREA = 20000
+    MAX_EROSION_ITERATIONS = 20
+
+    def __init__(self, verbose=True, min_region_area=MIN_REGION_AREA, max_region_area=MAX_REGION_AREA,
+                 max_erosion_iterations=MAX_EROSION_ITERATIONS):
+        """
+        :param min_region_area: Area a region must exceed to be kept as a candidate.
+        :param max_region_area: Area the largest region is eroded below.
+        :param max_erosion_iterations: Maximum erosion depth in pixels.
+        The areas scale with the image area and the erosion depth with the image size when
+        working on a downscaled image.
+        """
         self.verbose = verbose
+        self.min_region_area = min_region_area
+        self.max_region_area = max_region_area
+        self.max_erosion_iterations = max_erosion_iterations
 
     def log(self, message):
         if self.verbose:
@@ -29,7 +164,16 @@ class ObjectSelectionHelper:
 
         return dilation
 
-    def perform_morphological_closing(self, image):
+    def perform_morphological_closing(self, image, stop_threshold=5000, max_iterations=10, kernel_size=(3, 3),
+                                      stop_fraction=None):
+        """
+        Closes the image repeatedly, round i closing the previous result with i iterations, until a
+        round changes the image by less than the stop threshold, for at most max_iterations rounds.
+        :param stop_threshold: Summed absolute difference (255 per changed mask pixel) below which
+            the closing stops. Rounds without any change do not stop it.
+        :param stop_fraction: Stop threshold as a fraction of the maximum difference of the image,
+            replaces stop_threshold so the criterion scales with the resolution.
+        """
         # Check if image is already a single-channel image
         if len(image.shape) == 2 or image.shape[2] == 1:
             closing = image  # Use the image as is if it is already one channel
@@ -39,18 +183,17 @@ class ObjectSelectionHelper:
             closing = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             self.log("Converted image to grayscale.")
 
-        # Constants for the morphological operations
-        kernel_size = (3, 3)
-        max_iterations = 10
-        stop_threshold = 5000
+        if stop_fraction is not None:
+            stop_threshold = stop_fraction * 255 * closing.shape[0] * closing.shape[1]
         kernel = np.ones(kernel_size, np.uint8)
 
-        # Perform the closing operation iteratively
-        for i in range(max_iterations):
+        # Perform the closing operation iteratively, round 0 would close with 0 iterations and is skipped
+        i = 0
+        for i in range(1, max_iterations):
             new_closing = cv2.morphologyEx(closing, cv2.MORPH_CLOSE, kernel, iterations=i)
-            diff = cv2.absdiff(closing, new_closing).sum()
+            diff = cv2.norm(closing, new_closing, cv2.NORM_L1)
 
-            self.log(f"Iteration {i+1}: Difference = {diff}")
+            self.log(f"Iteration {i+1}: Difference = {diff:.0f}")
 
             closing = new_closing
 
@@ -60,80 +203,95 @@ class ObjectSelectionHelper:
         self.log(f"Number of iterations for closing: {i+1}")
         return closing
 
-    def retain_top_regions_thresholded(self, image):
-        area_threshold = 1000  # Hard-coded threshold for area size
-        label_img = measure.label(image)
-        props = measure.regionprops(label_img)
-        areas = [prop.area for prop in props if prop.area > area_threshold]
-        areas.sort(reverse=True)
-
-        if len(areas) >= 2:
-            largest_areas = areas[:2]
-        elif len(areas) == 1:
-            largest_areas = areas[:1]
-        else:
-            self.log("There are no areas larger than 1000")
-            largest_areas = []
-
-        filtered_img = np.zeros_like(image)
-
-        for prop in props:
-            if prop.area in largest_areas:
-                filtered_img[label_img == prop.label] = 255
-
-        return filtered_img
-
-    def retain_top_regions(self, image):
+    def top_region_components(self, image, area_threshold=None, components=None):
+        """
+        Returns the ComponentStats of the two largest regions larger than area_threshold.
+        :param area_threshold: Minimum region area, min_region_area by default.
+        :param components: ComponentStats of the image if it is labeled already.
+        """
+        if area_threshold is None:
+            area_threshold = self.min_region_area
+        if components is None:
+            components = ComponentStats(image)
+        labels = components.top_labels(2, min_area=area_threshold)
+        if not labels:
+            self.log(f"There are no areas larger than {area_threshold:.0f}")
+        return components.subset(labels)
+
+    def retain_top_regions_thresholded(self, image, components=None):
+        return self.top_region_components(image, components=components).mask()
+
+    def retain_top_regions(self, image, components=None):
         # Label the regions in the image
-        label_img = measure.label(image)
-        # Analyze region properties to get areas
-        props = measure.regionprops(label_img)
-        # Sort properties by area in descending order
-        props_sorted = sorted(props, key=lambda prop: prop.area, reverse=True)
-
-        # Initialize a blank image of the same size as the input
-        filtered_img = np.zeros_like(image)
-
-        # Fill in the top two largest regions into the filtered image
-        for i, prop in enumerate(props_sorted):
-            if i < 2:  # Only the two largest areas are retained
-                filtered_img[label_img == prop.label] = 255
-
-        return filtered_img
-
-    def erode_until_max_area(self, image):
-        max_area = 20000  # Hard-coded maximum area threshold
-        kernel = np.ones((3, 3), np.uint8)
-        iterations = 1
-        while iterations <= 20:
-            eroded = cv2.erode(image, kernel, iterations=iterations)
-
-            try:
-                # Label connected components in the eroded image
-                label_img = measure.label(eroded)
-                props = measure.regionprops(label_img)
-
-                # Sort the regions by area
-                props_sorted = sorted(props, key=lambda prop: prop.area, reverse=True)
-
-                # Check if the largest area is less than max_area
-                if props_sorted[0].area < max_area:
+        if components is None:
+            components = ComponentStats(image)
+        # Only the two largest areas are retained
+        return components.mask(components.top_labels(2))
+
+    def largest_region_area(self, image):
+        """Returns the pixel area of the largest connected region, 0 for an empty image."""
+        areas = ComponentStats(image).areas
+        return int(areas.max()) if len(areas) else 0
+
+    def erode_until_max_area(self, image, max_area=None, max_iterations=None):
+        """
+        Erodes the mask with a 3x3 kernel until its largest region is smaller than max_area,
+        at most max_iterations times. Returns the original image if the erosion removes every
+        region first.
+
+        Eroding a 0/255 mask k times keeps the pixels whose chessboard distance to the background
+        is above k, so for such masks the iteration count is binary searched on one distance
+        transform; the largest area only shrinks with every erosion. Other images are eroded
+        one step at a time.
+        :param max_area: Area the largest region is eroded below, max_region_area by default.
+        :param max_iterations: Maximum number of erosions, max_erosion_iterations by default.
+        """
+        if max_area is None:
+            max_area = self.max_region_area
+        if max_iterations is None:
+            max_iterations = self.max_erosion_iterations
+        if cv2.countNonZero(image) == cv2.countNonZero(cv2.compare(image, 255, cv2.CMP_EQ)):
+            distance = cv2.distanceTransform(image, cv2.DIST_C, 3)
+
+            def largest_area_after(iterations):
+                eroded = cv2.compare(distance, iterations, cv2.CMP_GT)
+                return eroded, self.largest_region_area(eroded)
+
+            # first iteration count whose largest region is small enough, max_iterations + 1 if none
+            low, high = 1, max_iterations + 1
+            while low < high:
+                middle = (low + high) // 2
+                if largest_area_after(middle)[1] < max_area:
+                    high = middle
+                else:
+                    low = middle + 1
+            iterations = low
+            eroded, largest_area = largest_area_after(min(iterations, max_iterations))
+            if iterations > max_iterations:
+                largest_area = None
+        else:
+            kernel = np.ones((3, 3), np.uint8)
+            eroded = image
+            for iterations in range(1, max_iterations + 1):
+                eroded = cv2.erode(eroded, kernel)
+                largest_area = self.largest_region_area(eroded)
+                if largest_area < max_area:
                     break
-            except IndexError:
-                # If IndexError occurs, log the error and return the original image
-                self.log(f"IndexError occurred at iteration {iterations}. Returning the original image.")
-                return image
+            else:
+                iterations, largest_area = max_iterations + 1, None
 
-            # Increase the number of iterations for the next erosion
-            iterations += 1
+        if largest_area == 0:
+            self.log(f"No regions left at iteration {iterations}. Returning the original image.")
+            return image
 
         self.log(f"Number of iterations for erosion: {iterations}")
         return eroded
 
-    def color_segmentation_lab(self, image):
-        # Convert the image to Lab color space
-        lab_image = cv2.cvtColor(image, cv2.COLOR_BGR2Lab)
-        self.log("Converted image to Lab color space.")
+    def color_segmentation_lab(self, image, lab_image=None):
+        # Convert the image to Lab color space, unless already converted
+        if lab_image is None:
+            lab_image = cv2.cvtColor(image, cv2.COLOR_BGR2Lab)
+            self.log("Converted image to Lab color space.")
 
         # Split the Lab image into L, a, and b channels
         lab_planes = cv2.split(lab_image)
@@ -186,6 +344,23 @@ class ObjectSelectionHelper:
         area = np.count_nonzero(mask == 255)
         return area
     
+    def calculate_mask_iou(self, mask_a, mask_b):
+        """Returns the intersection over union of two masks, 1 if both are empty."""
+        a, b = mask_a > 0, mask_b > 0
+        union = np.count_nonzero(a | b)
+        if union == 0:
+            return 1.0
+        return np.count_nonzero(a & b) / union
+
+    def calculate_rect_iou(self, rect_a, rect_b):
+        """Returns the intersection over union of two (x, y, w, h) rectangles, None counts as empty."""
+        if rect_a is None or rect_b is None:
+            return 1.0 if rect_a == rect_b else 0.0
+        ax, ay, aw, ah = rect_a
+        bx, by, bw, bh = rect_b
+        intersection = max(0, min(ax + aw, bx + bw) - max(ax, bx)) * max(0, min(ay + ah, by + bh) - max(ay, by))
+        return intersection / (aw * ah + bw * bh - intersection)
+
     def calculate_centroid_distance_score(self, mask):
         # Calculate image moments
         M = cv2.moments(mask)
@@ -207,18 +382,24 @@ class ObjectSelectionHelper:
         distance = np.sqrt((centroid_y - center_y)**2 + (centroid_x - center_x)**2)
         return distance
     
-    def calculate_combined_score(self, masked_image, mask, max_saturation=255, max_area=None, max_distance=None):
+    def calculate_combined_score(self, masked_image, mask, max_saturation=255, max_area=None, max_distance=None,
+                                 average_saturation=None):
+        """
+        :param average_saturation: Average saturation of the masked image if computed already,
+            masked_image is then only used for its size.
+        """
         if max_area is None:
             max_area = masked_image.shape[0] * masked_image.shape[1]  # height * width
         if max_distance is None:
             max_distance = np.sqrt(masked_image.shape[0]**2 + masked_image.shape[1]**2)  # Diagonal
 
-        average_saturation_score = self.calculate_average_saturation(masked_image)
+        if average_saturation is None:
+            average_saturation = self.calculate_average_saturation(masked_image)
         area_score = self.calculate_mask_area(mask)
         centroid_distance_score = self.calculate_centroid_distance_score(mask)
 
         # Normalize scores
-        normalized_saturation = 1 - (average_saturation_score / max_saturation)  # Inverted because lower is better
+        normalized_saturation = 1 - (average_saturation / max_saturation)  # Inverted because lower is better
         normalized_area = area_score / max_area
         normalized_centroid_distance = 1 - (centroid_distance_score / max_distance)  # Inverted because lower is better
 
@@ -237,52 +418,65 @@ class ObjectSelectionHelper:
 
         return combined_score
 
-    def detect_and_score_regions(self, closed_image, original_image):
-        label_img = measure.label(closed_image)
-        props = measure.regionprops(label_img)
+    def detect_and_score_regions(self, closed_image, original_image, components=None, context=None):
+        """
+        :param components: ComponentStats of closed_image if it is labeled already.
+        :param context: ImageContext of original_image, shares its HSV conversion across calls.
+        """
+        if components is None:
+            components = ComponentStats(closed_image)
+        if context is None:
+            context = ImageContext(original_image)
 
         # If there are more than two regions, take the top two by area
-        if len(props) > 2:
-            props = sorted(props, key=lambda x: x.area, reverse=True)[:2]
+        if components.count > 2:
+            labels = components.top_labels(2)
+        else:
+            labels = components.raster_order(range(1, components.count + 1))
 
         masks = []
         scores = []
-        for prop in props:
-            mask = (label_img == prop.label).astype(np.uint8) * 255
-            masked_image = self.apply_mask(original_image, mask)
-            combined_score = self.calculate_combined_score(masked_image, mask)
+        for label in labels:
+            mask = components.mask([label])
+            # saturation of the region from the shared HSV conversion instead of a masked copy
+            average_saturation = context.average_saturation(mask, components.stats[label, cv2.CC_STAT_AREA])
+            combined_score = self.calculate_combined_score(original_image, mask, average_saturation=average_saturation)
             
             scores.append(combined_score)
             masks.append(mask)
 
-            print(f"Combined dominance score for region with label {prop.label}: {combined_score}")
+            self.log(f"Combined dominance score for region with label {label}: {combined_score}")
 
         # In case there were only two regions to start with, we can compare their scores
         if len(scores) == 2:
             # Return the mask of the region with the higher dominance score
             best_index = np.argmax(scores)
-            print(f"Region {best_index+1} has the higher dominance score: {scores[best_index]}")
+            self.log(f"Region {best_index+1} has the higher dominance score: {scores[best_index]}")
             return masks[best_index]
         elif len(scores) == 1:
             # If there was only one region, return its mask
-            print(f"Only one region detected with score: {scores[0]}")
+            self.log(f"Only one region detected with score: {scores[0]}")
             return masks[0]
         else:
             # No regions detected or no regions after filtering
-            print("No regions to process after filtering by area.")
+            self.log("No regions to process after filtering by area.")
             return closed_image
 
-    def rectify_mask(self, mask):
+    def rectify_mask(self, mask, return_rect=False):
+        """
+        Fills the bounding rectangle of the largest region of the mask, in place.
+        :param return_rect: Whether to also return the (x, y, w, h) rectangle, None if the mask is empty.
+        """
         _, thresh_img = cv2.threshold(mask, 127, 255, cv2.THRESH_BINARY)
         contours, _ = cv2.findContours(thresh_img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         # Compute the bounding rectangle for the largest contour
+        rect = None
         if contours:
             largest_contour = max(contours, key=cv2.contourArea)
-            x, y, w, h = cv2.boundingRect(largest_contour)
+            rect = x, y, w, h = cv2.boundingRect(largest_contour)
 
-            #bounding_img = cv2.cvtColor(mask, cv2.COLOR_GRAY2BGR)
-            cv2.rectangle(mask, (x, y), (x+w, y+h), (255, 255, 255), -1)
-            return mask
+            # the rectangle corners are inclusive, w and h are not
+            cv2.rectangle(mask, (x, y), (x + w - 1, y + h - 1), (255, 255, 255), -1)
         else:
-            print("No contours found.")
-            return mask
\ No newline at end of file
+            self.log("No contours found.")
+        return (mask, rect) if return_rect else mask
@@ -1,18 +1,23 @@
 import os
-from object_selection import ObjectSelection
+from object_selection import ObjectSelection, should_visualize
 
-def process_images(directory):
+def process_images(directory, visualize_every=0, proxy_long_edge=None):
     # Supported image formats
     supported_formats = ('.jpg', '.jpeg', '.png')
-    
+    # Step visualizations are rendered for 1 in visualize_every images, none by default
+    image_index = 0
+
     for root, dirs, files in os.walk(directory):
         for file in files:
             if file.lower().endswith(supported_formats):
                 file_path = os.path.join(root, file)
                 print(f"Processing file: {file_path}")
                 
-                # Initialize the ObjectSelection with the current file
-                object_selector = ObjectSelection(file_path)
+                # Initialize the ObjectSelection with the current file, regions are detected on a
+                # proxy downscaled to proxy_long_edge if set
+                object_selector = ObjectSelection(file_path, visualize=should_visualize(image_index, visualize_every),
+                                                  proxy_long_edge=proxy_long_edge)
+                image_index += 1
                 
                 # Run the object selection process
                 object_selector.run()
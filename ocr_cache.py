@@ -0,0 +1,109 @@
+import os
+import hashlib
+import sqlite3
+import threading
+from collections import Counter
+import numpy as np
+
+class OCRResultCache:
+    """
+    Persistent cache of OCR results keyed by (image content hash, engine, language, config).
+
+    Results live in a local SQLite file, so an interrupted or repeated run does not pay for
+    Tesseract or Google Vision again on images that were already recognized. The cache can
+    be shared by threads and handed to worker processes; each process opens its own connection.
+    """
+    def __init__(self, path='ocr_results/ocr_cache.sqlite'):
+        self.path = path
+        self.hits = Counter()
+        self.misses = Counter()
+        self._lock = threading.Lock()
+        self._connection = None
+        self._connection_pid = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_lock'] = None
+        state['_connection'] = None
+        state['_connection_pid'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._connection is None or self._connection_pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS ocr_results ('
+                'image_hash TEXT NOT NULL, engine TEXT NOT NULL, lang TEXT NOT NULL, '
+                'config TEXT NOT NULL, text TEXT NOT NULL, '
+                'PRIMARY KEY (image_hash, engine, lang, config))'
+            )
+            connection.commit()
+            self._connection = connection
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    @staticmethod
+    def hash_bytes(content):
+        """Returns the content hash of encoded image bytes."""
+        return hashlib.sha256(content).hexdigest()
+
+    @staticmethod
+    def hash_array(image):
+        """Returns the content hash of a decoded image, including its shape and type."""
+        digest = hashlib.sha256(f"{image.shape}{image.dtype}".encode())
+        digest.update(np.ascontiguousarray(image).data)
+        return digest.hexdigest()
+
+    def get(self, image_hash, engine, lang, config):
+        """
+        Looks up a cached OCR result and updates the hit and miss counters.
+        :return: The cached text or None if the result is not cached.
+        """
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT text FROM ocr_results WHERE image_hash = ? AND engine = ? AND lang = ? AND config = ?',
+                (image_hash, engine, lang or '', config)
+            ).fetchone()
+            if row is None:
+                self.misses[engine] += 1
+                return None
+            self.hits[engine] += 1
+            return row[0]
+
+    def put(self, image_hash, engine, lang, config, text):
+        """Stores an OCR result. Failed recognitions (None) are not cached."""
+        if text is None:
+            return
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                'INSERT OR REPLACE INTO ocr_results (image_hash, engine, lang, config, text) VALUES (?, ?, ?, ?, ?)',
+                (image_hash, engine, lang or '', config, text)
+            )
+            connection.commit()
+
+    def add_counts(self, hits, misses):
+        """Merges hit and miss counters collected by another process."""
+        with self._lock:
+            self.hits.update(hits)
+            self.misses.update(misses)
+
+    def report(self):
+        """Returns a summary of the cache hits and misses per engine."""
+        engines = sorted(set(self.hits) | set(self.misses))
+        if not engines:
+            return "OCR cache: no lookups"
+        lines = ["OCR cache hits/misses:"]
+        for engine in engines:
+            hits, misses = self.hits[engine], self.misses[engine]
+            total = hits + misses
+            lines.append(f"  > {engine}: {hits} hits, {misses} misses ({hits / total:.1%} hit rate)")
+        return "\n".join(lines)
@@ -0,0 +1,255 @@
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from tesseract_ocr import TesseractOCR
+
+# score_path: path the scores are logged under, also used for the Apple Vision lookup
+# image: path or numpy array handed to Tesseract and Google Vision
+OCRTask = namedtuple('OCRTask', ['score_path', 'image', 'lang', 'true_text'])
+# Task of an image whose variant is chosen by the pipeline's strategy in a Tesseract worker, see EarlyExitStrategy.
+# score_paths: method -> score path of every variant, image_path: original image to compute the variants
+# from in memory, None to read the written variants from their score paths
+VariantTask = namedtuple('VariantTask', ['score_paths', 'image_path', 'lang', 'true_text'])
+
+# Tesseract instance of a pool worker process, created once per process
+_worker_tesseract = None
+
+def _init_tesseract_worker(cache=None):
+    global _worker_tesseract
+    _worker_tesseract = TesseractOCR(cache=cache)
+
+def _counting_cache(function, *args):
+    """Calls function in a worker process, returning its result and the cache counters it produced."""
+    cache = _worker_tesseract.cache
+    if cache is None:
+        return function(*args), None, None
+    hits, misses = cache.hits.copy(), cache.misses.copy()
+    result = function(*args)
+    return result, cache.hits - hits, cache.misses - misses
+
+def _run_tesseract(image, lang):
+    """Runs Tesseract in a worker process, returning the text and the cache counters it produced."""
+    return _counting_cache(_worker_tesseract.run_ocr, image, lang)
+
+def _choose_variant(task, strategy, keep_image):
+    """
+    Chooses the variant of a VariantTask and returns the VariantChoice with its Tesseract text.
+    The text comes from run_ocr, a cache hit when the confidence run cached it, see run_ocr_with_confidence.
+    """
+    variants = strategy.iter_candidates(task.score_paths, task.image_path)
+    choice = strategy.choose(variants, task.lang, _worker_tesseract)
+    text = _worker_tesseract.run_ocr(choice.image, task.lang)
+    # the image is only sent back for Google Vision, the written variants are read from their path
+    if not keep_image and task.image_path is not None:
+        choice = choice._replace(image=None)
+    return choice, text
+
+def _choose_and_run_tesseract(task, strategy, keep_image):
+    """Runs the variant choice in a worker process, returning the choice and the cache counters it produced."""
+    return _counting_cache(_choose_variant, task, strategy, keep_image)
+
+def _copy_future(source, target):
+    """Completes target with the result or exception of the done source future."""
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+class OCRPipeline:
+    """
+    Runs the OCR engines over a stream of tasks concurrently and logs the scores in task order.
+
+    Tesseract is CPU bound and runs in a process pool, Google Vision calls are network bound
+    and run in a thread pool whose size caps the number of concurrent requests. Google Vision
+    images are grouped into batch requests of vision_batch_size images. At most
+    max_pending tasks are in flight, and only the calling thread writes to the ScoreService.
+    Tasks whose scores are all logged already are skipped, which makes runs resumable.
+    Engines that fail on an image get no score, so the next run retries them.
+
+    With a variant strategy, VariantTasks have their variant chosen in the Tesseract workers,
+    which return its Tesseract text along with the choice; the other engines then run on the
+    chosen variant only. VariantTasks with any fully scored variant are skipped.
+    """
+    def __init__(self, score_service, apple_vision_ocr, google_vision_ocr=None,
+                 tesseract_workers=None, vision_concurrency=8, max_pending=None, cache=None,
+                 vision_batch_size=16, strategy=None):
+        """
+        :param score_service: ScoreService receiving the scores of every engine.
+        :param apple_vision_ocr: AppleVisionOCR used to look up precomputed Apple Vision results.
+        :param google_vision_ocr: GoogleVisionOCR instance or None to skip Google Vision.
+        :param tesseract_workers: Number of Tesseract processes, defaults to the CPU count.
+        :param vision_concurrency: Maximum number of concurrent Google Vision requests.
+        :param max_pending: Maximum number of tasks in flight, bounds memory use.
+        :param cache: OCRResultCache used by the Tesseract workers, its counters collect their hits and misses.
+        :param vision_batch_size: Number of images per Google Vision request, 1 sends one request per image.
+        :param strategy: EarlyExitStrategy choosing the variant of VariantTasks, it records the choices.
+        """
+        self.score_service = score_service
+        self.apple_vision_ocr = apple_vision_ocr
+        self.google_vision_ocr = google_vision_ocr
+        self.tesseract_workers = tesseract_workers or os.cpu_count() or 1
+        self.vision_concurrency = vision_concurrency
+        self.max_pending = max_pending or 4 * (self.tesseract_workers + self.vision_concurrency)
+        self.cache = cache
+        self.vision_batch_size = vision_batch_size
+        self._vision_pool = None
+        self._vision_buffer = []  # (image, Future) waiting for a batch request
+        self._choosing = []  # (Tesseract future, Google Vision Future) of VariantTasks waiting for their choice
+        self.strategy = strategy
+
+    @property
+    def ocr_methods(self):
+        """Names of the OCR methods scored for every task."""
+        methods = ["Tesseract"]
+        if self.google_vision_ocr is not None:
+            methods.append("Google Vision")
+        methods.append("Apple Vision")
+        return methods
+
+    def is_complete(self, score_path):
+        """Returns whether the scores of every OCR method are logged for the path."""
+        return all(self.score_service.is_scored(score_path, method) for method in self.ocr_methods)
+
+    def _is_done(self, task):
+        if isinstance(task, VariantTask):
+            return any(self.is_complete(path) for path in task.score_paths.values())
+        return self.is_complete(task.score_path)
+
+    def run(self, tasks):
+        """
+        Processes all tasks and logs their scores.
+        :param tasks: Iterable of OCRTask or VariantTask, consumed lazily.
+        :return: Number of processed tasks.
+        """
+        processed = 0
+        skipped = 0
+        start_time = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.tesseract_workers,
+                                 initializer=_init_tesseract_worker,
+                                 initargs=(self.cache,)) as tesseract_pool, \
+                ThreadPoolExecutor(max_workers=self.vision_concurrency) as vision_pool:
+            self._vision_pool = vision_pool
+            pending = deque()
+            try:
+                for task in tasks:
+                    if self._is_done(task):
+                        skipped += 1
+                        continue
+                    pending.append(self._submit(task, tesseract_pool))
+                    self._request_chosen_vision()
+                    if len(pending) >= self.max_pending:
+                        self._write(*pending.popleft())
+                        processed += 1
+                self._flush_vision_batch()
+                while pending:
+                    self._write(*pending.popleft())
+                    processed += 1
+            finally:
+                # scores of the finished tasks are kept even if the run is interrupted
+                self.score_service.flush()
+                self._vision_pool = None
+                self._choosing = []
+
+        elapsed = time.perf_counter() - start_time
+        if processed:
+            print(f"Processed {processed} images in {elapsed:.1f}s ({processed / elapsed:.2f} images/s)")
+        if skipped:
+            print(f"Skipped {skipped} images with already logged scores")
+        return processed
+
+    def _submit(self, task, tesseract_pool):
+        if isinstance(task, VariantTask):
+            if self.strategy is None:
+                raise ValueError("VariantTasks need an OCRPipeline strategy")
+            tesseract_future = tesseract_pool.submit(_choose_and_run_tesseract, task, self.strategy,
+                                                     self.google_vision_ocr is not None)
+            google_vision_future = None
+            if self.google_vision_ocr is not None:
+                # requested once the worker has chosen the variant, see _request_chosen_vision
+                google_vision_future = Future()
+                self._choosing.append((tesseract_future, google_vision_future))
+            return task, tesseract_future, google_vision_future
+
+        tesseract_future = tesseract_pool.submit(_run_tesseract, task.image, task.lang)
+        google_vision_future = None
+        if self.google_vision_ocr is not None:
+            google_vision_future = self._request_vision(task.image)
+        return task, tesseract_future, google_vision_future
+
+    def _request_vision(self, image, future=None):
+        """Requests Google Vision OCR of the image, batched, returning the Future of its text."""
+        if self.vision_batch_size <= 1:
+            vision_future = self._vision_pool.submit(self.google_vision_ocr.perform_ocr, image)
+            if future is None:
+                return vision_future
+            vision_future.add_done_callback(lambda done: _copy_future(done, future))
+            return future
+        future = future or Future()
+        self._vision_buffer.append((image, future))
+        if len(self._vision_buffer) >= self.vision_batch_size:
+            self._flush_vision_batch()
+        return future
+
+    def _request_chosen_vision(self, wait_for=None):
+        """
+        Requests Google Vision OCR of the variants the workers have chosen so far, waiting for the
+        choice of the wait_for Tesseract future.
+        """
+        choosing, self._choosing = self._choosing, []
+        for tesseract_future, google_vision_future in choosing:
+            if not (tesseract_future.done() or tesseract_future is wait_for):
+                self._choosing.append((tesseract_future, google_vision_future))
+                continue
+            try:
+                choice = tesseract_future.result()[0][0]
+            except Exception as e:
+                google_vision_future.set_exception(e)
+                continue
+            self._request_vision(choice.image, google_vision_future)
+
+    def _flush_vision_batch(self):
+        """Sends the buffered Google Vision images as one batch request."""
+        if self._vision_buffer:
+            batch, self._vision_buffer = self._vision_buffer, []
+            self._vision_pool.submit(self._run_vision_batch, batch)
+
+    def _run_vision_batch(self, batch):
+        try:
+            texts = self.google_vision_ocr.perform_ocr_batch(
+                [image for image, _ in batch], batch_size=len(batch), max_concurrent_batches=1)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), text in zip(batch, texts):
+            future.set_result(text)
+
+    def _write(self, task, tesseract_future, google_vision_future):
+        ocr_text, cache_hits, cache_misses = tesseract_future.result()
+        if self.cache is not None and cache_hits is not None:
+            self.cache.add_counts(cache_hits, cache_misses)
+        if isinstance(task, VariantTask):
+            choice, ocr_text = ocr_text
+            self.strategy.record(choice)
+            print(f"\nChose {choice.method} variant of {task.image_path or task.score_paths[choice.method]} "
+                  f"after OCRing {choice.tried} (Tesseract confidence {choice.confidence})")
+            task = OCRTask(task.score_paths[choice.method], choice.image, task.lang, task.true_text)
+            if google_vision_future is not None:
+                self._request_chosen_vision(wait_for=tesseract_future)
+        results = [("Tesseract", ocr_text)]
+        if google_vision_future is not None:
+            if any(future is google_vision_future for _, future in self._vision_buffer):
+                self._flush_vision_batch()
+            results.append(("Google Vision", google_vision_future.result()))
+        results.append(("Apple Vision", self.apple_vision_ocr.perform_ocr(task.score_path)))
+
+        print("\nResults for image:", task.score_path)
+        for ocr_method, text in results:
+            print(f"  > {ocr_method} OCR text: {text if text else '[No text detected]'}")
+
+        for ocr_method, text in results:
+            if text is None:
+                print(f"  > {ocr_method} failed, no score logged for {task.score_path}")
+                continue
+            self.score_service.process_scores(task.score_path, ocr_method, task.true_text, text)
@@ -1,31 +1,103 @@
-from PIL import Image, ImageEnhance, ImageFilter
+import argparse
 import numpy as np
 import cv2
-import matplotlib.pyplot as plt
-from skimage import filters
-from object_selection import ObjectSelection
-from tesseract_ocr import TesseractOCR
-from google_vision_ocr import GoogleVisionOCR
-from scipy.ndimage import interpolation as inter
+from collections import Counter, defaultdict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from object_selection import ObjectSelection, should_visualize, SELECTION_METHODS
+from scipy import ndimage
 import os
+import time
+
+# Skew estimation methods of correct_skew: the full resolution rotation sweep, the same search
+# coarse to fine on a downsampled image, and the angle of the minimum area rectangle of the text
+DESKEW_METHODS = ('sweep', 'coarse_to_fine', 'min_area_rect')
+
+def projection_score(arr):
+    """Scores how well the rows of a binary image separate into text lines, higher is better."""
+    histogram = np.sum(arr, axis=1, dtype=float)
+    return np.sum((histogram[1:] - histogram[:-1]) ** 2, dtype=float)
+
+def rotate_binary(arr, angle):
+    """Rotates like ndimage.rotate(arr, angle, reshape=False, order=0), with OpenCV."""
+    h, w = arr.shape[:2]
+    M = cv2.getRotationMatrix2D(((w - 1) / 2, (h - 1) / 2), angle, 1.0)
+    return cv2.warpAffine(arr, M, (w, h), flags=cv2.INTER_NEAREST)
+
+def downsample_binary(thresh, max_dim):
+    """Downsamples a binary image to max_dim on its long edge, keeping it binary."""
+    scale = max_dim / max(thresh.shape[:2])
+    if scale >= 1:
+        return thresh
+    small = cv2.resize(thresh, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return cv2.threshold(small, 127, 255, cv2.THRESH_BINARY)[1]
+
+def estimate_skew_coarse_to_fine(thresh, delta=1, limit=5, max_dim=800, coarse_delta=1):
+    """
+    Searches the projection profile angle on a downsampled image, sweeping coarse_delta steps
+    over [-limit, limit] and then halving the step around the best angle down to delta.
+    """
+    small = downsample_binary(thresh, max_dim)
+    step = max(coarse_delta, delta)
+    angles = np.arange(-limit, limit + step, step)
+    best_angle = max(angles, key=lambda angle: projection_score(rotate_binary(small, angle)))
+    while step > delta:
+        step = max(step / 2, delta)
+        candidates = (best_angle - step, best_angle, best_angle + step)
+        best_angle = max(candidates, key=lambda angle: projection_score(rotate_binary(small, angle)))
+    return float(np.clip(best_angle, -limit, limit))
+
+def estimate_skew_min_area_rect(thresh, delta=1, limit=5, max_dim=800):
+    """
+    Estimates the angle from the minimum area rectangle around the text pixels, rounded to delta
+    and clipped to limit.
+    """
+    small = downsample_binary(thresh, max_dim)
+    coords = cv2.findNonZero(small)
+    if coords is None:
+        return 0.0
+    angle = cv2.minAreaRect(coords)[-1]
+    # Depending on the OpenCV version the rectangle angle is in [-90, 0) or (0, 90], fold it to the nearest axis
+    angle = (angle + 45) % 90 - 45
+    return float(np.clip(round(angle / delta) * delta, -limit, limit))
+
+def correct_skew(image, delta=1, limit=5, method='sweep', max_dim=800, verbose=False):
+    """
+    Estimates the skew of the text in the image and rotates it straight.
 
-def correct_skew(image, delta=1, limit=5):
-    def determine_score(arr, angle):
-        data = inter.rotate(arr, angle, reshape=False, order=0)
-        histogram = np.sum(data, axis=1, dtype=float)
-        score = np.sum((histogram[1:] - histogram[:-1]) ** 2, dtype=float)
-        return histogram, score
+    Parameters:
+    - image: BGR image.
+    - delta: Angle resolution in degrees.
+    - limit: Largest skew angle searched, in degrees either way.
+    - method: One of DESKEW_METHODS. 'sweep' rotates the full image for every angle step,
+      'coarse_to_fine' and 'min_area_rect' work on a copy downsampled to max_dim.
+    - max_dim: Long edge of the downsampled copy.
+    - verbose: Whether to print the estimated angle and the time the estimation took.
+
+    Returns:
+    - The skew angle and the corrected image.
+    """
+    if method not in DESKEW_METHODS:
+        raise ValueError(f"Unknown deskew method '{method}', expected one of {DESKEW_METHODS}")
+    start_time = time.perf_counter()
 
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
     thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1] 
 
-    scores = []
-    angles = np.arange(-limit, limit + delta, delta)
-    for angle in angles:
-        histogram, score = determine_score(thresh, angle)
-        scores.append(score)
-
-    best_angle = angles[scores.index(max(scores))]
+    if method == 'sweep':
+        scores = []
+        angles = np.arange(-limit, limit + delta, delta)
+        for angle in angles:
+            data = ndimage.rotate(thresh, angle, reshape=False, order=0)
+            scores.append(projection_score(data))
+        best_angle = angles[scores.index(max(scores))]
+    elif method == 'coarse_to_fine':
+        best_angle = estimate_skew_coarse_to_fine(thresh, delta=delta, limit=limit, max_dim=max_dim)
+    else:
+        best_angle = estimate_skew_min_area_rect(thresh, delta=delta, limit=limit, max_dim=max_dim)
+
+    if verbose:
+        elapsed = time.perf_counter() - start_time
+        print(f"Deskew angle ({method}): {best_angle:.2f} degrees, estimated in {elapsed * 1000:.1f} ms")
 
     (h, w) = image.shape[:2]
     center = (w // 2, h // 2)
@@ -35,29 +107,50 @@ def correct_skew(image, delta=1, limit=5):
 
     return best_angle, corrected
 
-def preprocess_for_ocr(image, invert=True):
+# Long edge in pixels the preprocessed image is resized to. All engines OCR the same variants on
+# disk, a size for one engine is written to its own output directory with target_size.
+DEFAULT_TARGET_SIZE = 2000
+
+def downscale(gray, resize_factor, out=None):
+    """
+    Shrinks the image by resize_factor < 1 without aliasing the strokes. The integer part of the
+    reduction is an INTER_AREA box average, which OpenCV runs on a fast path, and the remaining
+    factor above 0.5 is bilinear, several times faster than a fractional INTER_AREA at the same size.
+    """
+    height, width = gray.shape[:2]
+    dsize = (max(1, round(width * resize_factor)), max(1, round(height * resize_factor)))
+    reduction = int(1 / resize_factor)
+    if reduction >= 2:
+        gray = cv2.resize(gray, None, fx=1 / reduction, fy=1 / reduction, interpolation=cv2.INTER_AREA)
+    return cv2.resize(gray, dsize, dst=out, interpolation=cv2.INTER_LINEAR)
+
+def preprocess_for_ocr(image, invert=True, deskew=None, target_size=None, out=None, verbose=False):
     """
     Preprocesses an image for OCR by enhancing the contrast between dark text and a light background.
 
     Parameters:
     - image: The input image.
+    - invert: Whether to invert the grayscale image.
+    - deskew: None to keep the image as is, or a method of DESKEW_METHODS to straighten it with.
+    - target_size: Long edge in pixels to resize to, DEFAULT_TARGET_SIZE if None.
+    - out: Preallocated uint8 buffer of the output shape to write to, so batches can reuse it.
+    - verbose: Whether to print the estimated skew angle and the time its estimation took.
 
     Returns:
-    - The preprocessed image.
+    - The preprocessed image, out if it was given.
     """
-
-    # Convert the image to grayscale
-    image = np.array(image)
+    image = np.asarray(image)
     corrected = image
 
-    # sometimes can worsen google api recognition
-    # best_angle, corrected = correct_skew(image)
-    # print(f"Deskew angle: {best_angle}")
+    # sometimes can worsen google api recognition, so it is only enabled on request
+    if deskew:
+        best_angle, corrected = correct_skew(image, method=deskew, verbose=verbose)
 
-    gray = cv2.cvtColor(corrected, cv2.COLOR_BGR2GRAY)
-    # inversion almost always improves the quality of the OCR
-    if invert:
-        gray = cv2.bitwise_not(gray)
+    # Convert the image to grayscale
+    if corrected.ndim == 2:
+        gray = corrected.copy()
+    else:
+        gray = cv2.cvtColor(corrected, cv2.COLOR_BGRA2GRAY if corrected.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
 
     # any denoising, thresholding, sharpening or blurring didn gave better results
 
@@ -66,17 +159,31 @@ def preprocess_for_ocr(image, invert=True):
 
     # Calculate the resize factor
     max_dim = max(height, width)
-    resize_factor = 2000 / max_dim
+    resize_factor = (target_size or DEFAULT_TARGET_SIZE) / max_dim
 
-    # big impact on the quality of the OCR
-    resized = cv2.resize(gray, None, fx=resize_factor, fy=resize_factor, interpolation=cv2.INTER_CUBIC)
+    # inversion almost always improves the quality of the OCR,
+    # it is done in place on whichever of the grayscale and the resized image is smaller
+    if invert and resize_factor >= 1:
+        cv2.bitwise_not(gray, dst=gray)
 
-    # slight improvement
-    kernel = np.ones((1, 1), np.uint8)
-    dilated = cv2.dilate(resized, kernel, iterations=1)
-    eroded = cv2.erode(dilated, kernel, iterations=1)
-
-    return eroded
+    # big impact on the quality of the OCR
+    if resize_factor == 1:
+        resized = gray
+        if out is not None and out.shape == gray.shape:
+            np.copyto(out, gray)
+            resized = out
+    elif resize_factor > 1:
+        resized = cv2.resize(gray, None, dst=out, fx=resize_factor, fy=resize_factor, interpolation=cv2.INTER_CUBIC)
+    else:
+        resized = downscale(gray, resize_factor, out=out)
+    if out is not None and resized is not out:
+        raise ValueError(f"Output buffer of shape {out.shape} and type {out.dtype} does not fit "
+                         f"the preprocessed image of shape {resized.shape}")
+
+    if invert and resize_factor < 1:
+        cv2.bitwise_not(resized, dst=resized)
+
+    return resized
 
 # Load the image from the file system
 # image_path = 'dataset/timenote/Jaunciema_kapi/2018_10_Valija-Ernestsone.jpg'
@@ -92,44 +199,330 @@ def preprocess_for_ocr(image, invert=True):
 # processed_edge_detection = preprocess_for_ocr(edge_detection, invert=True)
 
 SUPPORTED_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
-# Define the directory to walk
-root_dir = 'dataset/timenote/test/'
-output_dir = 'dataset_preprocessed/timenote/test/'
-
-# Walk through the directory
-for dirpath, dirnames, filenames in os.walk(root_dir):
-    for filename in filenames:
-        # Check if the file is an image
-        if filename.lower().endswith(SUPPORTED_IMAGE_EXTENSIONS):
-            image_path = os.path.join(dirpath, filename)
-            base_filename = os.path.splitext(filename)[0]
-            base_output_dir = dirpath.replace(root_dir, output_dir)
-            os.makedirs(base_output_dir, exist_ok=True)
-
-            processed_paths = [
-                os.path.join(base_output_dir, base_filename + '_processed.png'),
-                os.path.join(base_output_dir, base_filename + '_processed_color_segmentation.png'),
-                os.path.join(base_output_dir, base_filename + '_processed_edge_detection.png')
-            ]
-
-            # Skip if all processed files exist
-            if all(os.path.exists(path) for path in processed_paths):
-                print(f"Skipping {image_path}")
-                continue
+# Postfixes of the preprocessed variants by method, cheapest first: the whole image, then the object selections
+VARIANT_POSTFIXES = {'default': '_processed.png'}
+VARIANT_POSTFIXES.update((method, f'_processed_{method}.png') for method in SELECTION_METHODS)
+PROCESSED_POSTFIXES = tuple(VARIANT_POSTFIXES.values())
+
+# Tesseract mean word confidence above which a variant is taken without trying the others
+DEFAULT_MIN_CONFIDENCE = 75
+
+def iter_variants(image_path, image=None, methods=None, save_intermediates=False, visualize=False, verbose=True,
+                  deskew=None, target_size=None, proxy_long_edge=None):
+    """
+    Yields (method, preprocessed image) pairs for the variants of an image in the order of methods,
+    all of VARIANT_POSTFIXES by default. Every variant is only computed when it is requested.
+    The parameters are those of preprocess_variants.
+    """
+    if image is None:
+        image = cv2.imread(image_path)
+    object_selector = None
+    for method in methods or VARIANT_POSTFIXES:
+        if method == 'default':
+            selected = image
+        else:
+            if object_selector is None:
+                object_selector = ObjectSelection(image_path, verbose=verbose, image=image,
+                                                  write_outputs=save_intermediates, visualize=visualize,
+                                                  proxy_long_edge=proxy_long_edge)
+                object_selector.load_image()
+                object_selector.setup_helper()
+            selected, suffix = object_selector.select_object(method)
+            if save_intermediates:
+                object_selector.save_final_masked_image(selected, suffix + '.png')
+        yield method, preprocess_for_ocr(selected, invert=True, deskew=deskew, target_size=target_size,
+                                         verbose=verbose)
+
+def preprocess_variants(image_path, image=None, save_intermediates=False, visualize=False, verbose=True,
+                        deskew=None, target_size=None, proxy_long_edge=None):
+    """
+    Preprocesses the whole image and both object selections of it in memory.
+
+    Parameters:
+    - image_path: Path of the original image, read if image is None.
+    - image: Already decoded BGR image.
+    - save_intermediates: Whether object selection writes its masked images.
+    - visualize: Whether object selection renders its step visualizations.
+    - verbose: Whether object selection and deskewing log their steps.
+    - deskew: Deskew method of preprocess_for_ocr, None for no deskewing.
+    - target_size: Long edge of the preprocessed images, DEFAULT_TARGET_SIZE if None.
+    - proxy_long_edge: Long edge of the proxy object selection detects the regions on, the full
+      image if None, see ObjectSelection.
+
+    Returns:
+    - Dictionary mapping each of PROCESSED_POSTFIXES to its preprocessed image.
+    """
+    variants = iter_variants(image_path, image=image, save_intermediates=save_intermediates,
+                             visualize=visualize, verbose=verbose, deskew=deskew, target_size=target_size,
+                             proxy_long_edge=proxy_long_edge)
+    return {VARIANT_POSTFIXES[method]: processed for method, processed in variants}
+
+# method: name of the chosen variant, image: its preprocessed image or path,
+# confidence: its Tesseract confidence, tried: number of variants OCRed to choose it
+VariantChoice = namedtuple('VariantChoice', ['method', 'image', 'confidence', 'tried'])
+
+class EarlyExitStrategy:
+    """
+    Chooses one preprocessed variant per image to run all OCR engines on, instead of all of them.
 
-            image = cv2.imread(image_path)
-            processed = preprocess_for_ocr(image, invert=True)
-            object_selector = ObjectSelection(image_path, verbose=True)
-            color_segmentation_path, edge_detection_path = object_selector.run()
-            color_segmentation = Image.open(color_segmentation_path)
-            edge_detection = Image.open(edge_detection_path)
-            processed_color_segmentation = preprocess_for_ocr(color_segmentation, invert=True)
-            processed_edge_detection = preprocess_for_ocr(edge_detection, invert=True)
-
-            # Save the preprocessed images
-            cv2.imwrite(processed_paths[0], processed)
-            cv2.imwrite(processed_paths[1], processed_color_segmentation)
-            cv2.imwrite(processed_paths[2], processed_edge_detection)
+    The variants are OCRed with Tesseract cheapest first and the first one whose mean word
+    confidence reaches min_confidence is taken. If none does, the variant with the highest
+    confidence is, so the best-of choice is still made, just before the expensive engines run.
+    OCRPipeline makes the choice in its Tesseract worker processes with choose() and records
+    it here with record(); select() does both in this process.
+    """
+    def __init__(self, tesseract=None, min_confidence=DEFAULT_MIN_CONFIDENCE, methods=None):
+        """
+        :param tesseract: TesseractOCR giving the confidences in select, None when the choice is
+                          made by the OCRPipeline workers with their own TesseractOCR.
+        :param min_confidence: Confidence (0-100) at which no further variants are tried.
+        :param methods: Variants to try in order, all of VARIANT_POSTFIXES by default.
+        """
+        self.tesseract = tesseract
+        self.min_confidence = min_confidence
+        self.methods = tuple(methods) if methods else tuple(VARIANT_POSTFIXES)
+        self.images = 0
+        self.tried = 0
+        self.chosen = Counter()
+
+    def __getstate__(self):
+        # workers bring their own TesseractOCR, its persistent APIs cannot be pickled
+        return dict(self.__dict__, tesseract=None)
+
+    def iter_candidates(self, paths_by_method, image_path=None):
+        """
+        Yields the (method, image) pairs to choose from in the order of self.methods: the variants
+        computed in memory from image_path if given, otherwise the written variant paths.
+        """
+        if image_path is not None:
+            return iter_variants(image_path, methods=self.methods, verbose=False)
+        return ((method, paths_by_method[method]) for method in self.methods)
+
+    def choose(self, variants, lang, tesseract):
+        """
+        :param variants: Iterable of (method, preprocessed image or path) pairs in the order of
+                         self.methods, e.g. from iter_candidates; consumed only as far as needed.
+        :param lang: Tesseract language of the image.
+        :param tesseract: TesseractOCR giving the confidences.
+        :return: VariantChoice of the chosen variant, the first one if Tesseract failed on all.
+        """
+        first = best = None
+        tried = 0
+        for method, image in variants:
+            tried += 1
+            _, confidence = tesseract.run_ocr_with_confidence(image, lang)
+            if first is None:
+                first = VariantChoice(method, image, confidence, tried)
+            if confidence is None:
+                continue
+            if best is None or confidence > best.confidence:
+                best = VariantChoice(method, image, confidence, tried)
+            if confidence >= self.min_confidence:
+                break
+        return (best or first)._replace(tried=tried)
+
+    def record(self, choice):
+        """Counts a choice made by choose, for the report."""
+        self.images += 1
+        self.tried += choice.tried
+        self.chosen[choice.method] += 1
+
+    def select(self, variants, lang):
+        """Chooses a variant with self.tesseract and records the choice, see choose."""
+        choice = self.choose(variants, lang, self.tesseract)
+        self.record(choice)
+        return choice
+
+    def report(self):
+        """Returns a summary of the variants tried and chosen."""
+        if not self.images:
+            return "Variant selection: no images"
+        chosen = ", ".join(f"{method}: {self.chosen[method]}" for method in self.methods if self.chosen[method])
+        return (f"Variant selection: {self.images} images, {self.tried / self.images:.2f} of "
+                f"{len(self.methods)} variants OCRed per image, chosen {chosen}")
+
+def preprocess_image(image_path, processed_paths, save_intermediates=False, visualize=False, deskew=None,
+                     verbose=False, target_size=None, proxy_long_edge=None):
+    """
+    Preprocesses one image and writes its variants to processed_paths, in the order of PROCESSED_POSTFIXES.
+    :return: Dictionary of the seconds spent reading, computing every variant and writing.
+    :raises ValueError: If the image cannot be read.
+    """
+    start_time = time.perf_counter()
+    image = cv2.imread(image_path)
+    if image is None:
+        raise ValueError(f"Could not read image {image_path}")
+    timings = {'read': time.perf_counter() - start_time}
+    write_time = 0.0
+
+    paths_by_method = dict(zip(VARIANT_POSTFIXES, processed_paths))
+    variants = iter_variants(image_path, image=image, save_intermediates=save_intermediates,
+                             visualize=visualize, verbose=verbose, deskew=deskew, target_size=target_size,
+                             proxy_long_edge=proxy_long_edge)
+    start_time = time.perf_counter()
+    for method, processed in variants:
+        timings[method] = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        cv2.imwrite(paths_by_method[method], processed)
+        write_time += time.perf_counter() - start_time
+        start_time = time.perf_counter()
+    timings['write'] = write_time
+    return timings
+
+def _preprocess_chunk(jobs, options):
+    """
+    Preprocesses a chunk of (image_path, processed_paths, visualize) jobs in a worker process.
+    :return: (image_path, timings, error) of every job, the timings None and the error message set
+             if the image failed, so one corrupt image does not abort the chunk or the run.
+    """
+    results = []
+    for image_path, processed_paths, visualize in jobs:
+        try:
+            results.append((image_path, preprocess_image(image_path, processed_paths, visualize=visualize,
+                                                         **options), None))
+        except Exception as e:
+            results.append((image_path, None, f"{type(e).__name__}: {e}"))
+    return results
+
+def iter_preprocess_jobs(root_dir, output_dir, visualize_every=0, skipped=None):
+    """
+    Walks root_dir and yields (image_path, processed_paths, visualize) for every image whose
+    variants are not all written under output_dir yet. Step visualizations are sampled for
+    1 in visualize_every of the yielded images. Skipped image paths are appended to skipped.
+    """
+    image_index = 0
+    # Walk through the directory
+    for dirpath, dirnames, filenames in os.walk(root_dir):
+        for filename in filenames:
+            # Check if the file is an image
+            if filename.lower().endswith(SUPPORTED_IMAGE_EXTENSIONS):
+                image_path = os.path.join(dirpath, filename)
+                base_filename = os.path.splitext(filename)[0]
+                base_output_dir = dirpath.replace(root_dir, output_dir)
+                os.makedirs(base_output_dir, exist_ok=True)
+
+                processed_paths = [os.path.join(base_output_dir, base_filename + postfix) for postfix in PROCESSED_POSTFIXES]
+
+                # Skip if all processed files exist
+                if all(os.path.exists(path) for path in processed_paths):
+                    if skipped is not None:
+                        skipped.append(image_path)
+                    continue
+
+                yield image_path, processed_paths, should_visualize(image_index, visualize_every)
+                image_index += 1
+
+def format_stage_report(stage_timings):
+    """Returns the p50 and p95 milliseconds of every stage."""
+    lines = [f"  {'stage':>20} {'p50 (ms)':>10} {'p95 (ms)':>10}"]
+    for stage, seconds in stage_timings.items():
+        p50, p95 = np.percentile(np.array(seconds) * 1000, [50, 95])
+        lines.append(f"  {stage:>20} {p50:>10.1f} {p95:>10.1f}")
+    return "\n".join(lines)
+
+def preprocess_directory(root_dir, output_dir, save_intermediates=False, visualize_every=0, deskew=None,
+                         workers=None, chunk_size=4, verbose=False, progress_every=50, target_size=None,
+                         proxy_long_edge=None):
+    """
+    Preprocesses every image under root_dir and writes the variants to the same layout under output_dir.
+    Step visualizations are rendered for 1 in visualize_every images, none by default.
+    Images are straightened with the deskew method if set; writing deskewed variants to their own
+    output_dir lets deskewing be enabled only for the engines that benefit from it.
+    The same holds for target_size, the long edge of the preprocessed images, DEFAULT_TARGET_SIZE if None.
+    With proxy_long_edge set, object selection detects the regions on a proxy downscaled to that
+    long edge and crops the full resolution image, see ObjectSelection.
+
+    Images are streamed from the directory walk to a pool of worker processes in chunks of
+    chunk_size, with a bounded number of chunks in flight; workers=1 preprocesses in this process.
+    Images whose variants all exist are skipped, images that fail to preprocess are reported and
+    left out, so the next run retries them. Progress is reported every progress_every images,
+    and the throughput and per stage timings at the end.
+    :return: Number of preprocessed images.
+    """
+    workers = workers or os.cpu_count() or 1
+    options = {'save_intermediates': save_intermediates, 'deskew': deskew, 'verbose': verbose,
+               'target_size': target_size, 'proxy_long_edge': proxy_long_edge}
+    skipped = []
+    failed = []
+    stage_timings = defaultdict(list)
+    processed = 0
+    start_time = time.perf_counter()
+
+    def collect(results):
+        nonlocal processed
+        for image_path, timings, error in results:
+            if error is not None:
+                print(f"Failed to preprocess {image_path}: {error}")
+                failed.append(image_path)
+                continue
+            for stage, seconds in timings.items():
+                stage_timings[stage].append(seconds)
+            processed += 1
+            if progress_every and processed % progress_every == 0:
+                elapsed = time.perf_counter() - start_time
+                print(f"Preprocessed {processed} images ({processed / elapsed:.2f} images/s), skipped {len(skipped)}")
+
+    def iter_chunks():
+        chunk = []
+        for job in iter_preprocess_jobs(root_dir, output_dir, visualize_every, skipped):
+            chunk.append(job)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    if workers == 1:
+        for chunk in iter_chunks():
+            collect(_preprocess_chunk(chunk, options))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for chunk in iter_chunks():
+                pending.append(pool.submit(_preprocess_chunk, chunk, options))
+                if len(pending) >= 2 * workers:
+                    collect(pending.popleft().result())
+            while pending:
+                collect(pending.popleft().result())
+
+    elapsed = time.perf_counter() - start_time
+    if skipped:
+        print(f"Skipped {len(skipped)} images with all variants written")
+    if failed:
+        print(f"Failed to preprocess {len(failed)} images")
+    if processed:
+        print(f"Preprocessed {processed} images in {elapsed:.1f}s ({processed / elapsed:.2f} images/s)")
+        print(format_stage_report(stage_timings))
+    return processed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Preprocesses the images under a directory for OCR.")
+    parser.add_argument('input_root', nargs='?', default='dataset/timenote/test/',
+                        help="Directory walked for images.")
+    parser.add_argument('output_root', nargs='?', default='dataset_preprocessed/timenote/test/',
+                        help="Directory the variants are written to, mirroring the input layout.")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes, the CPU count by default.")
+    parser.add_argument('--chunk-size', type=int, default=4, help="Images per task sent to a worker.")
+    parser.add_argument('--save-intermediates', action='store_true', help="Write the object selection crops.")
+    parser.add_argument('--visualize-every', type=int, default=0,
+                        help="Render the selection steps for 1 in N images, never by default.")
+    parser.add_argument('--deskew', choices=DESKEW_METHODS, default=None, help="Straighten the images.")
+    parser.add_argument('--target-size', type=int, default=DEFAULT_TARGET_SIZE,
+                        help="Long edge of the preprocessed images in pixels.")
+    parser.add_argument('--proxy-long-edge', type=int, default=None,
+                        help="Detect the object selection regions on a proxy downscaled to this long edge.")
+    parser.add_argument('--progress-every', type=int, default=50, help="Report progress every N images.")
+    parser.add_argument('--verbose', action='store_true', help="Log the object selection and deskew steps.")
+    args = parser.parse_args(argv)
+
+    preprocess_directory(args.input_root, args.output_root, save_intermediates=args.save_intermediates,
+                         visualize_every=args.visualize_every, deskew=args.deskew, workers=args.workers,
+                         chunk_size=args.chunk_size, verbose=args.verbose, progress_every=args.progress_every,
+                         target_size=args.target_size,
+                         proxy_long_edge=args.proxy_long_edge)
+
+if __name__ == "__main__":
+    main()
 
 # tesseract = TesseractOCR()
 # google_vision = GoogleVisionOCR()
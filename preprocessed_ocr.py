@@ -1,25 +1,29 @@
 import os
 from dotenv import load_dotenv
-from tesseract_ocr import TesseractOCR
 from google_vision_ocr import GoogleVisionOCR
 from apple_vision_ocr import AppleVisionOCR
 from similarity_score_service import ScoreService
-from dataset_helper import get_true_text, get_json_details, extract_lang
+from dataset_helper import get_true_text, extract_lang, GroundTruthIndex
+from ocr_pipeline import OCRPipeline, OCRTask, VariantTask
+from ocr_cache import OCRResultCache
+from comparison_table import ComparisonTable
+from preprocess import preprocess_variants, EarlyExitStrategy, PROCESSED_POSTFIXES, VARIANT_POSTFIXES
 
 REVISION = "PREPROCESSED"
 DEFAULT_LANGUAGE = 'lav' # default latvian language code for timenote dataset
 SUPPORTED_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
 MITTE_DS_LANG_CODE = 'deu' # default german language code for the 'berlin-mitte/' dataset
 
-def process_directory(directory):
+def iter_tasks(directory, ground_truth, in_memory=False, is_complete=None, select_variants=False):
+    """
+    Walks the dataset and yields an OCRTask for every preprocessed variant of every image.
+    By default the variants are read from dataset_preprocessed/. With in_memory, they are
+    computed from the original image and handed to the OCR engines as arrays; is_complete
+    then lets images whose variants are all scored skip preprocessing.
+    With select_variants, one VariantTask is yielded per image instead, the OCRPipeline's
+    EarlyExitStrategy chooses its variant in the Tesseract workers.
+    """
     lang = DEFAULT_LANGUAGE
-    print("Starting directory processing...")
-    print("-" * 60)
-    google_vision_ocr = GoogleVisionOCR()
-    tesseract_ocr = TesseractOCR()
-    apple_vision_ocr = AppleVisionOCR('ocr_results/apple_vision_source_preprocess')
-    score_service = ScoreService(REVISION)  # Set a base directory for scores
-
     for root, dirs, files in os.walk(directory):
         for file in files:
             if file.lower().endswith(SUPPORTED_IMAGE_EXTENSIONS):
@@ -28,11 +32,11 @@ def process_directory(directory):
                 # preprocessed image path
                 base_preprocessed_path = image_path.replace("dataset/", "dataset_preprocessed/")
                 # postfixes for preprocessed
-                postfixes = ['_processed.png', '_processed_color_segmentation.png', '_processed_edge_detection.png']
+                postfixes = PROCESSED_POSTFIXES
 
                 true_text = ""  # Default value if no JSON details are found or if an error occurs
                 print("\nProcessing image:", image_path)
-                json_details = get_json_details(image_path, root)
+                json_details = ground_truth.get_json_details(image_path, root)
                 if json_details:
                     if 'timenote' in image_path:
                         lang = extract_lang(json_details)
@@ -43,24 +47,61 @@ def process_directory(directory):
                 else:
                     print(f"  > No JSON details found for {file}")
 
-                for postfix in postfixes:
-                    filename_without_ext = os.path.splitext(base_preprocessed_path)[0]
-                    extension = os.path.splitext(base_preprocessed_path)[1]
-                    processed_image_path = f"{filename_without_ext}{postfix}"
+                filename_without_ext = os.path.splitext(base_preprocessed_path)[0]
+                processed_image_paths = [f"{filename_without_ext}{postfix}" for postfix in postfixes]
 
-                    print("\nProcessing image:", processed_image_path)
+                if select_variants:
+                    paths_by_method = dict(zip(VARIANT_POSTFIXES, processed_image_paths))
+                    yield VariantTask(paths_by_method, image_path if in_memory else None, lang, true_text)
+                    continue
 
-                    ocr_text = tesseract_ocr.run_ocr(processed_image_path, lang)
-                    google_vision_ocr_text = google_vision_ocr.perform_ocr(processed_image_path)
-                    apple_vision_ocr_text = apple_vision_ocr.perform_ocr(processed_image_path)
+                if not in_memory:
+                    for processed_image_path in processed_image_paths:
+                        yield OCRTask(processed_image_path, processed_image_path, lang, true_text)
+                    continue
 
-                    print(f"  > Tesseract OCR text: {ocr_text if ocr_text else '[No text detected]'}")
-                    print(f"  > Google Vision OCR text: {google_vision_ocr_text if google_vision_ocr_text else '[No text detected]'}")
-                    print(f"  > Apple Vision OCR text: {apple_vision_ocr_text if apple_vision_ocr_text else '[No text detected]'}")
+                if is_complete is not None and all(is_complete(path) for path in processed_image_paths):
+                    continue
+                variants = preprocess_variants(image_path, verbose=False)
+                for postfix, processed_image_path in zip(postfixes, processed_image_paths):
+                    yield OCRTask(processed_image_path, variants[postfix], lang, true_text)
+
+def process_directory(directory, tesseract_workers=None, vision_concurrency=8, in_memory=False, min_confidence=None,
+                      comparison_path=None):
+    """
+    OCRs the preprocessed variants of every image in the directory and logs their scores.
+    With min_confidence, an EarlyExitStrategy picks one variant per image to OCR with every engine.
+    With comparison_path, the ComparisonTable saved there is updated with the new scores and saved
+    again when the run ends, see ComparisonTable.open.
+    """
+    print("Starting directory processing...")
+    print("-" * 60)
+    cache = OCRResultCache()
+    google_vision_ocr = GoogleVisionOCR(cache=cache)
+    apple_vision_ocr = AppleVisionOCR('ocr_results/apple_vision_source_preprocess')
+    score_service = ScoreService(REVISION)  # Set a base directory for scores
+    ground_truth = GroundTruthIndex()
 
-                    score_service.process_scores(processed_image_path, "Tesseract", true_text, ocr_text)
-                    score_service.process_scores(processed_image_path, "Google Vision", true_text, google_vision_ocr_text)
-                    score_service.process_scores(processed_image_path, "Apple Vision", true_text, apple_vision_ocr_text)
+    strategy = None
+    if min_confidence is not None:
+        strategy = EarlyExitStrategy(min_confidence=min_confidence)
+    pipeline = OCRPipeline(score_service, apple_vision_ocr, google_vision_ocr,
+                           tesseract_workers=tesseract_workers, vision_concurrency=vision_concurrency,
+                           cache=cache, strategy=strategy)
+    comparison = None
+    if comparison_path:
+        comparison = ComparisonTable.open(comparison_path)
+        comparison.attach(score_service)
+    try:
+        pipeline.run(iter_tasks(directory, ground_truth, in_memory=in_memory, is_complete=pipeline.is_complete,
+                                select_variants=strategy is not None))
+    finally:
+        score_service.close()
+        if comparison is not None:
+            comparison.save(comparison_path)
+    if strategy is not None:
+        print(strategy.report())
+    print(cache.report())
 
     print("-" * 60)
     print("Directory processing completed.")
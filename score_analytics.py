@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+from score_loader import PREPROCESSED_METHODS
+
+# Tie-break between preprocessing methods with the same score, lower wins
+METHOD_PRIORITY = {'color_segmentation': 1, 'edge_detection': 2, 'default': 3}
+# Images whose best score is not above it are considered unrecognizable by every method
+RECOGNIZED_THRESHOLD = 0.05
+SCORE_STATS = ['mean', 'std', 'min', 'max', 'count']
+
+# One pass removes the preprocessed directory suffix and the preprocessing postfix of a file_id
+PREPROCESSED_KEY_PATTERN = r'(?<=^dataset)_preprocessed|(?:{})$'.format(
+    '|'.join(postfix.replace('.', r'\.') for postfix in PREPROCESSED_METHODS))
+EXTENSION_PATTERN = r'\.[^.]+$'
+
+def _replace_by_file(file_ids, pattern):
+    """Removes pattern from every distinct file_id once and maps the result back to all rows."""
+    codes, uniques = pd.factorize(file_ids)
+    keys = pd.Series(uniques, dtype=object).str.replace(pattern, '', regex=True).to_numpy(dtype=object)
+    return pd.Series(np.where(codes < 0, None, keys[codes]), index=file_ids.index, dtype=object)
+
+def add_file_key(df, preprocessed=True):
+    """
+    Adds the file_key shared by an original image and its preprocessed variants:
+    'dataset_preprocessed/x/1_processed_edge_detection.png' and 'dataset/x/1.jpg' both become 'dataset/x/1'.
+    """
+    df['file_key'] = _replace_by_file(df['file_id'], PREPROCESSED_KEY_PATTERN if preprocessed else EXTENSION_PATTERN)
+    return df
+
+def fill_missing_scores(df, column='composite_score'):
+    """Fills missing scores with the median score."""
+    if df[column].isna().any():
+        print(f"NaN values found in '{column}'. Filling with median...")
+        df[column] = df[column].fillna(df[column].median())
+    return df
+
+def score_summary(df, by):
+    """Returns the composite score statistics of every group."""
+    return df.groupby(by, observed=True).agg({'composite_score': SCORE_STATS})
+
+def best_preprocessing(df, method_priority=METHOD_PRIORITY, keys=('file_key', 'ocr_method')):
+    """
+    Returns the row of the best scoring preprocessing method of every (file_key, ocr_method),
+    ties broken by method_priority, sorted by the keys.
+    """
+    keys = list(keys)
+    scores = df['composite_score'].fillna(-np.inf)
+    best_score = scores.groupby([df[key] for key in keys], observed=True, sort=False).transform('max')
+    candidates = df[scores == best_score]
+    # NaN priorities of unknown methods lose to every known one
+    priority = candidates['preprocessed_method'].map(method_priority).astype(float).fillna(np.inf)
+    best_index = priority.groupby([candidates[key] for key in keys], observed=True).idxmin()
+    return df.loc[best_index.to_numpy()].reset_index(drop=True)
+
+def combine_with_initial(df_init, best):
+    """Stacks the initial scores, as preprocessed_method 'none', on the best preprocessed scores."""
+    df_init = df_init.assign(preprocessed_method='none')
+    if 'file_key' not in df_init.columns:
+        df_init = add_file_key(df_init, preprocessed=False)
+    combined = pd.concat([df_init, best], ignore_index=True)
+    combined['preprocessed_method'] = combined['preprocessed_method'].astype(object)
+    return combined
+
+def filter_recognized(df, threshold=RECOGNIZED_THRESHOLD):
+    """Keeps the images that some method recognizes with a composite score above threshold."""
+    best = df.groupby('file_key', sort=False)['composite_score'].transform('max')
+    return df[best > threshold]
+
+def add_baseline(df, df_init):
+    """Adds the initial score of every (file_key, ocr_method) as composite_score_baseline and their score_diff."""
+    df = df.merge(df_init[['file_key', 'ocr_method', 'composite_score']], on=['file_key', 'ocr_method'],
+                  suffixes=('', '_baseline'))
+    df['score_diff'] = df['composite_score'] - df['composite_score_baseline']
+    return df
+
+def exclude_worsened(df):
+    """
+    Keeps the images where preprocessing improved some score over the baseline and worsened none.
+    """
+    flags = pd.DataFrame({'worsened': df['composite_score'] < df['composite_score_baseline'],
+                          'improved': df['composite_score'] > df['composite_score_baseline']})
+    per_image = flags.groupby(df['file_key'], sort=False).transform('any')
+    return df[~per_image['worsened'] & per_image['improved']]
+
+def compare_revisions(df_init, df_preprocessed, method_priority=METHOD_PRIORITY, threshold=RECOGNIZED_THRESHOLD,
+                      verbose=True):
+    """
+    Compares the best preprocessing of every image with its initial scores.
+    :param df_init: Scores of the original images with file_key, e.g. from add_file_key.
+    :param df_preprocessed: Scores of the preprocessed variants with file_key and preprocessed_method.
+    :return: Tuple of the best preprocessing per (file_key, ocr_method) and the combined rows of the
+             images that preprocessing improved, with their baseline and score_diff.
+    """
+    best = best_preprocessing(df_preprocessed, method_priority)
+    return best, compare_best(df_init, best, threshold, verbose)
+
+def compare_best(df_init, best, threshold=RECOGNIZED_THRESHOLD, verbose=True):
+    """
+    Returns the combined rows of the images that their best preprocessing improved, see compare_revisions.
+    Every step is per file_key, so best can be computed separately for parts of the dataset.
+    """
+    combined = combine_with_initial(df_init, best)
+    if verbose:
+        print("Before unrecognizable cleaned: ", combined.shape)
+    combined = filter_recognized(combined, threshold)
+    if verbose:
+        print("After unrecognizable cleaned: ", combined.shape)
+    combined = exclude_worsened(add_baseline(combined, df_init))
+    if verbose:
+        print("After worsened preprocessing ignored: ", combined.shape)
+    return combined
+
+def max_score_diff(df, by):
+    """Returns the largest score_diff of every group, e.g. of every (file_key, ocr_method)."""
+    return df.groupby(by, observed=True, sort=True).agg({'score_diff': 'max'}).reset_index()
+
+def recognized_counts(df, threshold=RECOGNIZED_THRESHOLD):
+    """
+    Returns the number of images every OCR method recognizes initially and the number more it
+    recognizes with preprocessing, columns 'Initial' and 'Preprocessed'.
+    """
+    recognized = df[df['composite_score'] > threshold]
+    initial = recognized['preprocessed_method'] == 'none'
+    initial_counts = recognized[initial].groupby('ocr_method', observed=True)['file_key'].count()
+    preprocessed_counts = recognized[~initial].groupby('ocr_method', observed=True)['file_key'].count()
+    counts = pd.DataFrame({'Initial': initial_counts, 'Preprocessed': preprocessed_counts})
+    counts['Preprocessed'] = counts['Preprocessed'] - counts['Initial']
+    return counts
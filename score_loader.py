@@ -0,0 +1,105 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from score_store import read_entries
+
+# Score columns cast to float64 while the entries are parsed
+SCORE_COLUMNS = (
+    'composite_score',
+    'scores.basic_similarity_score',
+    'scores.lcs_similarity_score',
+    'scores.jaro_winkler_similarity',
+    'scores.difflib_similarity',
+)
+TEXT_COLUMNS = ('true_text', 'ocr_text')
+
+DATASET_TYPE_PATTERN = '(timenote|berlin-mitte)'
+# Postfix of the preprocessed image -> preprocessing method
+PREPROCESSED_METHODS = {
+    '_processed.png': 'default',
+    '_processed_color_segmentation.png': 'color_segmentation',
+    '_processed_edge_detection.png': 'edge_detection',
+}
+
+def iter_revision_files(directory, skip_test_dirs=False):
+    """Yields the scores files of a revision, without the 'test' subdirectories if skip_test_dirs."""
+    for root, dirs, files in os.walk(directory):
+        if skip_test_dirs:
+            dirs[:] = [name for name in dirs if name != 'test']
+        dirs.sort()
+        for filename in sorted(files):
+            if filename.endswith(('.json', '.jsonl')):
+                yield os.path.join(root, filename)
+
+def _float_column(values):
+    """Casts score strings to float64, missing or malformed scores to NaN."""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(np.float64)
+
+def entries_to_frame(entries, include_text=True):
+    """
+    Builds the DataFrame of score entries column by column with explicit dtypes:
+    float64 scores, a categorical OCR method and, with include_text, the true and OCR texts.
+    The SCORE_COLUMNS are always present, scores of extra metrics are cast to float64 as well.
+    """
+    metrics = {}
+    for entry in entries:
+        metrics.update(dict.fromkeys(entry.get('scores') or ()))
+    columns = {
+        'file_id': [entry.get('file_id') for entry in entries],
+        'ocr_method': pd.Categorical([entry.get('ocr_method') for entry in entries]),
+    }
+    if include_text:
+        for name in TEXT_COLUMNS:
+            columns[name] = [entry.get(name) for entry in entries]
+    columns['composite_score'] = _float_column([entry.get('composite_score') for entry in entries])
+    for metric in metrics:
+        columns[f'scores.{metric}'] = _float_column([(entry.get('scores') or {}).get(metric) for entry in entries])
+    for name in SCORE_COLUMNS:
+        columns.setdefault(name, np.full(len(entries), np.nan))
+    return pd.DataFrame(columns)
+
+def _extract_by_file(df, pattern):
+    """Extracts the first group of pattern from every distinct file_id once, as a categorical."""
+    codes, file_ids = pd.factorize(df['file_id'])
+    extracted = pd.Series(file_ids, dtype=object).str.extract(pattern, expand=False)
+    categories = pd.Categorical(extracted)
+    return pd.Categorical.from_codes(np.where(codes < 0, -1, categories.codes[codes]), categories.categories)
+
+def add_features(df):
+    """
+    Adds the categorical dataset_type of every score and, for preprocessed images, its
+    preprocessed_method, both extracted from file_id once per distinct file.
+    """
+    df['dataset_type'] = _extract_by_file(df, DATASET_TYPE_PATTERN)
+    postfix_pattern = '(' + '|'.join(postfix.replace('.', r'\.') for postfix in PREPROCESSED_METHODS) + ')$'
+    postfixes = _extract_by_file(df, postfix_pattern)
+    if postfixes.notna().any():
+        df['preprocessed_method'] = postfixes.rename_categories(
+            [PREPROCESSED_METHODS[postfix] for postfix in postfixes.categories])
+    return df
+
+def load_revision(directory, skip_test_dirs=False, threads=None, include_text=True, features=True):
+    """
+    Loads the scores of a revision, JSON Lines and legacy scores.json files, into one DataFrame.
+
+    The entries of all files are collected and turned into columns once, with float64 scores
+    and categorical ocr_method, dataset_type and preprocessed_method columns.
+    :param directory: Revision directory, e.g. 'ocr_results/revision_PREPROCESSED_complete/'.
+    :param skip_test_dirs: Skip the 'test' subdirectories of the dataset.
+    :param threads: Number of threads reading the files, None reads them in this thread.
+    :param include_text: Load the true and OCR texts, the largest columns by far.
+    :param features: Add dataset_type and preprocessed_method, see add_features.
+    """
+    paths = list(iter_revision_files(directory, skip_test_dirs))
+    if threads and threads > 1 and len(paths) > 1:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            per_file = list(pool.map(read_entries, paths))
+    else:
+        per_file = [read_entries(path) for path in paths]
+    entries = [entry for file_entries in per_file for entry in file_entries]
+    df = entries_to_frame(entries, include_text=include_text)
+    return add_features(df) if features else df
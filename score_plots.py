@@ -0,0 +1,57 @@
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+# Every plot is shown when path is None and written to path otherwise, with the current matplotlib
+# backend; headless callers select a non-interactive one themselves, see analytics_report.main.
+
+def plot_initial_distribution(df, path=None, kind='box'):
+    """Composite score distribution of the original images by OCR method and dataset type."""
+    plt.figure(figsize=(12, 6))
+    if kind == 'violin':
+        sns.violinplot(x='ocr_method', y='composite_score', hue='dataset_type', data=df, split=True)
+        plt.title('Composite Score Distribution by OCR Method and Dataset Type (Violin Plot)')
+    else:
+        sns.boxplot(x='ocr_method', y='composite_score', hue='dataset_type', data=df)
+        plt.title('Composite Score Distribution by OCR Method and Dataset Type')
+    plt.xlabel('OCR Method')
+    plt.ylabel('Composite Score')
+    plt.legend(title='Dataset Type')
+    _finish(path)
+
+def plot_preprocessing_effect(df, ocr_method, path=None):
+    """Composite score distribution of one OCR method by preprocessing method and dataset type."""
+    sns.set(style="whitegrid")
+    plt.figure(figsize=(10, 6))
+    sns.boxplot(x='preprocessed_method', y='composite_score', hue='dataset_type',
+                data=df[df['ocr_method'] == ocr_method], palette='Set2')
+    plt.title(f'Precizitātes novērtējuma sadalījums priekš OCR metodes {ocr_method}')
+    plt.xlabel('Priekšapstrādes metodes')
+    plt.ylabel('Precizitātes novertejums', labelpad=20)
+    plt.legend(title='Datu kopas veids', bbox_to_anchor=(1, 1), loc=2, borderaxespad=0.)
+    _finish(path)
+
+def plot_mean_improvement(df, by, xlabel, palette, path=None):
+    """Average of the largest score improvement of every image, by OCR or preprocessing method."""
+    plt.figure(figsize=(10, 6))
+    sns.barplot(x=by, y='score_diff', hue=by, data=df, palette=palette, legend=False)
+    plt.title('Vidējais precizitātes uzlabojums')
+    plt.xlabel(xlabel)
+    plt.ylabel('Uzlabojuma vidējais novērtējums')
+    _finish(path)
+
+def plot_recognized_counts(counts, path=None):
+    """Images recognized initially and additionally with preprocessing, by OCR method."""
+    counts.plot(kind='bar', stacked=True, color=['#254d70', '#b2d942'], figsize=(10, 6))
+    plt.title('Atpazītu attēlu skaits pēc OCR metodes')
+    plt.xlabel('')
+    plt.ylabel('Attēlu skaits')
+    plt.legend(['Sakotnēji', 'Ar priekšapstrādi'])
+    plt.xticks(rotation=0)
+    _finish(path)
+
+def _finish(path):
+    if path is None:
+        plt.show()
+        return
+    plt.savefig(path, bbox_inches='tight')
+    plt.close('all')
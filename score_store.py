@@ -0,0 +1,150 @@
+import json
+import os
+
+SCORES_FILENAME = 'scores.jsonl'
+LEGACY_SCORES_FILENAME = 'scores.json'
+
+def iter_legacy_entries(content):
+    """
+    Yields the JSON objects of a legacy scores.json file, pretty-printed objects separated by ",\n",
+    stopping at a truncated trailing entry.
+    """
+    decoder = json.JSONDecoder()
+    position = 0
+    while True:
+        # Skip the ",\n" separators between the entries
+        while position < len(content) and content[position] in ', \n\r\t':
+            position += 1
+        if position >= len(content):
+            return
+        try:
+            entry, position = decoder.raw_decode(content, position)
+        except json.JSONDecodeError:
+            return
+        yield entry
+
+def complete_lines(content):
+    """
+    Returns the complete lines of a JSON Lines file. Every flush writes whole lines, so only the
+    last line can be cut off by an interrupted run, and it is dropped.
+    """
+    lines = content.split('\n')
+    # the last element is empty when the file ends with a newline, and partial otherwise
+    return [line for line in lines[:-1] if line.strip()]
+
+def ends_with_newline(path):
+    """Returns whether a file is empty, missing or ends with a newline."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return True
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+def parse_lines(lines, path=None):
+    """Parses JSON Lines in one call, falling back to line by line to skip corrupted lines."""
+    if not lines:
+        return []
+    try:
+        return json.loads('[' + ','.join(lines) + ']')
+    except json.JSONDecodeError:
+        entries = []
+        for number, line in enumerate(lines, 1):
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                print(f"Skipping corrupted score entry {path or ''}:{number}: {e}")
+        return entries
+
+def read_entries(path):
+    """Returns the score entries of a JSON Lines or legacy pseudo-JSON scores file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if path.endswith('.jsonl'):
+        return parse_lines(complete_lines(content), path)
+    return list(iter_legacy_entries(content))
+
+class ScoreStore:
+    """
+    Append-only store of score entries in JSON Lines files, one scores.jsonl per dataset directory.
+
+    Entries are buffered in memory and written in batches, one complete line per entry and one
+    write per file, so an interrupted run loses at most the unflushed entries and never leaves
+    a file the reader cannot parse. The logged (file_id, ocr_method) keys of a file are read once,
+    from the legacy scores.json next to it as well, so reruns can skip scored entries.
+    Listeners receive the entries of every flush once they are written, e.g. to keep derived
+    tables up to date.
+    """
+    def __init__(self, base_directory, flush_every=200):
+        """
+        :param base_directory: Revision directory the scores files are written under.
+        :param flush_every: Number of buffered entries that triggers a flush.
+        """
+        self.base_directory = base_directory
+        self.flush_every = flush_every
+        self._buffers = {}  # scores file -> buffered lines
+        self._entries = []  # buffered entries, in order
+        self._listeners = []
+        self._keys = {}  # scores file -> set of logged (file_id, ocr_method)
+        self._terminated = set()  # scores files known to end with a complete line
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def path_for(self, full_file_path):
+        """Returns the scores file the entries of a dataset file are logged to."""
+        output_directory = os.path.join(self.base_directory, os.path.dirname(full_file_path).strip("./"))
+        return os.path.join(output_directory, SCORES_FILENAME)
+
+    def keys(self, path):
+        """Returns the (file_id, ocr_method) keys logged in a scores file, buffered entries included."""
+        keys = self._keys.get(path)
+        if keys is None:
+            keys = set()
+            legacy_path = os.path.join(os.path.dirname(path), LEGACY_SCORES_FILENAME)
+            for existing_path in (legacy_path, path):
+                if os.path.exists(existing_path):
+                    for entry in read_entries(existing_path):
+                        keys.add((entry.get('file_id'), entry.get('ocr_method')))
+            self._keys[path] = keys
+        return keys
+
+    def contains(self, full_file_path, ocr_method):
+        """Returns whether an entry for the file and OCR method is logged."""
+        return (full_file_path, ocr_method) in self.keys(self.path_for(full_file_path))
+
+    def append(self, entry):
+        """Buffers a score entry with 'file_id' and 'ocr_method' keys, flushing when the buffer is full."""
+        path = self.path_for(entry['file_id'])
+        self._buffers.setdefault(path, []).append(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._entries.append(entry)
+        self.keys(path).add((entry['file_id'], entry['ocr_method']))
+        if len(self._entries) >= self.flush_every:
+            self.flush()
+
+    def add_listener(self, listener):
+        """Registers a callable receiving the list of entries of every flush after they are written."""
+        self._listeners.append(listener)
+
+    def flush(self):
+        """Writes the buffered entries to their scores files."""
+        buffers, self._buffers = self._buffers, {}
+        entries, self._entries = self._entries, []
+        for path, lines in buffers.items():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if path not in self._terminated:
+                # a line cut off by an interrupted run is ended, so it does not swallow the next entry
+                if not ends_with_newline(path):
+                    lines.insert(0, '\n')
+                self._terminated.add(path)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(''.join(lines))
+        if entries:
+            for listener in self._listeners:
+                listener(entries)
+
+    def close(self):
+        """Flushes the buffered entries."""
+        self.flush()
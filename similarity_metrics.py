@@ -7,7 +7,15 @@ from collections import Counter
 from fuzzywuzzy import fuzz
 from rapidfuzz import fuzz
 import difflib
+from functools import lru_cache
+import numpy as np
 
+# Number of distinct (text, options) normalizations kept in memory
+NORMALIZATION_CACHE_SIZE = 65536
+
+PUNCTUATION_TRANSLATOR = str.maketrans('', '', string.punctuation)
+
+@lru_cache(maxsize=NORMALIZATION_CACHE_SIZE)
 def normalize_text(text, strip_whitespace=False):
     """
     Normalize text by removing diacritics from characters, removing numbers and handling special cases.
@@ -23,36 +31,38 @@ def normalize_text(text, strip_whitespace=False):
         normalized = re.sub(r'\s+', ' ', normalized)  # Standardize whitespace to single spaces
     return normalized
 
+@lru_cache(maxsize=NORMALIZATION_CACHE_SIZE)
+def word_set(text):
+    """
+    Tokenizes text into the set of normalized words used by the word level metrics.
+    Punctuation is removed before normalization.
+    """
+    return frozenset(normalize_text(text.lower().translate(PUNCTUATION_TRANSLATOR)).split())
+
+def format_score(score):
+    """Formats a numeric score the way the string returning metrics do."""
+    return "{:.5f}".format(score)
+
 # word level similarity metrics
 def basic_similarity_score(ocr_text, true_text):
     """
     Compares OCR text with true text in a naive way by checking the proportion
     of matching words, disregarding the order and context.
     """
-    # Normalize texts: lowercase and remove punctuation
-    translator = str.maketrans('', '', string.punctuation)
-    norm_ocr_text = normalize_text(ocr_text.lower().translate(translator))
-    norm_true_text = normalize_text(true_text.lower().translate(translator))
-    
-    # Tokenize texts into sets of words to remove duplicates
-    ocr_words = set(norm_ocr_text.split())
-    true_words = set(norm_true_text.split())
-    
-    # Avoid division by zero if true_text is empty
-    if not true_words:
-        return "0.00000"
-    
-    # Calculate match score
-    match_count = len(ocr_words.intersection(true_words))
-    total_true_words = len(true_words)
-    
-    # Handle case where OCR text is empty
-    if total_true_words == 0 or len(ocr_text.strip()) == 0:
-        return "0.00000"
+    return format_score(_basic_similarity(true_text, ocr_text))
+
+def _basic_similarity(true_text, ocr_text):
+    """Numeric kernel of basic_similarity_score."""
+    # Tokenize texts into sets of normalized words to remove duplicates
+    true_words = word_set(true_text)
+
+    # Avoid division by zero if true_text is empty, handle case where OCR text is empty
+    if not true_words or len(ocr_text.strip()) == 0:
+        return 0.0
 
-    match_score = match_count / total_true_words
-    formatted_score = "{:.5f}".format(match_score)
-    return formatted_score
+    # Calculate match score
+    match_count = len(word_set(ocr_text) & true_words)
+    return match_count / len(true_words)
 
 def jaccard_similarity_score(ocr_text, true_text):
     """
@@ -62,27 +72,21 @@ def jaccard_similarity_score(ocr_text, true_text):
     the two texts, reflecting how similar the texts are in terms of shared
     words regardless of their order or frequency.
     """
-    # Normalize texts: lowercase and remove punctuation
-    translator = str.maketrans('', '', string.punctuation)
-    norm_ocr_text = normalize_text(ocr_text.lower().translate(translator))
-    norm_true_text = normalize_text(true_text.lower().translate(translator))
-    
-    # Tokenize texts into sets of words to calculate intersection and union
-    ocr_words = set(norm_ocr_text.split())
-    true_words = set(norm_true_text.split())
-    
+    return format_score(_jaccard_similarity(true_text, ocr_text))
+
+def _jaccard_similarity(true_text, ocr_text):
+    """Numeric kernel of jaccard_similarity_score."""
+    ocr_words = word_set(ocr_text)
+    true_words = word_set(true_text)
+
     # Calculate intersection and union
     intersection = len(ocr_words & true_words)
     union = len(ocr_words | true_words)
-    
+
     # Avoid division by zero
     if union == 0:
-        return "0.00000"
-    
-    # Calculate Jaccard similarity score
-    jaccard_score = intersection / union
-    formatted_score = "{:.5f}".format(jaccard_score)
-    return formatted_score
+        return 0.0
+    return intersection / union
 
 # char level similarity metrics
 
@@ -90,6 +94,10 @@ def levenshtein_similarity_allow_extras(true_text, ocr_text):
     """
     Calculates a modified Levenshtein similarity score that allows for extra characters in the OCR text.
     """
+    return format_score(_levenshtein_allow_extras(true_text, ocr_text))
+
+def _levenshtein_allow_extras(true_text, ocr_text):
+    """Numeric kernel of levenshtein_similarity_allow_extras."""
     true_text = normalize_text(true_text)
     ocr_text = normalize_text(ocr_text)
 
@@ -97,36 +105,108 @@ def levenshtein_similarity_allow_extras(true_text, ocr_text):
     true_text_len = len(true_text)
 
     if true_text_len == 0:
-        return "0.00000"
+        return 0.0
 
     for i in range(len(ocr_text) - true_text_len + 1):
         segment = ocr_text[i:i+true_text_len]
         distance = levenshtein_distance(true_text, segment)
         min_distance = min(min_distance, distance)
-    
-    similarity_score = max(0, 1 - (min_distance / true_text_len))
-    formatted_score = "{:.5f}".format(similarity_score)
-    return formatted_score
+
+    return float(max(0, 1 - (min_distance / true_text_len)))
+
+def substring_edit_distance(pattern, text):
+    """
+    Computes the smallest Levenshtein distance between the pattern and any substring of the text.
+    Semi-global alignment with free leading and trailing gaps in the text, evaluated with
+    Myers' bit-parallel algorithm: one column of the alignment table is encoded as the
+    vertical deltas held in two integers, so the best match is found in a single pass
+    over the text instead of one full distance computation per window.
+    """
+    m = len(pattern)
+    if m == 0:
+        return 0
+
+    # Bit i of match_masks[ch] is set where pattern[i] == ch
+    match_masks = {}
+    for i, ch in enumerate(pattern):
+        match_masks[ch] = match_masks.get(ch, 0) | (1 << i)
+
+    full_mask = (1 << m) - 1
+    last_bit = 1 << (m - 1)
+    positive_vertical = full_mask
+    negative_vertical = 0
+    # Distance of the whole pattern against the empty substring
+    distance = m
+    best_distance = m
+
+    for ch in text:
+        matches = match_masks.get(ch, 0)
+        vertical = matches | negative_vertical
+        horizontal = ((((matches & positive_vertical) + positive_vertical) & full_mask) ^ positive_vertical) | matches
+        positive_horizontal = negative_vertical | (~(horizontal | positive_vertical) & full_mask)
+        negative_horizontal = positive_vertical & horizontal
+
+        if positive_horizontal & last_bit:
+            distance += 1
+        elif negative_horizontal & last_bit:
+            distance -= 1
+
+        # No carry into the first row: a match may start anywhere in the text
+        positive_horizontal = (positive_horizontal << 1) & full_mask
+        negative_horizontal = (negative_horizontal << 1) & full_mask
+        positive_vertical = negative_horizontal | (~(vertical | positive_horizontal) & full_mask)
+        negative_vertical = positive_horizontal & vertical
+
+        if distance < best_distance:
+            best_distance = distance
+
+    return best_distance
+
+def levenshtein_substring_similarity(true_text, ocr_text):
+    """
+    Calculates a Levenshtein similarity score against the best matching part of the OCR text.
+    Unlike levenshtein_similarity_allow_extras, the matching part may be shorter or longer than
+    the true text, so characters inserted into or dropped from the inscription are tolerated
+    while any surrounding noise in the OCR text is ignored.
+    """
+    return format_score(_levenshtein_substring(true_text, ocr_text))
+
+def _levenshtein_substring(true_text, ocr_text):
+    """Numeric kernel of levenshtein_substring_similarity."""
+    true_text = normalize_text(true_text)
+    ocr_text = normalize_text(ocr_text)
+
+    true_text_len = len(true_text)
+    if true_text_len == 0:
+        return 0.0
+
+    distance = substring_edit_distance(true_text, ocr_text)
+    return max(0.0, 1 - (distance / true_text_len))
 
 def lcs_length(X, Y):
     """
     Computes the length of the longest common subsequence between two sequences.
-    Dynamic programming approach.
+    Bit-parallel approach (Allison-Dix / Hyyrö): each row of the dynamic programming
+    table is encoded as the bits of a single integer, so memory is O(len(X)) bits and
+    every element of Y costs a handful of big-integer operations instead of an inner loop.
     """
     m = len(X)
-    n = len(Y)
-    L = [[0] * (n+1) for i in range(m+1)]
-  
-    for i in range(m+1):
-        for j in range(n+1):
-            if i == 0 or j == 0:
-                L[i][j] = 0
-            elif X[i-1] == Y[j-1]:
-                L[i][j] = L[i-1][j-1] + 1
-            else:
-                L[i][j] = max(L[i-1][j], L[i][j-1])
-  
-    return L[m][n]
+    if m == 0 or len(Y) == 0:
+        return 0
+
+    # Bit i of match_masks[ch] is set where X[i] == ch
+    match_masks = {}
+    for i, ch in enumerate(X):
+        match_masks[ch] = match_masks.get(ch, 0) | (1 << i)
+
+    full_mask = (1 << m) - 1
+    row = full_mask
+    for ch in Y:
+        matches = row & match_masks.get(ch, 0)
+        row = ((row + matches) | (row - matches)) & full_mask
+
+    # Every zero bit in the row marks one step of the common subsequence
+    return m - row.bit_count()
 
 def lcs_similarity_score(true_text, ocr_text):
     """
@@ -134,20 +214,19 @@ def lcs_similarity_score(true_text, ocr_text):
     between two normalized texts. The score is the length of the LCS divided by
     the length of the true text, to normalize the score.
     """
+    return format_score(_lcs_similarity(true_text, ocr_text))
+
+def _lcs_similarity(true_text, ocr_text):
+    """Numeric kernel of lcs_similarity_score."""
     true_text = normalize_text(true_text, True)
     ocr_text = normalize_text(ocr_text, True)
-    
-    # Preliminary check for any common character
+
+    # Preliminary check for any common character, also covers an empty true text
     if not set(true_text).intersection(set(ocr_text)):
-        return "0.00000"
-
-    lcs_len = lcs_length(true_text, ocr_text)
-    if len(true_text) == 0:
-        return 0 if len(ocr_text) > 0 else 1  # Handling edge cases
-    score = lcs_len / len(true_text)
-    formatted_score = "{:.5f}".format(score)
-    return formatted_score
-    
+        return 0.0
+
+    return lcs_length(true_text, ocr_text) / len(true_text)
+
 def generate_ngrams(text, n=2):
     """
     Generate n-grams from the provided text after normalization.
@@ -190,16 +269,18 @@ def combined_ngram_similarity_score(true_text, ocr_text):
     """
     Calculate a combined similarity score based on unigrams and bigrams.
     """
+    return format_score(_combined_ngram_similarity(true_text, ocr_text))
+
+def _combined_ngram_similarity(true_text, ocr_text):
+    """Numeric kernel of combined_ngram_similarity_score."""
     # Unigram similarity
     unigram_similarity = ngram_similarity_score(true_text, ocr_text, n=1)
-    
+
     # Bigram similarity
     bigram_similarity = ngram_similarity_score(true_text, ocr_text, n=2)
-    
+
     # Average the unigram and bigram similarity scores
-    combined_similarity = (unigram_similarity + bigram_similarity) / 2
-    formatted_score = "{:.5f}".format(combined_similarity)
-    return formatted_score
+    return (unigram_similarity + bigram_similarity) / 2
 
 def jaro_winkler_similarity(true_text, ocr_text):
     """
@@ -209,14 +290,16 @@ def jaro_winkler_similarity(true_text, ocr_text):
     :param ocr_text: The OCR-generated text.
     :return: The similarity score as a float.
     """
+    return format_score(_jaro_winkler(true_text, ocr_text))
+
+def _jaro_winkler(true_text, ocr_text):
+    """Numeric kernel of jaro_winkler_similarity."""
     # Normalize texts
     normalized_true_text = normalize_text(true_text, True)
     normalized_ocr_text = normalize_text(ocr_text, True)
 
     # Calculate Jaro-Winkler similarity
-    similarity = jellyfish.jaro_winkler_similarity(normalized_true_text, normalized_ocr_text)
-    formatted_score = "{:.5f}".format(similarity)
-    return formatted_score
+    return jellyfish.jaro_winkler_similarity(normalized_true_text, normalized_ocr_text)
 
 def fuzzywuzzy_similarity(true_text, ocr_text):
     """
@@ -264,12 +347,52 @@ def difflib_similarity(true_text, ocr_text):
     :param ocr_text: The OCR-generated version of the text.
     :return: The similarity score as a float between 0 and 1.
     """
+    return format_score(_difflib_ratio(true_text, ocr_text))
+
+def _difflib_ratio(true_text, ocr_text):
+    """Numeric kernel of difflib_similarity."""
     # Normalize texts
     normalized_true_text = normalize_text(true_text, True)
     normalized_ocr_text = normalize_text(ocr_text, True)
 
     # Create a SequenceMatcher object and calculate the similarity ratio
     matcher = difflib.SequenceMatcher(None, normalized_true_text, normalized_ocr_text)
-    similarity = matcher.ratio()
-    formatted_score = "{:.5f}".format(similarity)
-    return formatted_score
\ No newline at end of file
+    return matcher.ratio()
+
+# Numeric kernels by the name of the metric they back, all called as kernel(true_text, ocr_text)
+SIMILARITY_METRICS = {
+    'basic_similarity_score': _basic_similarity,
+    'jaccard_similarity_score': _jaccard_similarity,
+    'levenshtein_similarity_allow_extras': _levenshtein_allow_extras,
+    'levenshtein_substring_similarity': _levenshtein_substring,
+    'lcs_similarity_score': _lcs_similarity,
+    'combined_ngram_similarity_score': _combined_ngram_similarity,
+    'jaro_winkler_similarity': _jaro_winkler,
+    'fuzzywuzzy_similarity': fuzzywuzzy_similarity,
+    'rapidfuzz_similarity': rapidfuzz_similarity,
+    'difflib_similarity': _difflib_ratio,
+}
+
+def score_batch(pairs, metrics=None):
+    """
+    Scores many (true_text, ocr_text) pairs at once.
+    Normalization and tokenization results are memoized, so every distinct text is
+    normalized once per variant no matter how many pairs or metrics it takes part in.
+
+    :param pairs: Iterable of (true_text, ocr_text) tuples.
+    :param metrics: Names of metrics from SIMILARITY_METRICS, all of them by default.
+    :return: Dictionary mapping each metric name to a float array with one score per pair.
+    """
+    if metrics is None:
+        metrics = list(SIMILARITY_METRICS)
+    unknown = [name for name in metrics if name not in SIMILARITY_METRICS]
+    if unknown:
+        raise ValueError(f"Unknown similarity metrics: {', '.join(unknown)}")
+
+    pairs = list(pairs)
+    results = {}
+    for name in metrics:
+        kernel = SIMILARITY_METRICS[name]
+        results[name] = np.fromiter((kernel(true_text, ocr_text) for true_text, ocr_text in pairs),
+                                    dtype=np.float64, count=len(pairs))
+    return results
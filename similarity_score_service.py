@@ -1,21 +1,67 @@
 import json
 import os
 from similarity_metrics import (
-    basic_similarity_score, lcs_similarity_score, jaro_winkler_similarity, difflib_similarity
+    basic_similarity_score, lcs_similarity_score, jaro_winkler_similarity, difflib_similarity,
+    SIMILARITY_METRICS, format_score
 )
 from composite_score_calculator import CompositeScoreCalculator
+from score_store import ScoreStore
 
 class ScoreService:
-    def __init__(self, revision):
+    def __init__(self, revision, extra_metrics=(), resume=True, flush_every=200, verbose=True):
+        """
+        :param revision: Name of the revision the scores are logged under.
+        :param extra_metrics: Names of additional metrics from similarity_metrics.SIMILARITY_METRICS
+                              to log next to the metrics used by the composite score,
+                              e.g. 'levenshtein_substring_similarity'.
+        :param resume: Skip (file, OCR method) pairs that already have a logged score,
+                       so that rerunning after a crash does not duplicate entries.
+        :param flush_every: Number of scores buffered before they are written, see ScoreStore.
+        :param verbose: Print every logged score entry.
+        """
+        unknown = [name for name in extra_metrics if name not in SIMILARITY_METRICS]
+        if unknown:
+            raise ValueError(f"Unknown similarity metrics: {', '.join(unknown)}")
+        self.extra_metrics = list(extra_metrics)
+        self.resume = resume
+        self.verbose = verbose
         self.base_directory = os.path.join(f"ocr_results/revision_{revision}")
         self.ensure_directory(self.base_directory)
+        self.store = ScoreStore(self.base_directory, flush_every=flush_every)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def ensure_directory(self, path):
         """Ensure that the directory exists."""
         os.makedirs(path, exist_ok=True)
 
+    def is_scored(self, full_file_path, ocr_method):
+        """Returns whether a score for the file and OCR method is already logged."""
+        return self.store.contains(full_file_path, ocr_method)
+
+    def add_listener(self, listener):
+        """Registers a callable receiving the newly written score entries, see ScoreStore.add_listener."""
+        self.store.add_listener(listener)
+
+    def flush(self):
+        """Writes the buffered scores."""
+        self.store.flush()
+
+    def close(self):
+        """Writes the buffered scores, call it when the run ends."""
+        self.store.close()
+
     def process_scores(self, full_file_path, ocr_method, true_text, ocr_text):
         """Processes the OCR scores and logs them based on specified parameters."""
+        if self.resume and self.is_scored(full_file_path, ocr_method):
+            if self.verbose:
+                print(f"Score for {full_file_path} ({ocr_method}) already logged. Skipping scoring.")
+            return
+
         # if not true_text or not ocr_text:
         #     print(f"No text to process for file {full_file_path}. Skipping scoring.")
         #     return
@@ -26,6 +72,8 @@ class ScoreService:
             'jaro_winkler_similarity': jaro_winkler_similarity(ocr_text, true_text),
             'difflib_similarity': difflib_similarity(ocr_text, true_text)
         }
+        for name in self.extra_metrics:
+            scores.setdefault(name, format_score(SIMILARITY_METRICS[name](true_text, ocr_text)))
 
         selected_scores = [
             scores['lcs_similarity_score'],
@@ -48,12 +96,7 @@ class ScoreService:
         self._log_scores(full_file_path, score_entry)
 
     def _log_scores(self, full_file_path, score_entry):
-        """Logs the score data dynamically based on the full file path."""
-        output_directory = os.path.join(self.base_directory, os.path.dirname(full_file_path).strip("./"))
-        output_file = os.path.join(output_directory, 'scores.json')
-        self.ensure_directory(output_directory)
-
-        with open(output_file, 'a') as f:
-            json_entry = json.dumps(score_entry, ensure_ascii=False, indent=4)
-            f.write(json_entry + ",\n")  # Append as a new JSON object
-        print(json_entry)
+        """Buffers the score entry for the scores file of its directory."""
+        self.store.append(score_entry)
+        if self.verbose:
+            print(json.dumps(score_entry, ensure_ascii=False, indent=4))
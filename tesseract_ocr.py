@@ -1,12 +1,36 @@
+import json
 import cv2
 import pytesseract
 import numpy as np
 
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
 class TesseractOCR:
     COMMON_BLACKLIST_CHARS = '0123456789.,/\\()[]}{#$%^&*!@~`-_=+<>?;:|'
     LATIN_LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
 
-    def __init__(self):
+    ENGINE_NAME = 'tesseract'
+    BACKENDS = ('auto', 'tesserocr', 'pytesseract')
+
+    def __init__(self, cache=None, backend='auto', tessdata_path=None):
+        """
+        :param cache: Optional OCRResultCache consulted before running Tesseract.
+        :param backend: 'tesserocr' keeps one initialized Tesseract API per language and blacklist
+                        in this process, 'pytesseract' starts the tesseract binary for every image,
+                        'auto' uses tesserocr when it is installed and falls back to pytesseract.
+        :param tessdata_path: Directory with the traineddata files for tesserocr, its default if None.
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown Tesseract backend '{backend}', expected one of {self.BACKENDS}")
+        if backend == 'tesserocr' and tesserocr is None:
+            raise ImportError("The tesserocr backend requires the tesserocr package")
+        self.cache = cache
+        self.use_tesserocr = tesserocr is not None and backend != 'pytesseract'
+        self.tessdata_path = tessdata_path
+        self._apis = {}  # (lang, blacklist) -> initialized PyTessBaseAPI, None if it failed to initialize
         self.language_blacklists = {
             'lav': self.COMMON_BLACKLIST_CHARS + 'QWXYqwxy',
             'deu': self.COMMON_BLACKLIST_CHARS,                # No additional letters blacklisted
@@ -14,6 +38,113 @@ class TesseractOCR:
             'rus': self.COMMON_BLACKLIST_CHARS + self.LATIN_LETTERS, # Excluding all Latin letters
         }
 
+    def build_config(self, lang):
+        """Returns the Tesseract configuration string used for the given language."""
+        blacklist_chars = self.language_blacklists.get(lang, self.COMMON_BLACKLIST_CHARS)
+        return f'--psm 3 --oem 3 -c tessedit_char_blacklist={blacklist_chars}'
+
+    def backend_for(self, lang):
+        """Returns the backend recognizing images of the language, 'tesserocr' or 'pytesseract'."""
+        return 'tesserocr' if self.use_tesserocr and self._get_api(lang) is not None else 'pytesseract'
+
+    def cache_config(self, lang):
+        """
+        Returns the configuration results are cached under: build_config and the backend, as the
+        tesserocr and tesseract binary output of an image can differ. Images that are not 8 bit
+        always go to pytesseract, they are rare enough to share the key of the language's backend.
+        """
+        return f'{self.build_config(lang)} --backend {self.backend_for(lang)}'
+
+    def _get_api(self, lang):
+        """Returns the persistent tesserocr API for the language, initializing it on first use."""
+        blacklist_chars = self.language_blacklists.get(lang, self.COMMON_BLACKLIST_CHARS)
+        key = (lang, blacklist_chars)
+        if key not in self._apis:
+            try:
+                # Same settings as build_config: --psm 3 --oem 3
+                kwargs = {'lang': lang, 'psm': tesserocr.PSM.AUTO, 'oem': tesserocr.OEM.DEFAULT}
+                if self.tessdata_path:
+                    kwargs['path'] = self.tessdata_path
+                api = tesserocr.PyTessBaseAPI(**kwargs)
+                api.SetVariable('tessedit_char_blacklist', blacklist_chars)
+            except Exception as e:
+                print(f"Failed to initialize tesserocr for language '{lang}', falling back to pytesseract: {e}")
+                api = None
+            self._apis[key] = api
+        return self._apis[key]
+
+    def _api_for(self, image, lang):
+        """Returns the tesserocr API to recognize the image with, None to use pytesseract."""
+        api = self._get_api(lang) if self.use_tesserocr else None
+        if api is None or image is None or image.dtype != np.uint8 or image.ndim not in (2, 3):
+            return None
+
+        # Hand the pixel buffer to the already initialized API, no temporary file or process
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+        api.SetImageBytes(image.tobytes(), width, height, bytes_per_pixel, width * bytes_per_pixel)
+        return api
+
+    def _recognize(self, image, lang, config):
+        api = self._api_for(image, lang)
+        if api is None:
+            return pytesseract.image_to_string(image, lang=lang, config=config)
+        return api.GetUTF8Text()
+
+    def _recognize_with_confidence(self, image, lang, config):
+        """
+        Returns the text, the mean word confidence (0-100) and whether the text is the one
+        _recognize returns for the image.
+        """
+        api = self._api_for(image, lang)
+        if api is not None:
+            text = api.GetUTF8Text()
+            return text, float(api.MeanTextConf()), True
+
+        # One tesseract run for words and confidences, the text is rebuilt line by line from the words
+        data = pytesseract.image_to_data(image, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+        lines = {}
+        confidences = []
+        for block, paragraph, line, word, confidence in zip(data['block_num'], data['par_num'], data['line_num'],
+                                                            data['text'], data['conf']):
+            confidence = float(confidence)
+            if confidence < 0 or not str(word).strip():
+                continue
+            lines.setdefault((block, paragraph, line), []).append(str(word))
+            confidences.append(confidence)
+        text = '\n'.join(' '.join(words) for words in lines.values())
+        return text, (sum(confidences) / len(confidences) if confidences else 0.0), False
+
+    def close(self):
+        """Releases the persistent Tesseract APIs."""
+        for api in self._apis.values():
+            if api is not None:
+                api.End()
+        self._apis = {}
+
+    def _load_image(self, image_input):
+        """
+        Returns the image, the content hash of the input when caching and the encoded file content.
+        With a cache, files are read once for both the hash and decoding, and only decoded on a miss.
+        """
+        # Check if the input is a numpy array
+        if isinstance(image_input, np.ndarray):
+            image_hash = self.cache.hash_array(image_input) if self.cache is not None else None
+            return image_input, image_hash, None
+        if self.cache is not None:
+            with open(image_input, 'rb') as image_file:
+                content = image_file.read()
+            return None, self.cache.hash_bytes(content), content
+        # If the input is not a numpy array, assume it's a file path
+        return cv2.imread(image_input, cv2.IMREAD_UNCHANGED), None, None
+
+    @staticmethod
+    def _decode(image, content):
+        if image is None:
+            image = cv2.imdecode(np.frombuffer(content, np.uint8), cv2.IMREAD_UNCHANGED)
+        return image
+
     def run_ocr(self, image_input, lang='lav'):
         """
         Runs OCR on an image using Tesseract with the specified language and returns the extracted text.
@@ -22,17 +153,53 @@ class TesseractOCR:
         :return: Extracted text or None if an error occurs.
         """
         try:
-            # Check if the input is a numpy array
-            if isinstance(image_input, np.ndarray):
-                image = image_input
-            else:
-                # If the input is not a numpy array, assume it's a file path
-                image = cv2.imread(image_input, cv2.IMREAD_UNCHANGED)
-
-            blacklist_chars = self.language_blacklists.get(lang, self.COMMON_BLACKLIST_CHARS)
-            config = f'--psm 3 --oem 3 -c tessedit_char_blacklist={blacklist_chars}'
-            text = pytesseract.image_to_string(image, lang=lang, config=config)
-            return text.strip()
+            config = self.build_config(lang)
+            image, image_hash, content = self._load_image(image_input)
+
+            if image_hash is not None:
+                cache_config = self.cache_config(lang)
+                cached_text = self.cache.get(image_hash, self.ENGINE_NAME, lang, cache_config)
+                if cached_text is not None:
+                    return cached_text
+                image = self._decode(image, content)
+
+            text = self._recognize(image, lang, config).strip()
+            if image_hash is not None:
+                self.cache.put(image_hash, self.ENGINE_NAME, lang, cache_config, text)
+            return text
         except Exception as e:
             print(f"Failed to process image with Tesseract in language '{lang}': {e}")
             return None
+
+    def run_ocr_with_confidence(self, image_input, lang='lav'):
+        """
+        Runs OCR like run_ocr and also returns Tesseract's mean word confidence, a cheap signal of
+        how readable the image is. With tesserocr the text is cached as the run_ocr text of the
+        image as well, so OCRing a variant chosen by its confidence does not run Tesseract again.
+        pytesseract rebuilds the text from the recognized words, which can differ from the
+        image_to_string text of run_ocr, so it is only cached with the confidence.
+        :return: Tuple of the extracted text and the confidence (0-100), (None, None) if an error occurs.
+        """
+        try:
+            config = self.build_config(lang)
+            image, image_hash, content = self._load_image(image_input)
+
+            if image_hash is not None:
+                cache_config = self.cache_config(lang)
+                confidence_config = cache_config + ' +confidence'
+                cached = self.cache.get(image_hash, self.ENGINE_NAME, lang, confidence_config)
+                if cached is not None:
+                    text, confidence = json.loads(cached)
+                    return text, confidence
+                image = self._decode(image, content)
+
+            text, confidence, is_plain_text = self._recognize_with_confidence(image, lang, config)
+            text = text.strip()
+            if image_hash is not None:
+                self.cache.put(image_hash, self.ENGINE_NAME, lang, confidence_config, json.dumps([text, confidence]))
+                if is_plain_text:
+                    self.cache.put(image_hash, self.ENGINE_NAME, lang, cache_config, text)
+            return text, confidence
+        except Exception as e:
+            print(f"Failed to process image with Tesseract in language '{lang}': {e}")
+            return None, None
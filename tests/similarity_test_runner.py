@@ -1,5 +1,6 @@
 import unittest
 from test_levenshtein_similarity import TestLevenshteinSimilarity
+from test_levenshtein_substring_similarity import TestLevenshteinSubstringSimilarity
 from test_lcs_similarity import TestLCSSimilarity
 from test_ngram_similarity import TestNGramSimilarity
 from test_jaro_winkler_similarity import TestJaroWinklerSimilarity
@@ -12,6 +13,7 @@ from test_difflib_similarity import TestDifflibSimilarity
 def create_test_suite():
     test_suite = unittest.TestSuite()
     test_suite.addTest(unittest.makeSuite(TestLevenshteinSimilarity))
+    test_suite.addTest(unittest.makeSuite(TestLevenshteinSubstringSimilarity))
     test_suite.addTest(unittest.makeSuite(TestLCSSimilarity))
     test_suite.addTest(unittest.makeSuite(TestNGramSimilarity))
     test_suite.addTest(unittest.makeSuite(TestJaroWinklerSimilarity))
@@ -0,0 +1,98 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import tempfile
+import time
+import unittest
+import sys
+import os.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+from analytics_report import build_tables, write_report, list_partitions
+
+OCR_METHODS = ('Tesseract', 'Apple Vision')
+POSTFIXES = {'_processed.png': 0.0, '_processed_color_segmentation.png': 0.3, '_processed_edge_detection.png': -0.1}
+
+def write_scores(directory, file_id, score):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'scores.jsonl'), 'a', encoding='utf-8') as f:
+        for method in OCR_METHODS:
+            f.write(json.dumps({'file_id': file_id, 'ocr_method': method, 'true_text': 'Valija', 'ocr_text': 'Valja',
+                                'scores': {'basic_similarity_score': f"{score:.5f}"},
+                                'composite_score': f"{score:.5f}"}) + "\n")
+
+class TestAnalyticsReport(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for the analytics report...")
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.initial = os.path.join(self.tmp.name, 'revision_INITIAL')
+        self.preprocessed = os.path.join(self.tmp.name, 'revision_PREPROCESSED')
+        self.cache = os.path.join(self.tmp.name, 'cache')
+        for cemetery in ('a', 'b'):
+            self.add_cemetery(cemetery)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def add_cemetery(self, cemetery, images=3):
+        for i in range(images):
+            write_scores(os.path.join(self.initial, 'dataset', 'timenote', cemetery),
+                         f"dataset/timenote/{cemetery}/{i}.jpg", 0.2 + i / 10)
+            for postfix, change in POSTFIXES.items():
+                write_scores(os.path.join(self.preprocessed, 'dataset_preprocessed', 'timenote', cemetery),
+                             f"dataset_preprocessed/timenote/{cemetery}/{i}{postfix}", 0.2 + i / 10 + change)
+
+    def build(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            tables = build_tables(self.initial, self.preprocessed, cache_directory=self.cache, workers=1)
+        return tables, output.getvalue()
+
+    def test_partitions(self):
+        partitions = list_partitions(self.initial, self.preprocessed)
+        self.assertEqual(list(partitions), ['dataset/timenote/a', 'dataset/timenote/b'])
+        self.assertEqual([len(files) for files in partitions['dataset/timenote/a'].values()], [1, 1])
+
+    def test_tables_and_incremental_rebuild(self):
+        tables, log = self.build()
+        self.assertIn("Recomputed 2 of 2 partitions", log)
+        self.assertEqual(tables['method_counts']['color_segmentation'], 12)
+        self.assertEqual(tables['improvement_counts'].loc['Tesseract'].tolist(), [6, 0])
+        self.assertEqual(len(tables['combined']), 24)
+
+        _, log = self.build()
+        self.assertIn("are up to date", log)
+
+        time.sleep(0.01)
+        self.add_cemetery('c', images=2)
+        tables, log = self.build()
+        self.assertIn("Recomputed 1 of 3 partitions", log)
+        self.assertEqual(tables['method_counts']['color_segmentation'], 16)
+
+    def test_write_report(self):
+        tables, _ = self.build()
+        output_directory = os.path.join(self.tmp.name, 'report')
+        index_path = write_report(tables, output_directory, workers=1)
+        with open(index_path, encoding='utf-8') as f:
+            index = f.read()
+        for name in ('grouped.csv', 'grouped_combined.csv', 'initial_box.png', 'preprocessing_tesseract.png',
+                     'recognized_counts.png'):
+            with self.subTest(name=name):
+                self.assertTrue(os.path.exists(os.path.join(output_directory, name)))
+        self.assertIn('<img src="recognized_counts.png">', index)
+
+    def test_import_keeps_backend(self):
+        # importing the report or the scripts must not switch the backend of interactive callers
+        code = ("import matplotlib; matplotlib.use('svg'); "
+                "import analytics_report, analytics, initial_analytics; print(matplotlib.get_backend())")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=os.path.join(os.path.dirname(__file__), os.path.pardir))
+        self.assertEqual(result.stdout.strip(), 'svg')
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
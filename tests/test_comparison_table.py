@@ -0,0 +1,137 @@
+import unittest
+import sys
+import os
+import os.path
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+import numpy as np
+import pandas as pd
+from comparison_table import ComparisonTable
+from score_analytics import add_file_key, compare_revisions
+from score_loader import entries_to_frame, add_features
+from similarity_score_service import ScoreService
+
+POSTFIXES = {'default': '_processed.png', 'color_segmentation': '_processed_color_segmentation.png',
+             'edge_detection': '_processed_edge_detection.png'}
+OCR_METHODS = ['Tesseract', 'Google Vision', 'Apple Vision']
+
+def initial_entry(name, ocr_method, score):
+    return {'file_id': f'dataset/timenote/{name}.jpg', 'ocr_method': ocr_method, 'composite_score': score}
+
+def preprocessed_entry(name, method, ocr_method, score):
+    return {'file_id': f'dataset_preprocessed/timenote/{name}{POSTFIXES[method]}', 'ocr_method': ocr_method,
+            'composite_score': score}
+
+def random_entries(rng, images):
+    entries = []
+    for i in range(images):
+        for ocr_method in OCR_METHODS:
+            entries.append(initial_entry(str(i), ocr_method, round(float(rng.random()), 2)))
+            for method in POSTFIXES:
+                entries.append(preprocessed_entry(str(i), method, ocr_method, round(float(rng.random()), 2)))
+    return entries
+
+def full_comparison(entries):
+    df = add_features(entries_to_frame(entries, include_text=False))
+    preprocessed = df['preprocessed_method'].notna()
+    df_init = add_file_key(df[~preprocessed].copy(), preprocessed=False)
+    df_preprocessed = add_file_key(df[preprocessed].copy())
+    return compare_revisions(df_init, df_preprocessed, verbose=False)[1]
+
+class TestComparisonTable(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for the incremental comparison table...")
+
+    def test_flags(self):
+        table = ComparisonTable()
+        table.update([
+            initial_entry('improved', 'Tesseract', 0.2), preprocessed_entry('improved', 'default', 'Tesseract', 0.6),
+            initial_entry('improved', 'Apple Vision', 0.5),
+            preprocessed_entry('improved', 'edge_detection', 'Apple Vision', 0.5),
+            initial_entry('worsened', 'Tesseract', 0.4), preprocessed_entry('worsened', 'default', 'Tesseract', 0.9),
+            initial_entry('worsened', 'Apple Vision', 0.5),
+            preprocessed_entry('worsened', 'default', 'Apple Vision', 0.3),
+            initial_entry('unreadable', 'Tesseract', 0.01),
+            preprocessed_entry('unreadable', 'default', 'Tesseract', 0.02),
+        ])
+        rows = table.table.set_index(['file_key', 'ocr_method'])
+        self.assertAlmostEqual(rows.loc[('dataset/timenote/improved', 'Tesseract'), 'score_diff'], 0.4)
+        self.assertTrue(rows.loc[('dataset/timenote/improved', 'Tesseract'), 'improved'])
+        self.assertTrue(rows.loc[('dataset/timenote/worsened', 'Tesseract'), 'improved'])
+        self.assertTrue(rows.loc[('dataset/timenote/worsened', 'Tesseract'), 'image_worsened'])
+        self.assertFalse(rows.loc[('dataset/timenote/unreadable', 'Tesseract'), 'recognized'])
+        self.assertEqual(set(table.improved()['file_key']), {'dataset/timenote/improved'})
+        self.assertEqual(table.table['composite_score'].dtype, np.float64)
+
+    def test_update_recomputes_affected_keys(self):
+        table = ComparisonTable()
+        table.update(random_entries(np.random.default_rng(0), 5))
+        before = table.table.set_index(['file_key', 'ocr_method']).sort_index()
+
+        affected = table.update([preprocessed_entry('3', 'color_segmentation', 'Tesseract', 1.0)])
+        self.assertEqual(list(affected), ['dataset/timenote/3'])
+        after = table.table.set_index(['file_key', 'ocr_method']).sort_index()
+        self.assertEqual(len(after), len(before))
+        row = after.loc[('dataset/timenote/3', 'Tesseract')]
+        self.assertEqual(row['preprocessed_method'], 'color_segmentation')
+        self.assertEqual(row['composite_score'], 1.0)
+        unaffected = after.index.get_level_values('file_key') != 'dataset/timenote/3'
+        pd.testing.assert_frame_equal(after[unaffected], before[unaffected])
+
+    def test_matches_full_comparison(self):
+        rng = np.random.default_rng(1)
+        entries = random_entries(rng, 40)
+        order = rng.permutation(len(entries))
+        table = ComparisonTable()
+        for batch in np.array_split(order, 7):
+            table.update([entries[i] for i in batch])
+        # rescoring replaces the earlier score of the same file and OCR method
+        rescored = [dict(entries[i], composite_score=round(float(rng.random()), 2)) for i in order[:30]]
+        table.update(rescored)
+        latest = list({(entry['file_id'], entry['ocr_method']): entry for entry in entries + rescored}.values())
+
+        expected = full_comparison(latest)
+        expected = expected[expected['preprocessed_method'] != 'none']
+        improved = table.improved()
+        self.assertEqual(sorted(zip(improved['file_key'], improved['ocr_method'])),
+                         sorted(zip(expected['file_key'], expected['ocr_method'])))
+        merged = improved.merge(expected, on=['file_key', 'ocr_method'], suffixes=('', '_expected'))
+        np.testing.assert_allclose(merged['score_diff'], merged['score_diff_expected'])
+        self.assertEqual(merged['preprocessed_method'].tolist(),
+                         merged['preprocessed_method_expected'].astype(object).tolist())
+
+    def test_attach_and_save(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                table = ComparisonTable()
+                with ScoreService('INITIAL', flush_every=2, verbose=False) as initial, \
+                        ScoreService('PREPROCESSED', flush_every=10, verbose=False) as preprocessed:
+                    table.attach(initial)
+                    table.attach(preprocessed)
+                    initial.process_scores('dataset/timenote/1.jpg', 'Tesseract', 'abc', 'abd')
+                    self.assertEqual(len(table.table), 0)
+                    initial.process_scores('dataset/timenote/1.jpg', 'Apple Vision', 'abc', 'abc')
+                    self.assertEqual(len(table.table), 2)
+                    preprocessed.process_scores('dataset_preprocessed/timenote/1_processed.png', 'Tesseract',
+                                                'abc', 'abc')
+                self.assertEqual(table.table['preprocessed_method'].notna().sum(), 1)
+                self.assertEqual(table.table.loc[table.table['improved'], 'ocr_method'].tolist(), ['Tesseract'])
+                self.assertEqual(set(table.improved()['file_key']), {'dataset/timenote/1'})
+
+                table.save('comparison.pkl')
+                loaded = ComparisonTable.load('comparison.pkl')
+                pd.testing.assert_frame_equal(loaded.table, table.table)
+                pd.testing.assert_frame_equal(ComparisonTable.open('comparison.pkl').table, table.table)
+                # without a saved table, it is built from the revisions the runners write
+                rebuilt = ComparisonTable.open('missing.pkl')
+                pd.testing.assert_frame_equal(rebuilt.table.sort_values('ocr_method', ignore_index=True),
+                                              table.table.sort_values('ocr_method', ignore_index=True))
+            finally:
+                os.chdir(cwd)
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
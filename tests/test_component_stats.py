@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+import numpy as np
+from object_selection_helper import ComponentStats, ObjectSelectionHelper
+
+def make_image():
+    """Three separate regions: 40x40 at the top, 30x50 and 20x60 of equal area below it."""
+    image = np.zeros((120, 120), np.uint8)
+    image[0:40, 70:110] = 255
+    image[50:80, 0:50] = 255
+    image[90:110, 55:115] = 255
+    return image
+
+class TestComponentStats(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for connected component stats...")
+
+    def setUp(self):
+        self.image = make_image()
+        self.components = ComponentStats(self.image)
+        self.helper = ObjectSelectionHelper(verbose=False)
+
+    def test_stats(self):
+        self.assertEqual(self.components.count, 3)
+        self.assertEqual(sorted(self.components.areas.tolist()), [1200, 1500, 1600])
+
+    def test_top_labels_break_ties_in_raster_order(self):
+        labels = self.components.top_labels(2)
+        self.assertEqual(self.components.areas[labels[0] - 1], 1600)
+        # of the two 1500 pixel regions the one starting higher up is kept
+        self.assertEqual(self.components.first_pixel(labels[1]), 50 * 120)
+        self.assertEqual(self.components.top_labels(5, min_area=1550), labels[:1])
+
+    def test_thresholded_regions_do_not_collide_on_equal_areas(self):
+        image = self.image.copy()
+        image[90:110, 55:115] = 0
+        image[85:115, 60:110] = 255  # 30x50, same area as the left region
+        filtered = self.helper.retain_top_regions_thresholded(image)
+        self.assertEqual(np.count_nonzero(filtered), 1600 + 1500)
+        self.assertTrue(filtered[60, 10])
+        self.assertFalse(filtered[100, 80])
+
+    def test_mask(self):
+        mask = self.components.mask()
+        self.assertEqual(mask.dtype, np.uint8)
+        np.testing.assert_array_equal(mask, self.image)
+        label = self.components.top_labels(1)[0]
+        np.testing.assert_array_equal(self.components.mask([label]) > 0, self.components.labels == label)
+
+    def test_subset_matches_relabeling(self):
+        subset = self.helper.top_region_components(self.image)
+        relabeled = ComponentStats(subset.mask())
+        self.assertEqual(subset.count, 2)
+        np.testing.assert_array_equal(subset.labels, relabeled.labels)
+        np.testing.assert_array_equal(subset.stats, relabeled.stats)
+
+    def test_detect_and_score_regions_accepts_components(self):
+        original = np.dstack([self.image, self.image // 2, np.zeros_like(self.image)])
+        subset = self.helper.top_region_components(self.image)
+        with_components = self.helper.detect_and_score_regions(subset.mask(), original, components=subset)
+        relabeled = self.helper.detect_and_score_regions(subset.mask(), original)
+        np.testing.assert_array_equal(with_components, relabeled)
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
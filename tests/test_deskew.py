@@ -0,0 +1,57 @@
+import contextlib
+import io
+import unittest
+import sys
+import os.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+import cv2
+import numpy as np
+from preprocess import correct_skew, preprocess_for_ocr, DESKEW_METHODS
+
+def make_page(angle, width=900, height=600):
+    image = np.full((height, width, 3), 235, np.uint8)
+    for line in range(6):
+        cv2.putText(image, "VALIJA ERNESTSONE 1921", (60, 110 + line * 80), cv2.FONT_HERSHEY_SIMPLEX,
+                    1.5, (20, 20, 20), 3)
+    M = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(image, M, (width, height), borderMode=cv2.BORDER_REPLICATE)
+
+class TestDeskew(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for skew correction...")
+
+    def test_methods_find_the_angle(self):
+        for angle in (-3, 0, 2):
+            page = make_page(angle)
+            for method in DESKEW_METHODS:
+                with self.subTest(angle=angle, method=method):
+                    best_angle, corrected = correct_skew(page, delta=1, method=method)
+                    self.assertAlmostEqual(best_angle, -angle, delta=0.5)
+                    self.assertEqual(corrected.shape, page.shape)
+
+    def test_angle_resolution(self):
+        best_angle, _ = correct_skew(make_page(1.5), delta=0.5, method='coarse_to_fine')
+        self.assertAlmostEqual(best_angle, -1.5, delta=0.25)
+        best_angle, _ = correct_skew(make_page(4), delta=1, limit=2, method='min_area_rect')
+        self.assertEqual(best_angle, -2)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            correct_skew(make_page(0), method='hough')
+
+    def test_preprocess_for_ocr_deskew(self):
+        page = make_page(2)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(preprocess_for_ocr(page, deskew='coarse_to_fine').shape,
+                             preprocess_for_ocr(page).shape)
+        # batch and worker runs stay quiet unless asked
+        self.assertEqual(output.getvalue(), '')
+        with contextlib.redirect_stdout(output):
+            preprocess_for_ocr(page, deskew='coarse_to_fine', verbose=True)
+        self.assertNotEqual(output.getvalue(), '')
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,117 @@
+import unittest
+import os
+import tempfile
+import threading
+from types import SimpleNamespace
+import sys
+import os.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+import cv2
+import numpy as np
+from ocr_cache import OCRResultCache
+
+try:
+    from google_vision_ocr import GoogleVisionOCR
+except ImportError:
+    GoogleVisionOCR = None
+
+class StubImageAnnotatorClient:
+    """
+    Offline stand-in for vision.ImageAnnotatorClient.
+    The detected text of an image is its content decoded as UTF-8, content starting with
+    b'error' produces a per-image error and content starting with b'crash' fails the whole call.
+    """
+    def __init__(self):
+        self.batch_sizes = []
+        self.lock = threading.Lock()
+
+    def batch_annotate_images(self, requests):
+        with self.lock:
+            self.batch_sizes.append(len(requests))
+        if any(request.image.content.startswith(b'crash') for request in requests):
+            raise RuntimeError("stub call failed")
+        return SimpleNamespace(responses=[self._annotate(request.image.content) for request in requests])
+
+    def text_detection(self, image):
+        return self._annotate(image.content)
+
+    @staticmethod
+    def _annotate(content):
+        if content.startswith(b'error'):
+            return SimpleNamespace(error=SimpleNamespace(message="stub error"), text_annotations=[])
+        try:
+            text = content.decode('utf-8')
+        except UnicodeDecodeError:
+            text = "image"
+        annotations = [SimpleNamespace(description=text)] if text else []
+        return SimpleNamespace(error=SimpleNamespace(message=""), text_annotations=annotations)
+
+@unittest.skipIf(GoogleVisionOCR is None, "google-cloud-vision is not installed")
+class TestGoogleVisionBatch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for Google Vision batch OCR...")
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.client = StubImageAnnotatorClient()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_image(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_results_follow_input_order(self):
+        paths = [self.write_image(f"{i}.png", f"text {i}".encode()) for i in range(40)]
+        ocr = GoogleVisionOCR(client=self.client)
+
+        results = ocr.perform_ocr_batch(paths, max_concurrent_batches=3)
+
+        self.assertEqual(results, [f"text {i}" for i in range(40)])
+        self.assertEqual(sorted(self.client.batch_sizes), [8, 16, 16])
+
+    def test_errors_only_affect_their_items(self):
+        paths = [
+            self.write_image("ok.png", b"first"),
+            self.write_image("error.png", b"error"),
+            self.write_image("empty.png", b""),
+            self.write_image("other.png", b"second"),
+            self.write_image("crash.png", b"crash"),
+        ]
+        ocr = GoogleVisionOCR(client=self.client)
+
+        self.assertEqual(ocr.perform_ocr_batch(paths, batch_size=2),
+                         ["first", None, "", "second", None])
+
+    def test_arrays_are_encoded_as_bgr(self):
+        image = np.zeros((4, 6, 3), np.uint8)
+        image[:, :3] = (255, 0, 0)  # blue in OpenCV's channel order
+        image[:, 3:] = (0, 0, 255)  # red
+        path = os.path.join(self.tmp.name, 'image.png')
+        cv2.imwrite(path, image)
+        for array in (image, cv2.imread(path), cv2.cvtColor(image, cv2.COLOR_BGR2BGRA),
+                      cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)):
+            with self.subTest(shape=array.shape):
+                decoded = cv2.imdecode(np.frombuffer(GoogleVisionOCR._encode_array(array), np.uint8),
+                                       cv2.IMREAD_UNCHANGED)
+                np.testing.assert_array_equal(decoded, array)
+
+    def test_arrays_and_cache(self):
+        cache = OCRResultCache(os.path.join(self.tmp.name, 'cache.sqlite'))
+        ocr = GoogleVisionOCR(cache=cache, client=self.client)
+        images = [np.full((8, 8), i, np.uint8) for i in range(3)]
+
+        self.assertEqual(ocr.perform_ocr_batch(images), ["image"] * 3)
+        self.assertEqual(self.client.batch_sizes, [3])
+        # A second run is served from the cache without calling the API
+        self.assertEqual(ocr.perform_ocr_batch(images), ["image"] * 3)
+        self.assertEqual(self.client.batch_sizes, [3])
+        self.assertEqual(cache.hits['google_vision'], 3)
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
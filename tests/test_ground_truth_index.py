@@ -0,0 +1,95 @@
+import unittest
+import json
+import os
+import tempfile
+import sys
+import os.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+from dataset_helper import GroundTruthIndex, get_json_details, get_true_text, extract_lang
+
+TIMENOTE_ITEMS = [
+    {"main_image_url": "https://timenote.info/img/2018/10_Valija-Ernestsone.jpg",
+     "person_name": "Valija Ernestsone", "nationality": "Latvian"},
+    {"main_image_url": "https://timenote.info/img/2016/07_Arija-Dumbravs.jpg",
+     "person_name": "Arija Dumbravs", "nationality": "Russian"},
+]
+
+MITTE_ITEMS = [
+    {"imageURL": "https://berlin.de/img/AErzte_ohne_Grenzen.jpg", "description": "Ärzte ohne Grenzen"},
+]
+
+class TestGroundTruthIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for Ground Truth Index...")
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.timenote_dir = os.path.join(self.tmp.name, 'timenote', 'Jaunciema_kapi')
+        self.mitte_dir = os.path.join(self.tmp.name, 'berlin-mitte')
+        os.makedirs(self.timenote_dir)
+        os.makedirs(self.mitte_dir)
+        self.write_json(self.timenote_dir, 'items.json', TIMENOTE_ITEMS)
+        self.write_json(self.mitte_dir, 'items.json', MITTE_ITEMS)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_json(self, directory, name, items):
+        with open(os.path.join(directory, name), 'w') as f:
+            json.dump(items, f)
+
+    def test_matches_directory_scan(self):
+        index = GroundTruthIndex()
+        images = [
+            os.path.join(self.timenote_dir, '2018_10_Valija-Ernestsone.jpg'),
+            os.path.join(self.timenote_dir, '2016_07_Arija-Dumbravs.png'),
+            os.path.join(self.timenote_dir, '2020_01_Unknown.jpg'),
+            os.path.join(self.mitte_dir, 'AErzte_ohne_Grenzen.jpg'),
+        ]
+        for image_path in images:
+            directory = os.path.dirname(image_path)
+            with self.subTest(image_path=image_path):
+                self.assertEqual(index.get_json_details(image_path, directory),
+                                 get_json_details(image_path, directory))
+
+        item = index.get_json_details(images[1], self.timenote_dir)
+        self.assertEqual(get_true_text(item, images[1]), "Arija Dumbravs")
+        self.assertEqual(extract_lang(item), "rus")
+
+    def test_suffix_match_fallback(self):
+        # the JSON file name is only a suffix of the image name, e.g. a prefixed download
+        self.write_json(self.mitte_dir, 'items.json', MITTE_ITEMS + [
+            {"imageURL": "https://berlin.de/img/Tafel.jpg", "description": "Tafel"},
+            {"imageURL": "https://berlin.de/img/Neue_Tafel.jpg", "description": "Neue Tafel"},
+        ])
+        index = GroundTruthIndex(persist=False)
+        for name, description in (('Gedenk_Tafel.jpg', "Tafel"), ('Die_Neue_Tafel.jpg', "Neue Tafel"),
+                                  ('Neue_Tafel.jpg', "Neue Tafel")):
+            image_path = os.path.join(self.mitte_dir, name)
+            with self.subTest(name=name):
+                self.assertEqual(index.get_json_details(image_path, self.mitte_dir)['description'], description)
+        self.assertEqual(index.get_json_details(os.path.join(self.mitte_dir, 'Gedenk_Tafel.jpg'), self.mitte_dir),
+                         get_json_details(os.path.join(self.mitte_dir, 'Gedenk_Tafel.jpg'), self.mitte_dir))
+        self.assertIsNone(index.get_json_details(os.path.join(self.mitte_dir, 'Tafel.png'), self.mitte_dir))
+
+    def test_persisted_index_is_reused_and_invalidated(self):
+        image_path = os.path.join(self.mitte_dir, 'Neue_Tafel.jpg')
+        self.assertIsNone(GroundTruthIndex().get_json_details(image_path, self.mitte_dir))
+        self.assertTrue(os.path.exists(os.path.join(self.mitte_dir, GroundTruthIndex.INDEX_FILE_NAME)))
+
+        new_item = {"imageURL": "https://berlin.de/img/Neue_Tafel.jpg", "description": "Neue Tafel"}
+        self.write_json(self.mitte_dir, 'items.json', MITTE_ITEMS + [new_item])
+        json_path = os.path.join(self.mitte_dir, 'items.json')
+        stat = os.stat(json_path)
+        os.utime(json_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        self.assertEqual(GroundTruthIndex().get_json_details(image_path, self.mitte_dir), new_item)
+
+    def test_unknown_dataset(self):
+        index = GroundTruthIndex(persist=False)
+        self.assertIsNone(index.get_json_details('other/image.jpg', self.mitte_dir))
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,47 @@
+import unittest
+import sys
+import os.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+import cv2
+import numpy as np
+from object_selection_helper import ComponentStats, ImageContext, ObjectSelectionHelper
+
+class TestImageContext(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for shared image conversions...")
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.image = rng.integers(0, 256, (120, 160, 3), dtype=np.uint8)
+        self.helper = ObjectSelectionHelper(verbose=False)
+
+    def test_conversions_are_cached(self):
+        context = ImageContext(self.image)
+        self.assertIs(context.lab, context.lab)
+        np.testing.assert_array_equal(context.rgb, cv2.cvtColor(self.image, cv2.COLOR_BGR2RGB))
+        np.testing.assert_array_equal(context.saturation, cv2.cvtColor(self.image, cv2.COLOR_BGR2HSV)[:, :, 1])
+
+    def test_average_saturation_matches_masked_copy(self):
+        context = ImageContext(self.image)
+        rng = np.random.default_rng(1)
+        for _ in range(20):
+            mask = np.zeros(self.image.shape[:2], np.uint8)
+            x, y = rng.integers(0, 100), rng.integers(0, 80)
+            cv2.ellipse(mask, (int(x), int(y)), (int(rng.integers(1, 60)), int(rng.integers(1, 40))),
+                        0, 0, 360, 255, -1)
+            expected = self.helper.calculate_average_saturation(self.helper.apply_mask(self.image, mask))
+            self.assertEqual(context.average_saturation(mask), expected)
+
+    def test_detect_and_score_regions_with_context(self):
+        mask = np.zeros(self.image.shape[:2], np.uint8)
+        mask[10:50, 10:70] = 255
+        mask[70:110, 90:150] = 255
+        components = ComponentStats(mask)
+        context = ImageContext(self.image)
+        picked = self.helper.detect_and_score_regions(mask, self.image, components=components, context=context)
+        np.testing.assert_array_equal(picked, self.helper.detect_and_score_regions(mask, self.image))
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -3,7 +3,21 @@ from test_data import TEST_CASES
 import sys
 import os.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
-from similarity_metrics import lcs_similarity_score
+import random
+from similarity_metrics import lcs_similarity_score, lcs_length
+
+def reference_lcs_length(X, Y):
+    # Full-table dynamic programming, kept as the reference for lcs_length
+    m = len(X)
+    n = len(Y)
+    L = [[0] * (n+1) for i in range(m+1)]
+    for i in range(1, m+1):
+        for j in range(1, n+1):
+            if X[i-1] == Y[j-1]:
+                L[i][j] = L[i-1][j-1] + 1
+            else:
+                L[i][j] = max(L[i-1][j], L[i][j-1])
+    return L[m][n]
 
 class TestLCSSimilarity(unittest.TestCase):
 
@@ -46,5 +60,18 @@ class TestLCSSimilarity(unittest.TestCase):
                     # An empty OCR text means no common subsequence
                     self.assertEqual(score, 0.0)
 
+    def test_lcs_length_matches_reference(self):
+        rng = random.Random(42)
+        pairs = [("", ""), ("", "abc"), ("abc", ""), ("a", "a"), ("abc", "abc"), ("āžš", "ažš")]
+        for _ in range(300):
+            alphabet = "abcde " if rng.random() < 0.5 else "abcdefghijklmnopqrstuvwxyzāēīū"
+            pairs.append((
+                ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 90))),
+                ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 90)))
+            ))
+        for X, Y in pairs:
+            with self.subTest(X=X, Y=Y):
+                self.assertEqual(lcs_length(X, Y), reference_lcs_length(X, Y))
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -0,0 +1,59 @@
+import unittest
+import random
+from test_data import TEST_CASES
+import sys
+import os.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+from Levenshtein import distance as levenshtein_distance
+from similarity_metrics import levenshtein_substring_similarity, substring_edit_distance
+
+class TestLevenshteinSubstringSimilarity(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for Levenshtein Substring Similarity...")
+
+    def test_levenshtein_substring_similarity_scenarios(self):
+        for true_text, ocr_text, description in TEST_CASES:
+            with self.subTest(description=description):
+                score = levenshtein_substring_similarity(true_text, ocr_text)
+                print(f"{description} score: {score}")
+
+                score = float(score)
+                if description == "ideal case":
+                    self.assertAlmostEqual(score, 1.0)
+                elif description == "typo":
+                    # A swapped pair of letters costs two edits
+                    self.assertGreater(score, 0.8)
+                elif description == "no whitespace":
+                    # A dropped space is a single deletion inside the match
+                    self.assertGreater(score, 0.9)
+                elif description == "missing tokens":
+                    # Unlike the sliding window version, a shorter OCR text can still match partially
+                    self.assertGreater(score, 0.5)
+                    self.assertLess(score, 1.0)
+                elif description == "reordered words":
+                    self.assertLess(score, 0.8)
+                elif description == "extra tokens":
+                    # Surrounding tokens are free, the true text appears verbatim
+                    self.assertAlmostEqual(score, 1.0)
+                elif description == "more extra tokens":
+                    self.assertAlmostEqual(score, 1.0)
+                elif description == "completely different":
+                    self.assertLess(score, 0.2)
+                elif description == "OCR text empty":
+                    self.assertEqual(score, 0.0)
+
+    def test_substring_edit_distance_matches_brute_force(self):
+        rng = random.Random(7)
+        for _ in range(500):
+            alphabet = "ab " if rng.random() < 0.5 else "abcdefgh"
+            pattern = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 10)))
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 16)))
+            expected = min(levenshtein_distance(pattern, text[i:j])
+                           for i in range(len(text) + 1) for j in range(i, len(text) + 1))
+            with self.subTest(pattern=pattern, text=text):
+                self.assertEqual(substring_edit_distance(pattern, text), expected)
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
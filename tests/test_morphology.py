@@ -0,0 +1,138 @@
+import unittest
+import sys
+import os.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+import cv2
+import numpy as np
+from object_selection_helper import ObjectSelectionHelper
+
+def reclose(image):
+    # Previous implementation of perform_morphological_closing, used as the baseline
+    closing = image if len(image.shape) == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    kernel = np.ones((3, 3), np.uint8)
+    for i in range(10):
+        new_closing = cv2.morphologyEx(closing, cv2.MORPH_CLOSE, kernel, iterations=i)
+        diff = cv2.absdiff(closing, new_closing).sum()
+        closing = new_closing
+        if diff < 5000 and diff != 0:
+            break
+    return closing
+
+def reerode_until_max_area(image, max_area=20000, max_iterations=20):
+    # Previous implementation of erode_until_max_area, used as the baseline. It labeled with
+    # skimage.measure.label, whose default 2D connectivity is the 8-connectivity used here.
+    kernel = np.ones((3, 3), np.uint8)
+    iterations = 1
+    while iterations <= max_iterations:
+        eroded = cv2.erode(image, kernel, iterations=iterations)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(eroded, connectivity=8)
+        if count == 1:
+            return image
+        if stats[1:, cv2.CC_STAT_AREA].max() < max_area:
+            break
+        iterations += 1
+    return eroded
+
+def make_mask(height, width, seed, noise=0.02):
+    """Builds a 0/255 mask of a few filled ellipses with pepper holes and salt specks."""
+    rng = np.random.default_rng(seed)
+    mask = np.zeros((height, width), np.uint8)
+    for _ in range(4):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        axes = (int(rng.integers(width // 10, width // 3)), int(rng.integers(height // 10, height // 3)))
+        cv2.ellipse(mask, center, axes, float(rng.uniform(0, 180)), 0, 360, 255, -1)
+    flipped = rng.random(mask.shape) < noise
+    mask[flipped] = 255 - mask[flipped]
+    return mask
+
+class TestMorphologicalClosing(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for the morphological closing...")
+
+    def setUp(self):
+        self.helper = ObjectSelectionHelper(verbose=False)
+
+    def test_matches_baseline(self):
+        for seed in range(6):
+            for height, width in ((60, 80), (240, 320), (600, 800)):
+                for noise in (0.0, 0.005, 0.05):
+                    with self.subTest(seed=seed, size=(height, width), noise=noise):
+                        mask = make_mask(height, width, seed, noise)
+                        expected = reclose(mask)
+                        np.testing.assert_array_equal(self.helper.perform_morphological_closing(mask), expected)
+                        # the default threshold as a fraction of the image
+                        stop_fraction = 5000 / (255 * height * width)
+                        np.testing.assert_array_equal(
+                            self.helper.perform_morphological_closing(mask, stop_fraction=stop_fraction), expected)
+
+    def test_grayscale_and_color_input(self):
+        rng = np.random.default_rng(0)
+        gray = cv2.GaussianBlur(rng.integers(0, 256, (120, 160), dtype=np.uint8), (5, 5), 0)
+        np.testing.assert_array_equal(self.helper.perform_morphological_closing(gray), reclose(gray))
+        color = cv2.merge([gray, np.roll(gray, 7, axis=1), np.roll(gray, 11, axis=0)])
+        np.testing.assert_array_equal(self.helper.perform_morphological_closing(color), reclose(color))
+
+    def test_empty_mask(self):
+        mask = np.zeros((50, 70), np.uint8)
+        np.testing.assert_array_equal(self.helper.perform_morphological_closing(mask), mask)
+
+class TestErodeUntilMaxArea(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for the erosion below the maximum region area...")
+
+    def setUp(self):
+        self.helper = ObjectSelectionHelper(verbose=False)
+
+    def assert_matches_baseline(self, mask, max_area=20000, max_iterations=20):
+        np.testing.assert_array_equal(
+            self.helper.erode_until_max_area(mask, max_area=max_area, max_iterations=max_iterations),
+            reerode_until_max_area(mask, max_area=max_area, max_iterations=max_iterations))
+
+    def test_matches_baseline(self):
+        for seed in range(4):
+            for height, width in ((240, 320), (750, 1000)):
+                for noise in (0.0, 0.01):
+                    with self.subTest(seed=seed, size=(height, width), noise=noise):
+                        mask = make_mask(height, width, seed, noise)
+                        self.assert_matches_baseline(mask)
+                        self.assert_matches_baseline(mask, max_area=2000, max_iterations=5)
+
+    def test_grayscale_image_is_eroded_stepwise(self):
+        mask = make_mask(240, 320, 0)
+        mask[mask == 255] = np.random.default_rng(0).integers(1, 255, int(np.count_nonzero(mask)), dtype=np.uint8)
+        self.assert_matches_baseline(mask, max_area=5000)
+
+    def test_empty_mask(self):
+        mask = np.zeros((60, 80), np.uint8)
+        self.assertIs(self.helper.erode_until_max_area(mask), mask)
+
+    def test_already_under_max_area(self):
+        mask = np.zeros((60, 80), np.uint8)
+        mask[10:30, 10:40] = 255
+        # like before, it is still eroded once
+        eroded = self.helper.erode_until_max_area(mask)
+        self.assertEqual(cv2.countNonZero(eroded), 18 * 28)
+        self.assert_matches_baseline(mask)
+
+        # unless the erosion removes every region, which returns the original
+        thin = np.zeros((60, 80), np.uint8)
+        thin[10:12, 10:40] = 255
+        self.assertIs(self.helper.erode_until_max_area(thin), thin)
+        self.assert_matches_baseline(thin)
+
+    def test_max_iterations_cap(self):
+        mask = np.zeros((300, 400), np.uint8)
+        mask[50:250, 50:350] = 255
+        for max_iterations in (1, 3, 20):
+            with self.subTest(max_iterations=max_iterations):
+                eroded = self.helper.erode_until_max_area(mask, max_area=1000, max_iterations=max_iterations)
+                # eroded max_iterations times although the region stays above max_area
+                self.assertEqual(cv2.countNonZero(eroded), (200 - 2 * max_iterations) * (300 - 2 * max_iterations))
+                self.assert_matches_baseline(mask, max_area=1000, max_iterations=max_iterations)
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,90 @@
+import unittest
+import os
+import pickle
+import tempfile
+import sys
+import os.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+import numpy as np
+from ocr_cache import OCRResultCache
+from tesseract_ocr import TesseractOCR
+
+class TestOCRResultCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for OCR result cache...")
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'cache', 'ocr_cache.sqlite')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_and_counters(self):
+        cache = OCRResultCache(self.path)
+        image_hash = cache.hash_bytes(b'image bytes')
+
+        self.assertIsNone(cache.get(image_hash, 'tesseract', 'lav', '--psm 3'))
+        cache.put(image_hash, 'tesseract', 'lav', '--psm 3', 'Jānis Ozols')
+        self.assertEqual(cache.get(image_hash, 'tesseract', 'lav', '--psm 3'), 'Jānis Ozols')
+        # Every part of the key matters
+        self.assertIsNone(cache.get(image_hash, 'tesseract', 'deu', '--psm 3'))
+        self.assertIsNone(cache.get(image_hash, 'tesseract', 'lav', '--psm 6'))
+
+        self.assertEqual(cache.hits['tesseract'], 1)
+        self.assertEqual(cache.misses['tesseract'], 3)
+        self.assertIn('tesseract: 1 hits, 3 misses', cache.report())
+
+    def test_results_persist_across_instances(self):
+        OCRResultCache(self.path).put('abc', 'google_vision', None, 'text_detection', '')
+        self.assertEqual(OCRResultCache(self.path).get('abc', 'google_vision', None, 'text_detection'), '')
+
+    def test_failed_results_are_not_cached(self):
+        cache = OCRResultCache(self.path)
+        cache.put('abc', 'tesseract', 'lav', '', None)
+        self.assertIsNone(cache.get('abc', 'tesseract', 'lav', ''))
+
+    def test_array_hash_depends_on_content_and_shape(self):
+        image = np.zeros((4, 6), np.uint8)
+        self.assertEqual(OCRResultCache.hash_array(image), OCRResultCache.hash_array(image.copy()))
+        self.assertNotEqual(OCRResultCache.hash_array(image), OCRResultCache.hash_array(image.reshape(6, 4)))
+        changed = image.copy()
+        changed[0, 0] = 1
+        self.assertNotEqual(OCRResultCache.hash_array(image), OCRResultCache.hash_array(changed))
+
+    def test_picklable_for_worker_processes(self):
+        cache = OCRResultCache(self.path)
+        cache.put('abc', 'tesseract', 'lav', '', 'text')
+        restored = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(restored.get('abc', 'tesseract', 'lav', ''), 'text')
+
+    def test_confidence_run_serves_run_ocr(self):
+        image = np.zeros((8, 8), np.uint8)
+        for is_plain_text in (True, False):
+            with self.subTest(is_plain_text=is_plain_text):
+                tesseract = TesseractOCR(cache=OCRResultCache(self.path), backend='pytesseract')
+                tesseract.language_blacklists['lav'] += str(is_plain_text)  # a cache key per case
+                calls = []
+                def recognize_with_confidence(image, lang, config):
+                    calls.append('confidence')
+                    return ' Jānis\nOzols ', 87.5, is_plain_text
+                def recognize(image, lang, config):
+                    calls.append('plain')
+                    return 'Jānis  Ozols'
+                tesseract._recognize_with_confidence = recognize_with_confidence
+                tesseract._recognize = recognize
+                self.assertEqual(tesseract.run_ocr_with_confidence(image, 'lav'), ('Jānis\nOzols', 87.5))
+                self.assertEqual(tesseract.run_ocr_with_confidence(image, 'lav'), ('Jānis\nOzols', 87.5))
+                # only text recognized like run_ocr does is stored under its key, the text pytesseract
+                # rebuilds from the words is not
+                if is_plain_text:
+                    self.assertEqual(tesseract.run_ocr(image, 'lav'), 'Jānis\nOzols')
+                    self.assertEqual(calls, ['confidence'])
+                else:
+                    self.assertEqual(tesseract.run_ocr(image, 'lav'), 'Jānis  Ozols')
+                    self.assertEqual(calls, ['confidence', 'plain'])
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
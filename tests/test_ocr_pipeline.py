@@ -0,0 +1,115 @@
+import contextlib
+import io
+import os
+import os.path
+import tempfile
+import unittest
+import unittest.mock
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+import ocr_pipeline
+from ocr_pipeline import OCRPipeline, VariantTask
+from preprocess import EarlyExitStrategy, VariantChoice, VARIANT_POSTFIXES
+from similarity_score_service import ScoreService
+
+class StubStrategy(EarlyExitStrategy):
+    """Chooses the color segmentation variant without Tesseract."""
+    def choose(self, variants, lang, tesseract):
+        variants = dict(variants)
+        return VariantChoice('color_segmentation', variants['color_segmentation'], 90.0, len(variants))
+
+class StubTesseract:
+    """Stands in for the TesseractOCR of the workers, its text tells the process it ran in."""
+    def __init__(self, cache=None):
+        self.cache = cache
+
+    def run_ocr(self, image, lang='lav'):
+        return f'pid {os.getpid()}'
+
+class StubVision:
+    def __init__(self):
+        self.images = []
+
+    def perform_ocr(self, image):
+        self.images.append(image)
+        return 'vision text'
+
+    def perform_ocr_batch(self, images, batch_size=16, max_concurrent_batches=1):
+        return [self.perform_ocr(image) for image in images]
+
+class StubAppleVision:
+    def perform_ocr(self, path):
+        return 'apple text'
+
+def variant_task(name):
+    paths = {method: f'dataset_preprocessed/timenote/{name}{postfix}' for method, postfix in VARIANT_POSTFIXES.items()}
+    return VariantTask(paths, None, 'lav', 'true text')
+
+class TestOCRPipeline(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for the OCR pipeline...")
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        # the worker processes are forked and create their TesseractOCR from the patched module
+        self.tesseract_patch = unittest.mock.patch.object(ocr_pipeline, 'TesseractOCR', StubTesseract)
+        self.tesseract_patch.start()
+
+    def tearDown(self):
+        self.tesseract_patch.stop()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def run_pipeline(self, tasks, strategy, vision_batch_size):
+        score_service = ScoreService('PREPROCESSED', verbose=False)
+        vision = StubVision()
+        pipeline = OCRPipeline(score_service, StubAppleVision(), vision, tesseract_workers=2,
+                               vision_concurrency=2, vision_batch_size=vision_batch_size, strategy=strategy)
+        with contextlib.redirect_stdout(io.StringIO()):
+            processed = pipeline.run(tasks)
+        return processed, score_service, vision
+
+    def test_variants_chosen_in_workers(self):
+        for vision_batch_size in (1, 4):
+            with self.subTest(vision_batch_size=vision_batch_size):
+                strategy = StubStrategy(min_confidence=80)
+                tasks = [variant_task(f'{vision_batch_size}_{i}') for i in range(5)]
+                processed, score_service, vision = self.run_pipeline(tasks, strategy, vision_batch_size)
+                self.assertEqual(processed, 5)
+                chosen = [task.score_paths['color_segmentation'] for task in tasks]
+                self.assertEqual(sorted(vision.images), sorted(chosen))
+                for path in chosen:
+                    for method in ('Tesseract', 'Google Vision', 'Apple Vision'):
+                        self.assertTrue(score_service.is_scored(path, method))
+                self.assertFalse(score_service.is_scored(tasks[0].score_paths['default'], 'Tesseract'))
+                self.assertEqual((strategy.images, strategy.tried, strategy.chosen['color_segmentation']),
+                                 (5, 15, 5))
+
+                # images with a scored variant are skipped
+                processed, _, _ = self.run_pipeline(tasks, StubStrategy(), vision_batch_size)
+                self.assertEqual(processed, 0)
+
+    def test_worker_text_is_logged(self):
+        strategy = StubStrategy()
+        captured = []
+        score_service = ScoreService('PREPROCESSED', verbose=False)
+        score_service.add_listener(captured.extend)
+        pipeline = OCRPipeline(score_service, StubAppleVision(), None, tesseract_workers=1, strategy=strategy)
+        with contextlib.redirect_stdout(io.StringIO()):
+            pipeline.run([variant_task('a')])
+        tesseract_entry = next(entry for entry in captured if entry['ocr_method'] == 'Tesseract')
+        self.assertNotEqual(tesseract_entry['ocr_text'], f'pid {os.getpid()}')
+        self.assertTrue(tesseract_entry['ocr_text'].startswith('pid '))
+
+    def test_variant_tasks_need_a_strategy(self):
+        score_service = ScoreService('PREPROCESSED', verbose=False)
+        pipeline = OCRPipeline(score_service, StubAppleVision(), None, tesseract_workers=1)
+        with contextlib.redirect_stdout(io.StringIO()), self.assertRaises(ValueError):
+            pipeline.run([variant_task('a')])
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,101 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import unittest.mock
+import sys
+import os.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+import cv2
+import numpy as np
+import preprocess
+from preprocess import preprocess_directory, main, PROCESSED_POSTFIXES
+
+def make_image(seed):
+    rng = np.random.default_rng(seed)
+    image = np.full((240, 320, 3), 200, np.uint8)
+    image[60:180, 80:240] = rng.integers(0, 120, 3)
+    cv2.putText(image, "1921", (100, 130), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (250, 250, 250), 2)
+    return image
+
+class TestPreprocessDirectory(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for batch preprocessing...")
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input_root = os.path.join(self.tmp.name, 'dataset') + os.sep
+        self.output_root = os.path.join(self.tmp.name, 'dataset_preprocessed') + os.sep
+        os.makedirs(os.path.join(self.input_root, 'card'))
+        for index in range(3):
+            cv2.imwrite(os.path.join(self.input_root, 'card', f'{index}.jpg'), make_image(index))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def outputs(self):
+        return [os.path.join(self.output_root, 'card', f'{index}{postfix}')
+                for index in range(3) for postfix in PROCESSED_POSTFIXES]
+
+    def run_quietly(self, *args, **kwargs):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            processed = preprocess_directory(*args, **kwargs)
+        return processed, output.getvalue()
+
+    def test_writes_variants_and_skips_existing(self):
+        processed, report = self.run_quietly(self.input_root, self.output_root, workers=1, progress_every=2)
+        self.assertEqual(processed, 3)
+        self.assertTrue(all(os.path.exists(path) for path in self.outputs()))
+        self.assertIn("images/s", report)
+        self.assertIn("p95", report)
+
+        processed, report = self.run_quietly(self.input_root, self.output_root, workers=1)
+        self.assertEqual(processed, 0)
+        self.assertIn("Skipped 3 images", report)
+
+    def test_process_pool_matches_inline(self):
+        self.run_quietly(self.input_root, self.output_root, workers=1)
+        inline = [cv2.imread(path, cv2.IMREAD_UNCHANGED) for path in self.outputs()]
+        for path in self.outputs()[::2]:
+            os.remove(path)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            main([self.input_root, self.output_root, '--workers', '2', '--chunk-size', '1'])
+        pooled = [cv2.imread(path, cv2.IMREAD_UNCHANGED) for path in self.outputs()]
+        for expected, actual in zip(inline, pooled):
+            np.testing.assert_array_equal(expected, actual)
+
+    def test_proxy_long_edge_reaches_object_selection(self):
+        with unittest.mock.patch.object(preprocess, 'ObjectSelection', wraps=preprocess.ObjectSelection) as selection:
+            with contextlib.redirect_stdout(io.StringIO()):
+                main([self.input_root, self.output_root, '--workers', '1', '--proxy-long-edge', '160'])
+        self.assertEqual(selection.call_count, 3)
+        self.assertTrue(all(call.kwargs['proxy_long_edge'] == 160 for call in selection.call_args_list))
+        proxied = [cv2.imread(path, cv2.IMREAD_UNCHANGED) for path in self.outputs()]
+        self.assertTrue(all(image is not None for image in proxied))
+
+        # the whole image variant does not depend on the proxy
+        for path in self.outputs():
+            os.remove(path)
+        self.run_quietly(self.input_root, self.output_root, workers=1)
+        for path, image in zip(self.outputs()[::len(PROCESSED_POSTFIXES)], proxied[::len(PROCESSED_POSTFIXES)]):
+            np.testing.assert_array_equal(cv2.imread(path, cv2.IMREAD_UNCHANGED), image)
+
+    def test_corrupt_image_is_skipped(self):
+        with open(os.path.join(self.input_root, 'card', 'corrupt.jpg'), 'wb') as f:
+            f.write(b'not a jpeg')
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                processed, report = self.run_quietly(self.input_root, self.output_root, workers=workers,
+                                                     chunk_size=2)
+                self.assertEqual(processed, 3 if workers == 1 else 0)
+                self.assertTrue(all(os.path.exists(path) for path in self.outputs()))
+                self.assertIn("Failed to preprocess " + os.path.join(self.input_root, 'card', 'corrupt.jpg'), report)
+                self.assertIn("Failed to preprocess 1 images", report)
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,72 @@
+import unittest
+import sys
+import os.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+import cv2
+import numpy as np
+from preprocess import preprocess_for_ocr, DEFAULT_TARGET_SIZE
+
+def reference_preprocess(image, target_size=2000):
+    """The former implementation: invert, cubic resize and an identity dilate and erode."""
+    gray = cv2.bitwise_not(cv2.cvtColor(np.array(image), cv2.COLOR_BGR2GRAY))
+    resize_factor = target_size / max(gray.shape)
+    resized = cv2.resize(gray, None, fx=resize_factor, fy=resize_factor, interpolation=cv2.INTER_CUBIC)
+    kernel = np.ones((1, 1), np.uint8)
+    return cv2.erode(cv2.dilate(resized, kernel, iterations=1), kernel, iterations=1)
+
+class TestPreprocessForOCR(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for OCR preprocessing...")
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def test_upscaling_matches_reference(self):
+        for shape in ((300, 457, 3), (1200, 800, 3)):
+            with self.subTest(shape=shape):
+                image = self.rng.integers(0, 256, shape, dtype=np.uint8)
+                np.testing.assert_array_equal(preprocess_for_ocr(image), reference_preprocess(image))
+
+    def test_downscaling(self):
+        # photo-like texture, pixel noise resamples differently with every filter
+        image = cv2.resize(self.rng.integers(0, 256, (300, 200, 3), dtype=np.uint8), (2000, 3000),
+                           interpolation=cv2.INTER_CUBIC)
+        processed = preprocess_for_ocr(image)
+        self.assertEqual(processed.shape, (2000, 1333))
+        # close to a plain INTER_AREA reduction of the inverted image
+        expected = cv2.resize(255 - cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), (1333, 2000),
+                              interpolation=cv2.INTER_AREA)
+        self.assertLess(np.abs(processed.astype(int) - expected).mean(), 1)
+        # odd sizes and reductions without an integer part keep the rounded output shape
+        for shape, expected_shape in (((2501, 1999, 3), (2000, 1599)), ((4001, 7, 3), (2000, 3))):
+            with self.subTest(shape=shape):
+                image = self.rng.integers(0, 256, shape, dtype=np.uint8)
+                self.assertEqual(preprocess_for_ocr(image).shape, expected_shape)
+
+    def test_no_resize_and_no_invert(self):
+        image = self.rng.integers(0, 256, (1000, 2000, 3), dtype=np.uint8)
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        np.testing.assert_array_equal(preprocess_for_ocr(image), 255 - gray)
+        np.testing.assert_array_equal(preprocess_for_ocr(image, invert=False), gray)
+        # grayscale input is not modified in place
+        processed = preprocess_for_ocr(gray)
+        np.testing.assert_array_equal(processed, 255 - gray)
+        self.assertFalse(np.shares_memory(processed, gray))
+
+    def test_output_buffer(self):
+        image = self.rng.integers(0, 256, (600, 400, 3), dtype=np.uint8)
+        out = np.empty((1000, 667), np.uint8)
+        self.assertIs(preprocess_for_ocr(image, target_size=1000, out=out), out)
+        np.testing.assert_array_equal(out, reference_preprocess(image, 1000))
+        with self.assertRaises(ValueError):
+            preprocess_for_ocr(image, out=np.empty((10, 10), np.uint8))
+
+    def test_target_size(self):
+        image = self.rng.integers(0, 256, (300, 200, 3), dtype=np.uint8)
+        self.assertEqual(max(preprocess_for_ocr(image).shape), DEFAULT_TARGET_SIZE)
+        self.assertEqual(preprocess_for_ocr(image, target_size=900).shape, (900, 600))
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,111 @@
+import contextlib
+import io
+import unittest
+import sys
+import os.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+import cv2
+import numpy as np
+from object_selection import ObjectSelection
+from object_selection_helper import ObjectSelectionHelper
+
+def make_image(width=2400, height=1800):
+    """A light plaque with text on a darker, blue tinted background."""
+    image = np.full((height, width, 3), (150, 90, 60), np.uint8)
+    cv2.rectangle(image, (600, 450), (1800, 1350), (225, 225, 215), -1)
+    for line in range(3):
+        cv2.putText(image, "JANIS OZOLS", (700, 650 + line * 250), cv2.FONT_HERSHEY_SIMPLEX, 4, (30, 30, 30), 8)
+    return image
+
+class TestProxySelection(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for proxy resolution object selection...")
+
+    def select(self, image, proxy_long_edge):
+        selector = ObjectSelection('proxy_test/image.jpg', verbose=False, image=image, write_outputs=False,
+                                   visualize=False, proxy_long_edge=proxy_long_edge)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = selector.run_in_memory()
+        return selector, results
+
+    def test_thresholds_scale_with_proxy(self):
+        selector, _ = self.select(make_image(), 600)
+        self.assertEqual(selector.proxy_image.shape[:2], (450, 600))
+        self.assertAlmostEqual(selector.helper.min_region_area, ObjectSelectionHelper.MIN_REGION_AREA / 16)
+        self.assertAlmostEqual(selector.helper.max_region_area, ObjectSelectionHelper.MAX_REGION_AREA / 16)
+        self.assertEqual(selector.helper.max_erosion_iterations, 5)
+
+    def test_small_images_are_not_scaled(self):
+        image = make_image()
+        selector, _ = self.select(image, 4000)
+        self.assertIs(selector.proxy_image, image)
+        self.assertEqual(selector.helper.min_region_area, ObjectSelectionHelper.MIN_REGION_AREA)
+
+    def test_masks_match_full_resolution(self):
+        image = make_image()
+        full, _ = self.select(image, None)
+        proxy, (color, edge) = self.select(image, 600)
+        for method, rect in proxy.selection_rects.items():
+            iou = proxy.helper.calculate_rect_iou(full.selection_rects[method], rect)
+            self.assertGreater(iou, 0.95, method)
+        x, y, w, h = proxy.selection_rects['color_segmentation']
+        self.assertEqual(color.shape, (h, w, 3))
+
+    def test_rect_iou(self):
+        helper = ObjectSelectionHelper(verbose=False)
+        self.assertEqual(helper.calculate_rect_iou((0, 0, 10, 10), (0, 0, 10, 10)), 1.0)
+        self.assertAlmostEqual(helper.calculate_rect_iou((0, 0, 10, 10), (5, 0, 10, 10)), 50 / 150)
+        self.assertEqual(helper.calculate_rect_iou((0, 0, 10, 10), (20, 20, 5, 5)), 0.0)
+        self.assertEqual(helper.calculate_rect_iou(None, None), 1.0)
+
+    def test_mask_iou(self):
+        helper = ObjectSelectionHelper(verbose=False)
+        a = np.zeros((10, 10), np.uint8)
+        b = np.zeros((10, 10), np.uint8)
+        self.assertEqual(helper.calculate_mask_iou(a, b), 1.0)
+        a[:, :5] = 255
+        b[:, :4] = 255
+        self.assertAlmostEqual(helper.calculate_mask_iou(a, b), 0.8)
+
+class TestSelectionCrop(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for selection cropping...")
+
+    def setUp(self):
+        self.image = np.arange(40 * 30 * 3, dtype=np.uint32).reshape(40, 30, 3).astype(np.uint8)
+
+    def test_rectify_mask_returns_rectangle(self):
+        helper = ObjectSelectionHelper(verbose=False)
+        mask = np.zeros((40, 30), np.uint8)
+        cv2.circle(mask, (15, 20), 8, 255, -1)
+        rect_mask, rect = helper.rectify_mask(mask, return_rect=True)
+        x, y, w, h = rect
+        self.assertEqual(np.count_nonzero(rect_mask), w * h)
+        self.assertTrue(rect_mask[y:y + h, x:x + w].all())
+
+    def test_crop_includes_last_row_and_column(self):
+        selector = ObjectSelection('crop_test/image.jpg', verbose=False, image=self.image,
+                                   write_outputs=False, visualize=False)
+        cropped = selector.crop_to_rect((5, 10, 20, 25))
+        np.testing.assert_array_equal(cropped, self.image[10:35, 5:25])
+        self.assertTrue(np.shares_memory(cropped, self.image))
+
+    def test_alpha_on_request(self):
+        selector = ObjectSelection('crop_test/image.jpg', verbose=False, image=self.image,
+                                   write_outputs=False, visualize=False, alpha=True)
+        cropped = selector.crop_to_rect((5, 10, 20, 25))
+        self.assertEqual(cropped.shape, (25, 20, 4))
+        self.assertTrue((cropped[:, :, 3] == 255).all())
+        self.assertEqual(selector.crop_to_rect(None).shape, (40, 30, 4))
+
+    def test_scale_rect(self):
+        self.assertEqual(ObjectSelection.scale_rect((10, 5, 20, 10), (100, 200), (400, 800)), (40, 20, 80, 40))
+        # rounded outwards and clipped to the image
+        self.assertEqual(ObjectSelection.scale_rect((1, 1, 199, 99), (100, 200), (300, 601)), (3, 3, 598, 297))
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
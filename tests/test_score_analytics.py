@@ -0,0 +1,92 @@
+import contextlib
+import io
+import unittest
+import sys
+import os.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+import numpy as np
+import pandas as pd
+from score_analytics import (
+    add_file_key, best_preprocessing, compare_revisions, filter_recognized, exclude_worsened, add_baseline,
+    recognized_counts, max_score_diff, fill_missing_scores
+)
+
+def frame(rows, columns=('file_id', 'ocr_method', 'preprocessed_method', 'composite_score')):
+    return pd.DataFrame(rows, columns=list(columns))
+
+class TestScoreAnalytics(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for the score analytics...")
+
+    def test_file_key(self):
+        df = pd.DataFrame({'file_id': ['dataset_preprocessed/timenote/a/1_processed_edge_detection.png',
+                                       'dataset_preprocessed/timenote/a/1_processed.png',
+                                       'dataset_preprocessed/berlin-mitte/2_processed_color_segmentation.png']})
+        self.assertEqual(add_file_key(df)['file_key'].tolist(),
+                         ['dataset/timenote/a/1', 'dataset/timenote/a/1', 'dataset/berlin-mitte/2'])
+        df = pd.DataFrame({'file_id': ['dataset/timenote/a/1.jpg', 'dataset/b.c/2.jpeg']})
+        self.assertEqual(add_file_key(df, preprocessed=False)['file_key'].tolist(),
+                         ['dataset/timenote/a/1', 'dataset/b.c/2'])
+
+    def test_fill_missing_scores(self):
+        original = frame([('a', 'Tesseract', 'none', 0.2), ('b', 'Tesseract', 'none', np.nan),
+                          ('c', 'Tesseract', 'none', 0.6), ('d', 'Tesseract', 'none', 0.9)])
+        df = original.copy()
+        with contextlib.redirect_stdout(io.StringIO()):
+            filled = fill_missing_scores(df)
+        self.assertIs(filled, df)
+        self.assertEqual(df['composite_score'].tolist(), [0.2, 0.6, 0.6, 0.9])
+        # the frame it was copied from keeps its missing score
+        self.assertTrue(np.isnan(original.loc[1, 'composite_score']))
+
+    def test_best_preprocessing_tie_break(self):
+        df = frame([
+            ('k1', 'Tesseract', 'default', 0.8),
+            ('k1', 'Tesseract', 'edge_detection', 0.8),
+            ('k1', 'Tesseract', 'color_segmentation', 0.5),
+            ('k1', 'Apple Vision', 'default', 0.9),
+            ('k1', 'Apple Vision', 'color_segmentation', 0.9),
+            ('k2', 'Tesseract', 'default', np.nan),
+            ('k2', 'Tesseract', 'edge_detection', np.nan),
+        ]).rename(columns={'file_id': 'file_key'})
+        best = best_preprocessing(df)
+        self.assertEqual(list(zip(best['file_key'], best['ocr_method'], best['preprocessed_method'])),
+                         [('k1', 'Apple Vision', 'color_segmentation'), ('k1', 'Tesseract', 'edge_detection'),
+                          ('k2', 'Tesseract', 'edge_detection')])
+
+    def test_group_filters(self):
+        df = frame([
+            ('improved', 'Tesseract', 'none', 0.2), ('improved', 'Tesseract', 'default', 0.6),
+            ('improved', 'Apple Vision', 'none', 0.5), ('improved', 'Apple Vision', 'default', 0.5),
+            ('worsened', 'Tesseract', 'none', 0.4), ('worsened', 'Tesseract', 'default', 0.9),
+            ('worsened', 'Apple Vision', 'none', 0.5), ('worsened', 'Apple Vision', 'default', 0.3),
+            ('unchanged', 'Tesseract', 'none', 0.5), ('unchanged', 'Tesseract', 'default', 0.5),
+            ('unreadable', 'Tesseract', 'none', 0.01), ('unreadable', 'Tesseract', 'default', 0.05),
+        ], columns=('file_key', 'ocr_method', 'preprocessed_method', 'composite_score'))
+        recognized = filter_recognized(df)
+        self.assertNotIn('unreadable', set(recognized['file_key']))
+        df_init = df[df['preprocessed_method'] == 'none']
+        kept = exclude_worsened(add_baseline(recognized, df_init))
+        self.assertEqual(set(kept['file_key']), {'improved'})
+        self.assertEqual(max_score_diff(kept, ['file_key', 'ocr_method'])['score_diff'].round(5).tolist(), [0.0, 0.4])
+
+    def test_compare_revisions(self):
+        df_init = add_file_key(frame([
+            ('dataset/t/1.jpg', 'Tesseract', None, 0.1), ('dataset/t/2.jpg', 'Tesseract', None, 0.5),
+        ]), preprocessed=False)
+        df_preprocessed = add_file_key(frame([
+            ('dataset_preprocessed/t/1_processed.png', 'Tesseract', 'default', 0.3),
+            ('dataset_preprocessed/t/1_processed_edge_detection.png', 'Tesseract', 'edge_detection', 0.7),
+            ('dataset_preprocessed/t/2_processed.png', 'Tesseract', 'default', 0.2),
+        ]))
+        best, combined = compare_revisions(df_init, df_preprocessed, verbose=False)
+        self.assertEqual(best['preprocessed_method'].tolist(), ['edge_detection', 'default'])
+        self.assertEqual(sorted(zip(combined['preprocessed_method'], combined['score_diff'].round(5))),
+                         [('edge_detection', 0.6), ('none', 0.0)])
+        counts = recognized_counts(combined)
+        self.assertEqual(counts.loc['Tesseract'].tolist(), [1, 0])
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,51 @@
+import unittest
+from test_data import TEST_CASES
+import sys
+import os.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+import numpy as np
+from similarity_metrics import (
+    score_batch, SIMILARITY_METRICS, basic_similarity_score, jaccard_similarity_score,
+    lcs_similarity_score, jaro_winkler_similarity, difflib_similarity
+)
+
+class TestScoreBatch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for batch scoring...")
+
+    def test_matches_per_metric_functions(self):
+        pairs = [(true_text, ocr_text) for true_text, ocr_text, _ in TEST_CASES]
+        results = score_batch(pairs)
+
+        self.assertEqual(set(results), set(SIMILARITY_METRICS))
+        for name, scores in results.items():
+            self.assertEqual(scores.dtype, np.float64)
+            self.assertEqual(scores.shape, (len(pairs),))
+
+        # The string returning functions are formatted views of the same kernels
+        for i, (true_text, ocr_text) in enumerate(pairs):
+            with self.subTest(pair=(true_text, ocr_text)):
+                self.assertEqual("{:.5f}".format(results['basic_similarity_score'][i]),
+                                 basic_similarity_score(ocr_text, true_text))
+                self.assertEqual("{:.5f}".format(results['jaccard_similarity_score'][i]),
+                                 jaccard_similarity_score(ocr_text, true_text))
+                self.assertEqual("{:.5f}".format(results['lcs_similarity_score'][i]),
+                                 lcs_similarity_score(true_text, ocr_text))
+                self.assertEqual("{:.5f}".format(results['jaro_winkler_similarity'][i]),
+                                 jaro_winkler_similarity(true_text, ocr_text))
+                self.assertEqual("{:.5f}".format(results['difflib_similarity'][i]),
+                                 difflib_similarity(true_text, ocr_text))
+
+    def test_selected_metrics(self):
+        results = score_batch([("Lorem Ipsum", "Lorem Ipsum")], metrics=['lcs_similarity_score'])
+        self.assertEqual(list(results), ['lcs_similarity_score'])
+        self.assertEqual(results['lcs_similarity_score'][0], 1.0)
+
+    def test_unknown_metric(self):
+        with self.assertRaises(ValueError):
+            score_batch([("a", "b")], metrics=['no_such_metric'])
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import unittest
+import sys
+import os.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+import numpy as np
+import pandas as pd
+from score_loader import load_revision, entries_to_frame, SCORE_COLUMNS
+from score_store import ScoreStore, LEGACY_SCORES_FILENAME
+
+METRICS = ('basic_similarity_score', 'lcs_similarity_score', 'jaro_winkler_similarity', 'difflib_similarity')
+
+def make_entry(file_id, ocr_method, score):
+    return {'file_id': file_id, 'ocr_method': ocr_method, 'true_text': 'Valija', 'ocr_text': 'Valja',
+            'scores': {name: f"{score:.5f}" for name in METRICS}, 'composite_score': f"{score:.5f}"}
+
+class TestScoreLoader(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for the revision loader...")
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, 'revision_PREPROCESSED')
+        with ScoreStore(self.directory) as store:
+            for i, (folder, postfix) in enumerate((('timenote/a', '_processed.png'),
+                                                   ('timenote/a', '_processed_edge_detection.png'),
+                                                   ('berlin-mitte/b', '_processed_color_segmentation.png'),
+                                                   ('timenote/test', '_processed.png'))):
+                for method in ('Tesseract', 'Google Vision'):
+                    store.append(make_entry(f"dataset_preprocessed/{folder}/{i}{postfix}", method, i / 10))
+        legacy_directory = os.path.join(self.directory, 'dataset_preprocessed', 'timenote', 'c')
+        os.makedirs(legacy_directory)
+        with open(os.path.join(legacy_directory, LEGACY_SCORES_FILENAME), 'w', encoding='utf-8') as f:
+            f.write(json.dumps(make_entry("dataset_preprocessed/timenote/c/9_processed.png", 'Tesseract', 0.9),
+                               indent=4) + ",\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_dtypes_and_features(self):
+        df = load_revision(self.directory)
+        self.assertEqual(len(df), 9)
+        for column in SCORE_COLUMNS:
+            self.assertEqual(df[column].dtype, np.float64)
+        for column in ('ocr_method', 'dataset_type', 'preprocessed_method'):
+            self.assertIsInstance(df[column].dtype, pd.CategoricalDtype)
+        by_file = df.drop_duplicates('file_id').set_index('file_id')
+        self.assertEqual(by_file.loc['dataset_preprocessed/timenote/a/1_processed_edge_detection.png',
+                                     'preprocessed_method'], 'edge_detection')
+        self.assertEqual(by_file.loc['dataset_preprocessed/berlin-mitte/b/2_processed_color_segmentation.png',
+                                     ['preprocessed_method', 'dataset_type']].tolist(),
+                         ['color_segmentation', 'berlin-mitte'])
+        self.assertAlmostEqual(by_file.loc['dataset_preprocessed/timenote/c/9_processed.png', 'composite_score'], 0.9)
+
+    def test_options(self):
+        df = load_revision(self.directory, skip_test_dirs=True)
+        self.assertEqual(len(df), 7)
+        self.assertFalse(df['file_id'].str.contains('/test/').any())
+
+        threaded = load_revision(self.directory, threads=4)
+        pd.testing.assert_frame_equal(threaded, load_revision(self.directory))
+
+        df = load_revision(self.directory, include_text=False, features=False)
+        self.assertNotIn('ocr_text', df.columns)
+        self.assertNotIn('dataset_type', df.columns)
+
+    def test_matches_json_normalize(self):
+        entries = [make_entry("dataset/timenote/a/1.jpg", 'Tesseract', 0.5),
+                   make_entry("dataset/timenote/a/2.jpg", 'Apple Vision', 0.25)]
+        entries[1]['scores']['difflib_similarity'] = 'n/a'
+        expected = pd.json_normalize(entries)
+        for column in SCORE_COLUMNS:
+            expected[column] = pd.to_numeric(expected[column], errors='coerce')
+        df = entries_to_frame(entries)
+        pd.testing.assert_frame_equal(df[expected.columns].astype({'ocr_method': object}), expected,
+                                      check_dtype=False)
+        # no preprocessed images, so no preprocessed_method
+        self.assertNotIn('preprocessed_method', load_revision(os.path.join(self.tmp.name, 'missing')).columns)
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,130 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+import sys
+import os.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+from score_store import ScoreStore, read_entries, SCORES_FILENAME, LEGACY_SCORES_FILENAME
+from score_loader import load_revision
+from similarity_score_service import ScoreService
+
+def make_entry(file_id, ocr_method, score=0.5):
+    return {'file_id': file_id, 'ocr_method': ocr_method, 'true_text': 'Valija', 'ocr_text': 'Vālija',
+            'scores': {'lcs_similarity_score': f"{score:.5f}"}, 'composite_score': f"{score:.5f}"}
+
+class TestScoreStore(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for the score store...")
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base_directory = os.path.join(self.tmp.name, 'revision_TEST')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_buffered_writes(self):
+        store = ScoreStore(self.base_directory, flush_every=3)
+        path = store.path_for('dataset/timenote/a.jpg')
+        self.assertEqual(path, os.path.join(self.base_directory, 'dataset/timenote', SCORES_FILENAME))
+        store.append(make_entry('dataset/timenote/a.jpg', 'Tesseract'))
+        store.append(make_entry('dataset/timenote/a.jpg', 'Google Vision'))
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(store.contains('dataset/timenote/a.jpg', 'Google Vision'))
+        store.append(make_entry('dataset/berlin-mitte/b.jpg', 'Tesseract'))
+        self.assertEqual(len(read_entries(path)), 2)
+
+        with ScoreStore(self.base_directory) as store:
+            store.append(make_entry('dataset/timenote/c.jpg', 'Tesseract'))
+        with open(path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])['ocr_text'], 'Vālija')
+
+    def test_interrupted_write_and_legacy_files(self):
+        directory = os.path.join(self.base_directory, 'dataset', 'timenote')
+        os.makedirs(directory)
+        with open(os.path.join(directory, LEGACY_SCORES_FILENAME), 'w', encoding='utf-8') as f:
+            for entry in (make_entry('dataset/timenote/a.jpg', 'Tesseract', 0.25),
+                          make_entry('dataset/timenote/b.jpg', 'Tesseract', 0.75)):
+                f.write(json.dumps(entry, ensure_ascii=False, indent=4) + ",\n")
+        with open(os.path.join(directory, SCORES_FILENAME), 'w', encoding='utf-8') as f:
+            f.write(json.dumps(make_entry('dataset/timenote/c.jpg', 'Tesseract', 1.0)) + "\n")
+            f.write(json.dumps(make_entry('dataset/timenote/d.jpg', 'Tesseract'))[:40])
+
+        store = ScoreStore(self.base_directory)
+        self.assertTrue(store.contains('dataset/timenote/a.jpg', 'Tesseract'))
+        self.assertTrue(store.contains('dataset/timenote/c.jpg', 'Tesseract'))
+        self.assertFalse(store.contains('dataset/timenote/d.jpg', 'Tesseract'))
+
+        df = load_revision(self.base_directory)
+        self.assertEqual(sorted(df['file_id']), ['dataset/timenote/a.jpg', 'dataset/timenote/b.jpg',
+                                                 'dataset/timenote/c.jpg'])
+
+        # appending after the cut off line keeps the new entries readable
+        with store:
+            store.append(make_entry('dataset/timenote/d.jpg', 'Tesseract'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = load_revision(self.base_directory)
+        self.assertEqual(len(df), 4)
+        self.assertIn('scores.lcs_similarity_score', df.columns)
+
+        # the 'test' subdirectories of the dataset are left out on request
+        with store:
+            store.append(make_entry('dataset/test/e.jpg', 'Tesseract'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(len(load_revision(self.base_directory)), 5)
+            self.assertEqual(len(load_revision(self.base_directory, skip_test_dirs=True)), 4)
+
+    def test_corrupted_line(self):
+        path = os.path.join(self.base_directory, SCORES_FILENAME)
+        os.makedirs(self.base_directory)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(make_entry('a.jpg', 'Tesseract')) + "\n{not json\n"
+                    + json.dumps(make_entry('b.jpg', 'Tesseract')) + "\n")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual([entry['file_id'] for entry in read_entries(path)], ['a.jpg', 'b.jpg'])
+
+class TestScoreServiceStore(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for score logging...")
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_resume_after_close(self):
+        with ScoreService('TEST', verbose=False) as service:
+            service.process_scores('dataset/timenote/a.jpg', 'Tesseract', 'Valija', 'Valja')
+            self.assertTrue(service.is_scored('dataset/timenote/a.jpg', 'Tesseract'))
+
+        service = ScoreService('TEST', verbose=False)
+        self.assertTrue(service.is_scored('dataset/timenote/a.jpg', 'Tesseract'))
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            service.process_scores('dataset/timenote/a.jpg', 'Tesseract', 'Valija', 'Valja')
+        service.close()
+        self.assertEqual(output.getvalue(), '')
+        with ScoreService('TEST') as service, contextlib.redirect_stdout(output):
+            service.process_scores('dataset/timenote/a.jpg', 'Tesseract', 'Valija', 'Valja')
+        self.assertIn("already logged", output.getvalue())
+
+        df = load_revision(service.base_directory)
+        self.assertEqual(len(df), 1)
+        self.assertEqual(df.loc[0, 'ocr_text'], 'Valja')
+        self.assertIn('scores.difflib_similarity', df.columns)
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,128 @@
+import os
+import tempfile
+import types
+import unittest
+import unittest.mock
+import sys
+import os.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+import numpy as np
+import tesseract_ocr
+from ocr_cache import OCRResultCache
+from tesseract_ocr import TesseractOCR
+
+class StubAPI:
+    """Records how the persistent tesserocr API is initialized and fed."""
+    instances = []
+
+    def __init__(self, lang, psm, oem, path=None):
+        if lang == 'broken':
+            raise RuntimeError("Failed to init API, possibly an invalid tessdata path")
+        self.lang = lang
+        self.variables = {}
+        self.images = []
+        self.ended = False
+        StubAPI.instances.append(self)
+
+    def SetVariable(self, name, value):
+        self.variables[name] = value
+
+    def SetImageBytes(self, data, width, height, bytes_per_pixel, bytes_per_line):
+        self.images.append((len(data), width, height, bytes_per_pixel, bytes_per_line))
+
+    def GetUTF8Text(self):
+        return f" tesserocr {self.lang}\n"
+
+    def MeanTextConf(self):
+        return 91
+
+    def End(self):
+        self.ended = True
+
+# Stands in for the tesserocr module, so the tests run whether or not it is installed
+STUB_TESSEROCR = types.SimpleNamespace(PyTessBaseAPI=StubAPI, PSM=types.SimpleNamespace(AUTO=3),
+                                       OEM=types.SimpleNamespace(DEFAULT=3))
+
+class TestTesseractBackends(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for the Tesseract backends...")
+
+    def setUp(self):
+        StubAPI.instances = []
+        self.api_patch = unittest.mock.patch.object(tesseract_ocr, 'tesserocr', STUB_TESSEROCR)
+        self.api_patch.start()
+        self.string_patch = unittest.mock.patch.object(tesseract_ocr.pytesseract, 'image_to_string',
+                                                       return_value=' pytesseract\n')
+        self.image_to_string = self.string_patch.start()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.api_patch.stop()
+        self.string_patch.stop()
+        self.tmp.cleanup()
+
+    def test_backend_resolution(self):
+        self.assertTrue(TesseractOCR().use_tesserocr)
+        self.assertFalse(TesseractOCR(backend='pytesseract').use_tesserocr)
+        with self.assertRaises(ValueError):
+            TesseractOCR(backend='tesseract')
+        with unittest.mock.patch.object(tesseract_ocr, 'tesserocr', None):
+            # 'auto' falls back to the tesseract binary, an explicit 'tesserocr' fails early
+            tesseract = TesseractOCR()
+            self.assertFalse(tesseract.use_tesserocr)
+            self.assertEqual(tesseract.run_ocr(np.zeros((8, 8), np.uint8)), 'pytesseract')
+            with self.assertRaises(ImportError):
+                TesseractOCR(backend='tesserocr')
+
+    def test_api_per_language_is_reused(self):
+        tesseract = TesseractOCR()
+        image = np.zeros((8, 8), np.uint8)
+        self.assertEqual(tesseract.run_ocr(image, 'lav'), 'tesserocr lav')
+        self.assertEqual(tesseract.run_ocr(image, 'lav'), 'tesserocr lav')
+        self.assertEqual(tesseract.run_ocr(image, 'deu'), 'tesserocr deu')
+        self.assertEqual([api.lang for api in StubAPI.instances], ['lav', 'deu'])
+        self.assertEqual(StubAPI.instances[0].variables['tessedit_char_blacklist'],
+                         tesseract.language_blacklists['lav'])
+        self.assertEqual(len(StubAPI.instances[0].images), 2)
+        self.image_to_string.assert_not_called()
+
+        tesseract.close()
+        self.assertTrue(all(api.ended for api in StubAPI.instances))
+
+    def test_failed_api_falls_back_to_pytesseract(self):
+        tesseract = TesseractOCR()
+        tesseract.language_blacklists['broken'] = ''
+        image = np.zeros((8, 8), np.uint8)
+        with unittest.mock.patch('builtins.print'):
+            self.assertEqual(tesseract.run_ocr(image, 'broken'), 'pytesseract')
+            self.assertEqual(tesseract.run_ocr(image, 'broken'), 'pytesseract')
+        # the failed initialization is remembered, not retried for every image
+        self.assertIsNone(tesseract._apis[('broken', '')])
+        self.assertEqual(tesseract.backend_for('broken'), 'pytesseract')
+
+    def test_image_bytes(self):
+        tesseract = TesseractOCR()
+        tesseract.run_ocr(np.zeros((6, 10), np.uint8), 'lav')
+        # a non contiguous view is copied before its buffer is handed over
+        tesseract.run_ocr(np.zeros((6, 20, 3), np.uint8)[:, ::2], 'lav')
+        self.assertEqual(StubAPI.instances[0].images, [(60, 10, 6, 1, 10), (180, 10, 6, 3, 30)])
+
+        # images tesserocr cannot take from a buffer go to pytesseract
+        self.assertEqual(tesseract.run_ocr(np.zeros((6, 10), np.float32), 'lav'), 'pytesseract')
+        self.assertEqual(tesseract.run_ocr_with_confidence(np.zeros((6, 10), np.uint8), 'lav'),
+                         ('tesserocr lav', 91.0))
+
+    def test_cache_key_includes_backend(self):
+        cache = OCRResultCache(os.path.join(self.tmp.name, 'ocr_cache.sqlite'))
+        image = np.zeros((8, 8), np.uint8)
+        self.assertEqual(TesseractOCR(cache=cache).run_ocr(image, 'lav'), 'tesserocr lav')
+        self.assertEqual(TesseractOCR(cache=cache, backend='pytesseract').run_ocr(image, 'lav'), 'pytesseract')
+        self.assertEqual(TesseractOCR(cache=cache).run_ocr(image, 'lav'), 'tesserocr lav')
+        self.assertEqual(len(StubAPI.instances[0].images), 1)
+        self.assertEqual(self.image_to_string.call_count, 1)
+        self.assertIn('--backend tesserocr', TesseractOCR().cache_config('lav'))
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,96 @@
+import contextlib
+import io
+import unittest
+import sys
+import os.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+import numpy as np
+from object_selection import ObjectSelection, SELECTION_METHODS, register_selection_method
+from preprocess import EarlyExitStrategy, PROCESSED_POSTFIXES, VARIANT_POSTFIXES
+
+class StubTesseract:
+    """Returns a fixed confidence per variant, None to simulate a failure."""
+    def __init__(self, confidences):
+        self.confidences = confidences
+        self.calls = []
+
+    def run_ocr_with_confidence(self, image, lang):
+        self.calls.append(image)
+        confidence = self.confidences[image]
+        return (None, None) if confidence is None else ("text", confidence)
+
+def variants(consumed):
+    for method in VARIANT_POSTFIXES:
+        consumed.append(method)
+        yield method, method
+
+class TestEarlyExitStrategy(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for preprocessed variant selection...")
+
+    def test_variant_order(self):
+        self.assertEqual(tuple(VARIANT_POSTFIXES), ('default', 'color_segmentation', 'edge_detection'))
+        self.assertEqual(PROCESSED_POSTFIXES, ('_processed.png', '_processed_color_segmentation.png',
+                                               '_processed_edge_detection.png'))
+
+    def test_stops_at_confident_variant(self):
+        tesseract = StubTesseract({'default': 90.0, 'color_segmentation': 95.0, 'edge_detection': 99.0})
+        strategy = EarlyExitStrategy(tesseract, min_confidence=80)
+        consumed = []
+        choice = strategy.select(variants(consumed), 'lav')
+        self.assertEqual((choice.method, choice.confidence, choice.tried), ('default', 90.0, 1))
+        # later variants are not even computed
+        self.assertEqual(consumed, ['default'])
+
+    def test_best_of_when_none_is_confident(self):
+        tesseract = StubTesseract({'default': 40.0, 'color_segmentation': 60.0, 'edge_detection': 50.0})
+        strategy = EarlyExitStrategy(tesseract, min_confidence=80)
+        choice = strategy.select(variants([]), 'lav')
+        self.assertEqual((choice.method, choice.image, choice.tried), ('color_segmentation', 'color_segmentation', 3))
+        self.assertEqual(strategy.chosen['color_segmentation'], 1)
+        self.assertIn("3.00 of 3 variants", strategy.report())
+
+    def test_failures(self):
+        tesseract = StubTesseract({'default': None, 'color_segmentation': 30.0, 'edge_detection': None})
+        choice = EarlyExitStrategy(tesseract).select(variants([]), 'lav')
+        self.assertEqual(choice.method, 'color_segmentation')
+
+        tesseract = StubTesseract({'default': None, 'color_segmentation': None, 'edge_detection': None})
+        choice = EarlyExitStrategy(tesseract).select(variants([]), 'lav')
+        self.assertEqual((choice.method, choice.confidence), ('default', None))
+
+class TestSelectionMethodRegistry(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for the selection method registry...")
+
+    def setUp(self):
+        self.image = np.zeros((60, 80, 3), np.uint8)
+        self.image[10:40, 20:50] = 255
+
+    def test_registered_method(self):
+        @register_selection_method('whole_image')
+        def select_whole_image(selector, image, images):
+            return np.full(image.shape[:2], 255, np.uint8)
+        try:
+            selector = ObjectSelection('registry_test/image.jpg', verbose=False, image=self.image,
+                                       write_outputs=False, visualize=False, methods=['whole_image'])
+            with contextlib.redirect_stdout(io.StringIO()):
+                (cropped,) = selector.run_in_memory()
+            self.assertEqual(cropped.shape, self.image.shape)
+            self.assertEqual(selector.selection_rects['whole_image'], (0, 0, 80, 60))
+        finally:
+            del SELECTION_METHODS['whole_image']
+
+    def test_unknown_method(self):
+        selector = ObjectSelection('registry_test/image.jpg', verbose=False, image=self.image,
+                                   write_outputs=False, visualize=False)
+        selector.setup_helper()
+        with self.assertRaises(ValueError):
+            selector.select_object('no_such_method')
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,83 @@
+import contextlib
+import io
+import os
+import subprocess
+import tempfile
+import unittest
+import unittest.mock
+import sys
+import os.path
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+import cv2
+import numpy as np
+import object_selection
+from object_selection import ObjectSelection, should_visualize
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir))
+
+def make_image():
+    """A light plaque with text on a darker background."""
+    image = np.full((300, 400, 3), (150, 90, 60), np.uint8)
+    cv2.rectangle(image, (100, 75), (300, 225), (225, 225, 215), -1)
+    cv2.putText(image, "1921", (140, 165), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (30, 30, 30), 3)
+    return image
+
+class TestVisualization(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        print("\nExecuting tests for the object selection visualizations...")
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def select(self, executor):
+        selector = ObjectSelection('dataset/image.jpg', verbose=False, image=make_image(), write_outputs=False,
+                                   visualize=True, visualization_executor=executor)
+        with contextlib.redirect_stdout(io.StringIO()):
+            selector.run_in_memory()
+        return selector
+
+    def test_should_visualize(self):
+        self.assertEqual([i for i in range(10) if should_visualize(i, 3)], [0, 3, 6, 9])
+        self.assertTrue(all(should_visualize(i, 1) for i in range(10)))
+        self.assertFalse(any(should_visualize(i, 0) for i in range(10)))
+        self.assertFalse(any(should_visualize(i, None) for i in range(10)))
+
+    def test_matplotlib_is_imported_lazily(self):
+        code = ("import sys, numpy as np, object_selection, preprocess, object_selection_processor; "
+                "image = np.full((120, 160, 3), 200, np.uint8); image[30:90, 40:120] = 60; "
+                "object_selection.ObjectSelection('dataset/image.jpg', verbose=False, image=image, "
+                "write_outputs=False, visualize=False).run_in_memory(); "
+                "print('matplotlib' in sys.modules)")
+        output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip(), 'False')
+
+    def test_queued_visualizations_are_waited_for(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            selector = self.select(executor)
+            paths = selector.close()
+        self.assertEqual(len(paths), len(selector.methods))
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+        self.assertEqual(selector.close(), [])
+
+    def test_failed_visualization_is_raised(self):
+        def render_steps(images, output_path):
+            raise MemoryError("figure too large")
+        with ThreadPoolExecutor(max_workers=2) as executor, \
+                unittest.mock.patch.object(object_selection, 'render_steps', render_steps):
+            selector = self.select(executor)
+            with self.assertRaises(RuntimeError) as raised:
+                selector.close()
+        self.assertIsInstance(raised.exception.__cause__, MemoryError)
+        self.assertEqual(selector.visualization_futures, [])
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)